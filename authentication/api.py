@@ -31,6 +31,8 @@ from rest_framework.views import APIView, status
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from notification.devices import reactivate_device
+from notification.topics import subscribe_device
 from utils.utils import CustomErrorResponse, CustomSuccessResponse, send_email
 
 from .models import CustomUser
@@ -149,6 +151,10 @@ class UserDeviceAPI(APIView):
         if not created:
             device.type = device_type
             device.save()
+            # Daha önce ölü token diye pasife çekildiyse tekrar gönderime al
+            reactivate_device(device)
+
+        subscribe_device(device)
 
         return CustomSuccessResponse(status_code=status.HTTP_200_OK)
 
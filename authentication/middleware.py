@@ -0,0 +1,47 @@
+from logging import getLogger
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+logger = getLogger("my_logger")
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        # Geçersiz token / silinmiş ya da pasif kullanıcı; DB hataları yukarı çıkar
+        return AnonymousUser()
+
+
+def token_from_scope(scope):
+    """
+    Access token of a WebSocket handshake: `Authorization: Bearer <token>`
+    header, or `?token=<token>` for clients that can't set headers.
+    """
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode('latin-1').split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                return parts[1]
+    tokens = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('token')
+    return tokens[0] if tokens else None
+
+
+class JWTAuthMiddleware:
+    """Channels middleware that puts the simplejwt user (or AnonymousUser) in scope['user']."""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        raw_token = token_from_scope(scope)
+        user = await get_user_for_token(raw_token) if raw_token else AnonymousUser()
+        return await self.inner({**scope, 'user': user}, receive, send)
@@ -13,4 +13,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+# Uygulama modülleri import edilmeden önce Django kurulmuş olmalı
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+from authentication.middleware import JWTAuthMiddleware  # noqa: E402
+from notification.routing import websocket_urlpatterns  # noqa: E402
+
+# WebSocket'ler cookie değil JWT ile doğrulanır, origin kontrolüne gerek yok
+# (mobil istemciler Origin header'ı göndermiyor)
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
@@ -16,7 +16,6 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
-from django.conf import settings
 from dotenv import load_dotenv
 from firebase_admin import credentials, initialize_app
 
@@ -54,7 +53,8 @@ SIMPLE_JWT = {
     'UPDATE_LAST_LOGIN': False,
 
     'ALGORITHM': 'HS256',
-    'SIGNING_KEY': settings.SECRET_KEY,
+    # django.conf.settings burada okunamaz: backend.test_settings bu modülü import ederken döngüye girer
+    'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
     'AUDIENCE': None,
     'ISSUER': None,
@@ -96,6 +96,7 @@ INSTALLED_APPS = [
     'invoice',
     'fcm_django',
     'logger',
+    'channels',
 ]
 
 # Create a custom middleware to bypass authentication for Swagger
@@ -117,6 +118,7 @@ class BypassAuthMiddleware:
 
 MIDDLEWARE = [
     'backend.settings.BypassAuthMiddleware',  # Add custom middleware at the start
+    'utils.middleware.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise for static files
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -148,6 +150,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
@@ -175,9 +178,22 @@ else:
         }
     }
 
+# my_logger kayıtları kuyruğa atılıp hemen döner; dosyaya (JSON, boyuta göre
+# dönen) ve konsola yazma ayrı bir listener thread'inde yapılır. Aynı satırdan
+# dakikada RATE_LIMIT_BURST'ten fazla gelen log özetlenir.
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {
+            '()': 'utils.logs.RequestIdFilter',
+        },
+        'rate_limit': {
+            '()': 'utils.logs.RateLimitFilter',
+            'burst': int(os.environ.get('LOG_RATE_LIMIT_BURST', 20)),
+            'period': float(os.environ.get('LOG_RATE_LIMIT_PERIOD', 60)),
+        },
+    },
     'formatters': {
         'verbose': {
             'format': '{levelname} {asctime} {module} {message}',
@@ -189,11 +205,15 @@ LOGGING = {
         },
     },
     'handlers': {
-        'file': {
+        'async': {
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
+            'class': 'utils.logs.AsyncQueueHandler',
             'filename': os.path.join(BASE_DIR, 'debug.log'),
-            'formatter': 'verbose',
+            'max_bytes': int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+            'backup_count': int(os.environ.get('LOG_BACKUP_COUNT', 5)),
+            'console_level': 'WARNING',
+            'queue_size': 10000,
+            'filters': ['request_id', 'rate_limit'],
         },
         'console': {
             'level': 'WARNING',
@@ -208,13 +228,219 @@ LOGGING = {
             'propagate': True,
         },
         'my_logger': {
-            'handlers': ['file', 'console'],
-            'level': 'WARNING',
+            'handlers': ['async'],
+            'level': os.environ.get('LOG_LEVEL', 'WARNING'),
             'propagate': False,
         },
     },
 }
 
+# Request log'ları istek içinde değil, arka plan thread'inden toplu yazılır
+REQUEST_LOG_BUFFER = {
+    'ENABLED': os.environ.get('REQUEST_LOG_BUFFER_ENABLED', 'True') == 'True',
+    'MAX_QUEUE_SIZE': int(os.environ.get('REQUEST_LOG_MAX_QUEUE_SIZE', 10000)),
+    'BATCH_SIZE': int(os.environ.get('REQUEST_LOG_BATCH_SIZE', 500)),
+    'FLUSH_INTERVAL': float(os.environ.get('REQUEST_LOG_FLUSH_INTERVAL', 2.0)),
+    # 'drop_newest' veya 'drop_oldest'
+    'OVERFLOW_POLICY': os.environ.get('REQUEST_LOG_OVERFLOW_POLICY', 'drop_newest'),
+    'SHUTDOWN_TIMEOUT': 10.0,
+}
+
+# Hangi body'lerin loglanacağı: path prefix -> örnekleme oranı. Hatalı
+# cevaplar (status >= 400) her zaman yakalanır.
+REQUEST_LOG_CAPTURE = {
+    'MAX_BODY_BYTES': int(os.environ.get('REQUEST_LOG_MAX_BODY_BYTES', 16 * 1024)),
+    'DEFAULT_SAMPLE_RATE': float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 1.0)),
+    'SAMPLE_RATES': {
+        '/user/notification/': 0.1,
+        '/health-check/': 0.0,
+    },
+    'ALWAYS_CAPTURE_ERRORS': True,
+}
+
+# Postgres'te logger_requestlog günlük/aylık partition'lara bölünür.
+# `python manage.py rotate_request_logs` yeni partition'ları açar ve süresi
+# dolanları siler; REQUEST_LOG_AUTO_ROLLOVER=True ile log writer thread'i bunu
+# saatte bir kendisi yapar (varsayılan kapalı, cron ile çalıştırılır). Partition'ı açılmadan gelip DEFAULT partition'a
+# düşen satırlar rollover sırasında yeni partition'lara taşınır. sqlite'ta
+# eski kayıtlar parça parça silinir.
+REQUEST_LOG_PARTITIONING = {
+    'INTERVAL': os.environ.get('REQUEST_LOG_PARTITION_INTERVAL', 'day'),
+    'RETENTION_DAYS': int(os.environ.get('REQUEST_LOG_RETENTION_DAYS', 30)),
+    'PREMAKE': 3,
+    'DETACH': os.environ.get('REQUEST_LOG_DETACH_PARTITIONS', 'False') == 'True',
+    'AUTO_ROLLOVER': os.environ.get('REQUEST_LOG_AUTO_ROLLOVER', 'False') == 'True',
+    'ROLLOVER_INTERVAL': 3600,
+    'DELETE_BATCH_SIZE': 5000,
+}
+
+# /logger/stats/ cevapları `python manage.py rollup_request_logs` ile (cron,
+# dakikada bir) üretilen dakika/saat/gün özetlerinden gelir. Satırlar id
+# sırasıyla toplanır; geç yazılanlar da kendi dakikalarına eklenir
+REQUEST_LOG_ROLLUPS = {
+    'ROWS_PER_TRANSACTION': 50_000,
+    'MINUTE_RETENTION_DAYS': 7,
+    'HOUR_RETENTION_DAYS': 90,
+    'DAY_RETENTION_DAYS': None,
+}
+
+# Her istekte view'in çalıştırdığı SQL sorgu sayısı, toplam DB süresi ve en
+# yavaş sorgunun parmak izi RequestLog'a yazılır (DEBUG gerektirmez)
+REQUEST_LOG_DB_INSTRUMENTATION = {
+    'ENABLED': os.environ.get('REQUEST_LOG_DB_INSTRUMENTATION', 'True') == 'True',
+    'MAX_FINGERPRINT_LENGTH': 1000,
+}
+
+# Yavaş istekler için örneklemeli profil. Eşiği (route prefix'ine göre ms)
+# aşan, SAMPLE_RATE ile seçilen ya da `X-Profile: <DEBUG_TOKEN>` header'ı
+# gelen isteklerin stack'leri RequestLog.profile'a yazılır;
+# /logger/logs/<id>/profile/ flamegraph formatında indirir.
+REQUEST_LOG_PROFILING = {
+    'ENABLED': os.environ.get('REQUEST_LOG_PROFILING_ENABLED', 'False') == 'True',
+    'INTERVAL': 0.005,
+    'THRESHOLD_MS': int(os.environ.get('REQUEST_LOG_PROFILING_THRESHOLD_MS', 1000)),
+    'ROUTE_THRESHOLDS': {
+        '/notification/general/send/': 3000,
+        '/user/users/': 500,
+    },
+    'ARM_RATIO': 0.5,
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_LOG_PROFILING_SAMPLE_RATE', 0.0)),
+    'DEBUG_HEADER': 'X-Profile',
+    'DEBUG_TOKEN': os.environ.get('REQUEST_LOG_PROFILING_TOKEN', ''),
+}
+
+# Request/response body'leri 'compressed' modda JSON yerine hazır zlib
+# sözlüğüyle sıkıştırılmış BinaryField kolonlarına yazılır. Eski satırlar:
+# `python manage.py compress_request_log_payloads`
+REQUEST_LOG_PAYLOAD_STORAGE = {
+    'MODE': os.environ.get('REQUEST_LOG_PAYLOAD_MODE', 'compressed'),
+    'LEVEL': 6,
+    'DICTIONARY_ID': int(os.environ.get('REQUEST_LOG_PAYLOAD_DICTIONARY_ID', 1)),
+    'DICTIONARY_FILES': {},
+}
+
+# Logların nereye yazılacağı: 'database' (REQUEST_LOG_BUFFER üzerinden),
+# 'ndjson' (worker başına dönen dosya) veya 'redis' (stream). Dosya ve stream
+# `python manage.py load_request_logs ndjson|redis` ile tabloya yüklenir.
+REQUEST_LOG_SINK = {
+    'BACKEND': os.environ.get('REQUEST_LOG_SINK', 'database'),
+    'NDJSON': {
+        'PATH': os.environ.get('REQUEST_LOG_NDJSON_PATH', os.path.join(BASE_DIR, 'logs', 'request_logs-{pid}.ndjson')),
+        'MAX_BYTES': 64 * 1024 * 1024,
+        'MAX_AGE': 300,
+        'MAX_BACKLOG': 50,
+        'BUFFER_SIZE': 200,
+        'FLUSH_INTERVAL': 1.0,
+    },
+    'REDIS': {
+        'URL': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+        'STREAM': os.environ.get('REQUEST_LOG_REDIS_STREAM', 'request_logs'),
+        'MAXLEN': int(os.environ.get('REQUEST_LOG_REDIS_MAXLEN', 1000000)),
+        'BATCH_SIZE': 200,
+        'FLUSH_INTERVAL': 0.5,
+        'MAX_QUEUE_SIZE': 10000,
+    },
+}
+
+# Bildirimler cihaz başına tek tek değil, 500 token'lık FCM multicast
+# batch'leri halinde gönderilir. BACKEND='memory' FCM'e hiç gitmeyen test
+# transport'u, 'fake_http' yerel sahte FCM sunucusu (notification.fakefcm).
+# Offline ölçüm: `python manage.py benchmark_notification_fanout`
+NOTIFICATION_DELIVERY = {
+    'BACKEND': os.environ.get('NOTIFICATION_TRANSPORT', 'fcm'),
+    'BATCH_SIZE': int(os.environ.get('NOTIFICATION_BATCH_SIZE', 500)),
+    'DRY_RUN': os.environ.get('NOTIFICATION_DRY_RUN', 'False') == 'True',
+    'MEMORY': {
+        'LATENCY': float(os.environ.get('NOTIFICATION_MEMORY_LATENCY', 0.0)),
+        'FAILING_TOKENS': [],
+    },
+    'FAKE_HTTP': {
+        'URL': os.environ.get('NOTIFICATION_FAKE_FCM_URL', 'http://127.0.0.1:8765'),
+        'TIMEOUT': 10.0,
+    },
+}
+
+# Genel bildirimler NotificationBroadcast işi olarak kuyruğa alınır ve
+# `python manage.py run_notification_broadcasts` worker'ı tarafından gönderilir.
+# LEASE_TIMEOUT saniye heartbeat atmayan worker'ın işi başka worker'a geçer.
+NOTIFICATION_BROADCAST = {
+    'BATCH_SIZE': int(os.environ.get('NOTIFICATION_BROADCAST_BATCH_SIZE', 500)),
+    'LEASE_TIMEOUT': int(os.environ.get('NOTIFICATION_BROADCAST_LEASE_TIMEOUT', 300)),
+    'POLL_INTERVAL': 5.0,
+}
+
+# FCM'in UNREGISTERED / SENDER_ID_MISMATCH / geçersiz token dediği cihazlar
+# gönderim sırasında pasife çekilir. `python manage.py compact_fcm_devices`
+# (cron, günde bir) sürekli hata alanları pasife çeker, uzun süredir pasif
+# olanları siler.
+NOTIFICATION_DEVICE_PRUNING = {
+    'FAILURE_STREAK_LIMIT': int(os.environ.get('NOTIFICATION_FAILURE_STREAK_LIMIT', 10)),
+    'INACTIVE_RETENTION_DAYS': int(os.environ.get('NOTIFICATION_INACTIVE_DEVICE_RETENTION_DAYS', 30)),
+    'DELETE_BATCH_SIZE': 1000,
+}
+
+# Kayıtlı cihazlar `all` ve `lang_<app_lang>` FCM topic'lerine abone edilir
+# (kayıt ve dil değişikliğinde arka planda). Genel bildirim `mode=topic` ile
+# tek çağrıda gider. Topic'ler açılmadan önce kayıtlı cihazlar abone değildir:
+# ilk deploy'da bir kez, sonra sapmalar için (cron, günde bir)
+# `python manage.py sync_notification_topics` çalıştırılmalı
+NOTIFICATION_TOPICS = {
+    'ENABLED': os.environ.get('NOTIFICATION_TOPICS_ENABLED', 'True') == 'True',
+    'ALL_TOPIC': os.environ.get('NOTIFICATION_ALL_TOPIC', 'all'),
+    'LANGUAGE_PREFIX': 'lang_',
+    'BATCH_SIZE': 1000,
+    'WORKERS': 2,
+}
+
+# Okunmamış bildirim sayısı NotificationCounter'da tutulur, REDIS_URL
+# verilmişse Redis'te TTL'li bir kopyası okunur. Sapmalar için (cron, saatte bir):
+# `python manage.py reconcile_notification_counters`
+NOTIFICATION_UNREAD_COUNTER = {
+    'REDIS_URL': os.environ.get('NOTIFICATION_COUNTER_REDIS_URL', os.environ.get('REDIS_URL')),
+    'KEY_PREFIX': 'notification:unread:',
+    'TTL': int(os.environ.get('NOTIFICATION_COUNTER_TTL', 3600)),
+}
+
+# Eski bildirimler `python manage.py purge_notifications` (cron, günde bir) ile
+# id aralıkları halinde silinir. ARCHIVE açıksa önce kullanıcı/ay başına
+# sıkıştırılmış JSON olarak NotificationArchive'e taşınır. Süreyi kapatmak
+# için env değeri boş ya da "none" verilir.
+def optional_int_env(name, default):
+    value = os.environ.get(name, str(default)).strip()
+    return None if value.lower() in ('', 'none') else int(value)
+
+
+NOTIFICATION_RETENTION = {
+    'READ_TTL_DAYS': optional_int_env('NOTIFICATION_READ_TTL_DAYS', 90),
+    'UNREAD_TTL_DAYS': optional_int_env('NOTIFICATION_UNREAD_TTL_DAYS', 365),
+    'ARCHIVE': os.environ.get('NOTIFICATION_ARCHIVE', 'False') == 'True',
+    'BATCH_SIZE': 5000,
+}
+
+# WebSocket bildirimleri Redis channel layer'ı üzerinden worker'lar arası
+# dağıtılır. In-memory katman sadece tek süreçte çalışır (diğer worker'lara
+# bağlı kullanıcılar push almaz); `manage.py check --deploy` DEBUG kapalıyken
+# CHANNEL_LAYER_IN_MEMORY=True ile bilerek seçilmemişse hata verir
+CHANNEL_LAYER_REDIS_URL = os.environ.get('CHANNEL_LAYER_REDIS_URL', os.environ.get('REDIS_URL'))
+CHANNEL_LAYER_IN_MEMORY = os.environ.get('CHANNEL_LAYER_IN_MEMORY', 'False') == 'True'
+if CHANNEL_LAYER_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [CHANNEL_LAYER_REDIS_URL],
+                'capacity': int(os.environ.get('CHANNEL_LAYER_CAPACITY', 1000)),
+                'expiry': 60,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
 
 # Firebase configuration - Base64 encoded JSON
 firebase_credentials_base64 = os.environ.get("FIREBASE_CREDENTIALS_BASE64")
@@ -262,6 +488,13 @@ GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
 GOOGLE_REFRESH_TOKEN = os.environ.get('GOOGLE_REFRESH_TOKEN')
 
+# Gmail istemcisi süreç başına bir kez kurulur; access token bitmesine
+# REFRESH_MARGIN saniye kala yenilenir
+GMAIL_CLIENT = {
+    'REFRESH_MARGIN': int(os.environ.get('GMAIL_TOKEN_REFRESH_MARGIN', 300)),
+    'TIMEOUT': 30,
+}
+
 X_API_KEY = os.environ.get('X_API_KEY')
 
 # Password validation
@@ -0,0 +1,20 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=backend.test_settings
+"""
+
+from .settings import *  # noqa: F401,F403
+
+# Testler tek süreçte çalışır; Redis gerekmez
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
+CHANNEL_LAYER_IN_MEMORY = True
+
+# Request logları arka plan thread'i yerine test transaction'ında yazılsın
+REQUEST_LOG_BUFFER = {**REQUEST_LOG_BUFFER, 'ENABLED': False}  # noqa: F405
+REQUEST_LOG_SINK = {**REQUEST_LOG_SINK, 'BACKEND': 'database'}  # noqa: F405
+NOTIFICATION_UNREAD_COUNTER = {**NOTIFICATION_UNREAD_COUNTER, 'REDIS_URL': None}  # noqa: F405
@@ -33,6 +33,8 @@ from utils.utils import CustomErrorResponse, CustomSuccessResponse
 from .models import BillingAddress
 from .serializers import BillingAddressSerializer
 
+logger = getLogger("my_logger")
+
 
 class BillingAddressAPI(APIView):
     permission_classes = [IsAuthenticated]
@@ -67,7 +69,7 @@ class BillingAddressAPI(APIView):
                 status_code=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
-            print(str(e))
+            logger.exception("Billing address request failed: %s", e)
             return CustomErrorResponse(
                 error_code="INTERNAL_SERVER_ERROR",
                 msj="An internal server error occurred.",
@@ -134,7 +136,7 @@ class BillingAddressDetailAPI(APIView):
                 status_code=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
-            print(str(e))
+            logger.exception("Billing address request failed: %s", e)
             return CustomErrorResponse(
                 error_code="INTERNAL_SERVER_ERROR",
                 msj="An internal server error occurred.",
@@ -170,7 +172,7 @@ class BillingAddressDetailAPI(APIView):
                 status_code=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
-            print(str(e))
+            logger.exception("Billing address request failed: %s", e)
             return CustomErrorResponse(
                 error_code="INTERNAL_SERVER_ERROR",
                 msj="An internal server error occurred.",
@@ -197,7 +199,7 @@ class BillingAddressDetailAPI(APIView):
                 status_code=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
-            print(str(e))
+            logger.exception("Billing address request failed: %s", e)
             return CustomErrorResponse(
                 error_code="INTERNAL_SERVER_ERROR",
                 msj="An internal server error occurred.",
@@ -247,7 +249,7 @@ class BillingAddressSetDefaultAPI(APIView):
                 status_code=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
-            print(str(e))
+            logger.exception("Billing address request failed: %s", e)
             return CustomErrorResponse(
                 error_code="INTERNAL_SERVER_ERROR",
                 msj="An internal server error occurred.",
@@ -1,16 +1,29 @@
+from datetime import timedelta
+
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from utils.pagination import (EstimatedCountPaginator, KeysetPagination,
+                              estimate_count)
 from utils.utils import CustomErrorResponse, CustomSuccessResponse
 
-from .models import RequestLog
+from .exports import FORMATS as EXPORT_FORMATS
+from .exports import export_response
+from .filters import RequestLogFilter, RequestLogSearchFilter
+from .models import RequestLog, RequestLogRollup
+from .profiling import decompress_profile
+from .rollups import (STEPS, RollupAccumulator, choose_granularity,
+                      floor_bucket)
 from .serializers import RequestLogSerializer
 
 
@@ -20,19 +33,47 @@ class CustomPagination(PageNumberPagination):
     max_page_size = 1000
 
 
-class RequestLogAPI(APIView):
-    permission_classes = []
-    authentication_classes = [JWTAuthentication]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['method', 'status_code']
-    search_fields = ['path', 'error_message']
-    ordering_fields = ['timestamp', 'duration', 'status_code']
+class RequestLogCursorPagination(KeysetPagination):
+    page_size = 100
+    max_page_size = 1000
+    default_ordering = '-timestamp'
+    ordering_fields = ('timestamp', 'duration', 'status_code')
+
+
+REQUEST_LOG_FILTER_PARAMETERS = [
+    openapi.Parameter('method', openapi.IN_QUERY,
+                    description="Filter by HTTP method", type=openapi.TYPE_STRING),
+    openapi.Parameter('status_code', openapi.IN_QUERY,
+                    description="Filter by status code", type=openapi.TYPE_INTEGER),
+    openapi.Parameter('route', openapi.IN_QUERY,
+                    description="Filter by route template, e.g. /order/<int:pk>/", type=openapi.TYPE_STRING),
+    openapi.Parameter('view_name', openapi.IN_QUERY,
+                    description="Filter by resolved view name", type=openapi.TYPE_STRING),
+    openapi.Parameter('since', openapi.IN_QUERY,
+                    description="Only logs at or after this ISO datetime", type=openapi.TYPE_STRING),
+    openapi.Parameter('until', openapi.IN_QUERY,
+                    description="Only logs before this ISO datetime", type=openapi.TYPE_STRING),
+    openapi.Parameter('search', openapi.IN_QUERY,
+                    description='Search in path and error message. Supports prefix*, '
+                                '"phrases", path:/order/, error:Timeout and status:5xx / '
+                                'status:400-499 / status:>=500',
+                    type=openapi.TYPE_STRING),
+    openapi.Parameter('ordering', openapi.IN_QUERY,
+                    description="Order by field (e.g. -timestamp)", type=openapi.TYPE_STRING),
+]
+
+
+class RequestLogQueryMixin:
+    # Arama en sonda: ordering verilmediyse sonuçları skora göre sıralar
+    filter_backends = [DjangoFilterBackend, OrderingFilter, RequestLogSearchFilter]
+    filterset_class = RequestLogFilter
+    ordering_fields = ['timestamp', 'duration', 'status_code', 'db_query_count', 'db_time']
     ordering = ['-timestamp']
-    pagination_class = CustomPagination
 
     # Filter backend için gerekli metodlar
     def get_queryset(self):
-        return RequestLog.objects.all()
+        # Profil blob'u listelerde okunmaz, /profile/ endpoint'inden iner
+        return RequestLog.objects.defer('profile')
 
     def get_serializer_class(self):
         return RequestLogSerializer
@@ -42,17 +83,27 @@ class RequestLogAPI(APIView):
             queryset = backend().filter_queryset(self.request, queryset, self)
         return queryset
 
+
+class RequestLogAPI(RequestLogQueryMixin, APIView):
+    permission_classes = []
+    authentication_classes = [JWTAuthentication]
+    pagination_class = CustomPagination
+    cursor_pagination_class = RequestLogCursorPagination
+    COUNT_MODES = ('exact', 'estimate', 'none')
+
     @swagger_auto_schema(
         operation_description="Get all request logs with filtering options",
-        manual_parameters=[
-            openapi.Parameter('method', openapi.IN_QUERY,
-                            description="Filter by HTTP method", type=openapi.TYPE_STRING),
-            openapi.Parameter('status_code', openapi.IN_QUERY,
-                            description="Filter by status code", type=openapi.TYPE_INTEGER),
-            openapi.Parameter('search', openapi.IN_QUERY,
-                            description="Search in path and error message", type=openapi.TYPE_STRING),
-            openapi.Parameter('ordering', openapi.IN_QUERY,
-                            description="Order by field (e.g. -timestamp)", type=openapi.TYPE_STRING),
+        manual_parameters=REQUEST_LOG_FILTER_PARAMETERS + [
+            openapi.Parameter('pagination', openapi.IN_QUERY,
+                            description="'cursor' for keyset pagination on (ordering field, id)",
+                            type=openapi.TYPE_STRING),
+            openapi.Parameter('cursor', openapi.IN_QUERY,
+                            description="Opaque cursor from a previous next/previous link",
+                            type=openapi.TYPE_STRING),
+            openapi.Parameter('count', openapi.IN_QUERY,
+                            description="exact (page mode default), estimate (planner statistics) "
+                                        "or none (cursor mode default)",
+                            type=openapi.TYPE_STRING),
         ],
         responses={200: RequestLogSerializer(many=True)}
     )
@@ -60,13 +111,34 @@ class RequestLogAPI(APIView):
         try:
             queryset = self.filter_queryset(self.get_queryset())
 
-            paginator = self.pagination_class()
-            page = paginator.paginate_queryset(queryset, request)
+            use_cursor = (request.query_params.get('pagination') == 'cursor'
+                          or 'cursor' in request.query_params)
+            count_mode = request.query_params.get('count', 'none' if use_cursor else 'exact')
+            if count_mode not in self.COUNT_MODES:
+                count_mode = 'exact'
+
+            if use_cursor:
+                paginator = self.cursor_pagination_class()
+                ordering = OrderingFilter().get_ordering(request, queryset, self)
+                page = paginator.paginate_queryset(queryset, request, ordering=ordering[0])
+                if count_mode == 'exact':
+                    count = queryset.count()
+                elif count_mode == 'estimate':
+                    count = estimate_count(queryset)
+                else:
+                    count = None
+            else:
+                paginator = self.pagination_class()
+                if count_mode == 'estimate':
+                    paginator.django_paginator_class = EstimatedCountPaginator
+                page = paginator.paginate_queryset(queryset, request)
+                count = paginator.page.paginator.count
 
             serializer = self.get_serializer_class()(page, many=True)
 
             pagination_meta = {
-                'count': paginator.page.paginator.count,
+                'count': count,
+                'count_is_estimate': count_mode == 'estimate',
                 'next': paginator.get_next_link(),
                 'previous': paginator.get_previous_link(),
             }
@@ -84,6 +156,39 @@ class RequestLogAPI(APIView):
             )
 
 
+class RequestLogExportAPI(RequestLogQueryMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @swagger_auto_schema(
+        operation_description="Stream all matching request logs as csv, xlsx, parquet or arrow. "
+                              "Accepts the same filters as the list endpoint. XLSX exports continue "
+                              "on a new worksheet every 1,048,575 rows. XLSX and Parquet files are "
+                              "built completely before the first byte is sent and hold a worker "
+                              "meanwhile; use the export_request_logs command for large ones",
+        manual_parameters=REQUEST_LOG_FILTER_PARAMETERS + [
+            openapi.Parameter('payloads', openapi.IN_QUERY,
+                              description="true to include request/response bodies",
+                              type=openapi.TYPE_BOOLEAN),
+        ]
+    )
+    def get(self, request, file_format):
+        if file_format not in EXPORT_FORMATS:
+            return CustomErrorResponse(
+                msj=f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            queryset = self.filter_queryset(self.get_queryset())
+            include_payloads = request.query_params.get('payloads', '').lower() in ('1', 'true', 'yes')
+            return export_response(request, queryset, file_format, include_payloads=include_payloads)
+        except Exception as e:
+            return CustomErrorResponse(
+                msj=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+
 class RequestLogDetailAPI(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
@@ -94,7 +199,7 @@ class RequestLogDetailAPI(APIView):
     )
     def get(self, request, log_id):
         try:
-            log = RequestLog.objects.get(id=log_id)
+            log = RequestLog.objects.defer('profile').get(id=log_id)
             serializer = RequestLogSerializer(log)
             return CustomSuccessResponse(
                 input_data=serializer.data,
@@ -105,3 +210,156 @@ class RequestLogDetailAPI(APIView):
                 msj="Log not found",
                 status_code=status.HTTP_404_NOT_FOUND
             )
+
+
+class RequestLogProfileAPI(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @swagger_auto_schema(
+        operation_description="Download the stack-sampling profile of a slow request in "
+                              "collapsed stack format (flamegraph.pl, speedscope, inferno)",
+        responses={200: 'text/plain collapsed stacks'}
+    )
+    def get(self, request, log_id):
+        profile = RequestLog.objects.filter(id=log_id).values_list('profile', flat=True).first()
+        if profile is None:
+            return CustomErrorResponse(
+                msj="Profile not found",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        response = HttpResponse(decompress_profile(profile), content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="request_log_{log_id}.folded"'
+        return response
+
+
+class RequestLogStatsAPI(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    GRANULARITIES = ('minute', 'hour', 'day')
+    GROUP_BY = ('route', 'bucket')
+    ORDERING_FIELDS = ('request_count', 'error_rate', 'throughput_per_minute',
+                       'latency_avg', 'latency_p50', 'latency_p95', 'latency_p99',
+                       'db_queries_avg', 'db_queries_max', 'db_time_avg', 'db_time_total')
+
+    @staticmethod
+    def parse_moment(value):
+        """ISO 8601 datetime; naive values are in the current time zone."""
+        moment = parse_datetime(value)
+        if moment is not None and timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    @swagger_auto_schema(
+        operation_description="Latency percentiles, error rates and throughput per route, "
+                              "answered from the minute/hour/day rollups",
+        manual_parameters=[
+            openapi.Parameter('start', openapi.IN_QUERY,
+                              description="ISO datetime, defaults to one hour ago", type=openapi.TYPE_STRING),
+            openapi.Parameter('end', openapi.IN_QUERY,
+                              description="ISO datetime, defaults to now", type=openapi.TYPE_STRING),
+            openapi.Parameter('granularity', openapi.IN_QUERY,
+                              description="minute, hour or day (chosen from the range by default)",
+                              type=openapi.TYPE_STRING),
+            openapi.Parameter('route', openapi.IN_QUERY,
+                              description="Route template, e.g. /order/<int:pk>/", type=openapi.TYPE_STRING),
+            openapi.Parameter('method', openapi.IN_QUERY,
+                              description="Filter by HTTP method", type=openapi.TYPE_STRING),
+            openapi.Parameter('group_by', openapi.IN_QUERY,
+                              description="route (default) or bucket for a time series", type=openapi.TYPE_STRING),
+            openapi.Parameter('ordering', openapi.IN_QUERY,
+                              description="Order by field (e.g. -latency_p99, -db_time_total)",
+                              type=openapi.TYPE_STRING),
+        ]
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            # Verilen ama parse edilemeyen değer None döner, varsayılana düşmez
+            end = self.parse_moment(params['end']) if params.get('end') else timezone.now()
+            start = self.parse_moment(params['start']) if params.get('start') else None
+        except ValueError:
+            return CustomErrorResponse(msj="Invalid start/end range",
+                                       status_code=status.HTTP_400_BAD_REQUEST)
+        if start is None and not params.get('start') and end is not None:
+            start = end - timedelta(hours=1)
+        if start is None or end is None or start >= end:
+            return CustomErrorResponse(msj="Invalid start/end range",
+                                       status_code=status.HTTP_400_BAD_REQUEST)
+
+        granularity = params.get('granularity') or choose_granularity(start, end)
+        group_by = params.get('group_by', 'route')
+        if granularity not in self.GRANULARITIES or group_by not in self.GROUP_BY:
+            return CustomErrorResponse(msj="Invalid granularity or group_by",
+                                       status_code=status.HTTP_400_BAD_REQUEST)
+
+        start = floor_bucket(start, granularity)
+        rollups = RequestLogRollup.objects.filter(
+            granularity=granularity, bucket__gte=start, bucket__lt=end).order_by()
+        if params.get('route'):
+            rollups = rollups.filter(route=params['route'])
+        if params.get('method'):
+            rollups = rollups.filter(method=params['method'].upper())
+
+        accumulators = {}
+        for rollup in rollups.iterator(chunk_size=2000):
+            if group_by == 'route':
+                key = (rollup.route, rollup.method)
+            else:
+                key = (rollup.bucket,)
+            accumulator = accumulators.get(key)
+            if accumulator is None:
+                accumulator = accumulators[key] = RollupAccumulator()
+            accumulator.add_rollup(rollup)
+
+        minutes = (end - start).total_seconds() / 60
+        results = []
+        for key, accumulator in accumulators.items():
+            if group_by == 'route':
+                row = {'route': key[0], 'method': key[1]}
+                row_minutes = minutes
+            else:
+                row = {'bucket': key[0]}
+                bucket_end = min(key[0] + STEPS[granularity], end)
+                row_minutes = (bucket_end - key[0]).total_seconds() / 60
+            row.update(self._summarize(accumulator, row_minutes))
+            results.append(row)
+
+        ordering = params.get('ordering')
+        if ordering and ordering.lstrip('-') in self.ORDERING_FIELDS:
+            field = ordering.lstrip('-')
+            results.sort(key=lambda row: row[field] or 0, reverse=ordering.startswith('-'))
+        elif group_by == 'bucket':
+            results.sort(key=lambda row: row['bucket'])
+        else:
+            results.sort(key=lambda row: row['request_count'], reverse=True)
+
+        return CustomSuccessResponse(
+            input_data=results,
+            status_code=status.HTTP_200_OK,
+            input_options={'start': start, 'end': end, 'granularity': granularity}
+        )
+
+    @staticmethod
+    def _summarize(accumulator, minutes):
+        count = accumulator.request_count
+        sketch = accumulator.sketch
+        errors = accumulator.server_error_count
+        return {
+            'request_count': count,
+            'client_error_count': accumulator.client_error_count,
+            'server_error_count': errors,
+            'error_rate': errors / count if count else 0,
+            'throughput_per_minute': count / minutes if minutes else 0,
+            'latency_avg': accumulator.duration_sum / count if count else None,
+            'latency_max': accumulator.duration_max,
+            'latency_p50': sketch.quantile(0.50),
+            'latency_p95': sketch.quantile(0.95),
+            'latency_p99': sketch.quantile(0.99),
+            'db_queries_avg': accumulator.db_query_count / count if count else None,
+            'db_queries_max': accumulator.db_query_max,
+            'db_time_avg': accumulator.db_time_sum / count if count else None,
+            'db_time_total': accumulator.db_time_sum,
+        }
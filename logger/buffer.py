@@ -0,0 +1,249 @@
+# logger/buffer.py
+import atexit
+import os
+import queue
+import threading
+from logging import getLogger
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import RequestLog
+from .partitions import maybe_rollover
+
+logger = getLogger("my_logger")
+
+DEFAULT_BUFFER_SETTINGS = {
+    'ENABLED': True,
+    'MAX_QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 2.0,
+    'OVERFLOW_POLICY': 'drop_newest',
+    'SHUTDOWN_TIMEOUT': 10.0,
+}
+
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest')
+
+# Batch hatasından sonra satır satır denerken bu kadar ardışık hata olursa
+# sorun satırda değil (DB/Redis kapalı), kalanları deneme
+MAX_CONSECUTIVE_ROW_FAILURES = 10
+
+
+class RequestLogBuffer:
+    """
+    Bounded in-process queue of unsaved RequestLog rows.
+
+    A daemon thread writes the queued rows with bulk_create (or `writer`)
+    whenever BATCH_SIZE rows are waiting or FLUSH_INTERVAL seconds have
+    passed, so the request thread never waits on the log INSERT. When the
+    queue is full the overflow policy decides which row is dropped.
+    """
+
+    def __init__(self, max_queue_size=10000, batch_size=500, flush_interval=2.0,
+                 overflow_policy='drop_newest', shutdown_timeout=10.0, after_flush=None,
+                 writer=None, name='request-log-writer'):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.shutdown_timeout = shutdown_timeout
+        # Writer thread'inde her flush sonrası çağrılır (ör. partition rollover)
+        self.after_flush = after_flush
+        # Batch'i yazan fonksiyon, varsayılan RequestLog.objects.bulk_create
+        self.writer = writer
+        self.name = name
+
+        self.dropped_count = 0
+        self.flushed_count = 0
+        self.failed_count = 0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._counter_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._atexit_registered = False
+
+    def put(self, log: RequestLog) -> bool:
+        self._ensure_started()
+
+        try:
+            self._queue.put_nowait(log)
+        except queue.Full:
+            if self.overflow_policy == 'drop_oldest':
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(log)
+                except queue.Full:
+                    pass
+            self._count_dropped()
+            return False
+
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                written += self._write(batch)
+        return written
+
+    def stop(self, timeout=None):
+        if timeout is None:
+            timeout = self.shutdown_timeout
+
+        self._stopped.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+        # Worker çıkamadıysa kalan kayıtları burada yaz
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'max_queue_size': self.max_queue_size,
+                'flushed': self.flushed_count,
+                'dropped': self.dropped_count,
+                'failed': self.failed_count,
+            }
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+
+        with self._start_lock:
+            if self._pid == pid and self._thread is not None:
+                return
+            # Fork sonrası (gunicorn preload) ebeveynin kuyruğu ve thread'i bu
+            # süreçte kullanılamaz, sıfırdan başla
+            if self._pid is not None and self._pid != pid:
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+                self._wakeup = threading.Event()
+                self._stopped = threading.Event()
+
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            # Fork'tan sonra da aynı handler yeter, her süreçte yeniden eklenmez
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            if self.after_flush is not None:
+                try:
+                    self.after_flush()
+                except Exception:
+                    logger.exception("Request log after_flush hook failed")
+        self.flush()
+
+    def _drain(self, limit: int) -> list:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_rows(self, rows: list):
+        if self.writer is not None:
+            self.writer(rows)
+        else:
+            RequestLog.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def _write(self, batch: list) -> int:
+        if self.writer is None:
+            close_old_connections()
+        try:
+            self._write_rows(batch)
+        except Exception:
+            logger.exception("Request log flush of %s rows failed, retrying row by row", len(batch))
+            written = self._write_one_by_one(batch)
+        else:
+            written = len(batch)
+
+        with self._counter_lock:
+            self.flushed_count += written
+            self.failed_count += len(batch) - written
+        return written
+
+    def _write_one_by_one(self, batch: list) -> int:
+        """Writes what it can of a failed batch, so one bad row doesn't take the others with it."""
+        written = 0
+        consecutive_failures = 0
+        for index, log in enumerate(batch):
+            try:
+                self._write_rows([log])
+            except Exception as e:
+                consecutive_failures += 1
+                logger.warning("Request log row discarded (%s %s): %s", log.method, (log.path or '')[:100], e)
+                if consecutive_failures >= MAX_CONSECUTIVE_ROW_FAILURES:
+                    logger.error("Request log writes keep failing, %s rows discarded",
+                                 len(batch) - index - 1)
+                    break
+            else:
+                consecutive_failures = 0
+                written += 1
+        return written
+
+    def _count_dropped(self):
+        with self._counter_lock:
+            self.dropped_count += 1
+            dropped = self.dropped_count
+        if dropped == 1 or dropped % 1000 == 0:
+            logger.warning(
+                "Request log queue is full, %s records dropped so far", dropped)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_request_log_buffer():
+    """
+    Process-wide buffer built from settings.REQUEST_LOG_BUFFER, or None when
+    buffering is disabled and rows should be written inline.
+    """
+    global _buffer
+
+    config = {**DEFAULT_BUFFER_SETTINGS,
+              **getattr(settings, 'REQUEST_LOG_BUFFER', {})}
+    if not config['ENABLED']:
+        return None
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = RequestLogBuffer(
+                    max_queue_size=config['MAX_QUEUE_SIZE'],
+                    batch_size=config['BATCH_SIZE'],
+                    flush_interval=config['FLUSH_INTERVAL'],
+                    overflow_policy=config['OVERFLOW_POLICY'],
+                    shutdown_timeout=config['SHUTDOWN_TIMEOUT'],
+                    after_flush=maybe_rollover,
+                )
+    return _buffer
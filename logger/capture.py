@@ -0,0 +1,137 @@
+# logger/capture.py
+import json
+import random
+
+from django.conf import settings
+
+DEFAULT_CAPTURE_SETTINGS = {
+    'MAX_BODY_BYTES': 16 * 1024,
+    'DEFAULT_SAMPLE_RATE': 1.0,
+    'SAMPLE_RATES': {},
+    'ALWAYS_CAPTURE_ERRORS': True,
+}
+
+SKIPPED_CONTENT_TYPES = (
+    'multipart/',
+    'application/octet-stream',
+    'image/',
+    'video/',
+    'audio/',
+)
+
+
+class BodyCapturePolicy:
+    """
+    Decides which request/response bodies end up in RequestLog and in what
+    shape. Bodies are only parsed for sampled requests and for errors, and
+    anything larger than max_body_bytes is stored as a truncation marker.
+    Response markers hold a text preview; request markers only the size
+    and content type, since a body that cannot be parsed cannot be masked
+    either (passwords, id tokens).
+    """
+
+    def __init__(self, max_body_bytes=16 * 1024, default_sample_rate=1.0,
+                 sample_rates=None, always_capture_errors=True):
+        self.max_body_bytes = max_body_bytes
+        self.default_sample_rate = default_sample_rate
+        self.always_capture_errors = always_capture_errors
+        # En uzun prefix önce eşleşsin
+        self.sample_rates = sorted((sample_rates or {}).items(),
+                                   key=lambda item: len(item[0]), reverse=True)
+
+    def sample_rate(self, path: str) -> float:
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default_sample_rate
+
+    def is_sampled(self, path: str) -> bool:
+        rate = self.sample_rate(path)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        return random.random() < rate
+
+    def should_capture(self, sampled: bool, status_code: int) -> bool:
+        return sampled or (self.always_capture_errors and status_code >= 400)
+
+    def read_request_body(self, request):
+        """
+        Returns the raw request body, or a skip marker for uploads. Must run
+        before the view so the body is still readable after DRF consumed the
+        stream.
+        """
+        content_type = request.META.get('CONTENT_TYPE', '')
+        if content_type.startswith(SKIPPED_CONTENT_TYPES):
+            return self.skipped('content-type', content_type)
+        return request.body
+
+    def capture_request(self, request, raw_body):
+        if raw_body is None or isinstance(raw_body, dict):
+            return raw_body
+        if not raw_body:
+            return None
+        content_type = request.META.get('CONTENT_TYPE', '')
+        if len(raw_body) > self.max_body_bytes:
+            return self.omitted(raw_body, content_type)
+
+        try:
+            return json.loads(raw_body.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            if content_type.startswith('application/x-www-form-urlencoded'):
+                return dict(request.POST.items())
+            return self.omitted(raw_body, content_type)
+
+    def capture_response(self, response):
+        if getattr(response, 'streaming', False):
+            return self.skipped('streaming', response.get('Content-Type', ''))
+
+        content = response.content
+        if not content:
+            return None
+        if len(content) > self.max_body_bytes:
+            return self.truncated(content)
+
+        # DRF Response zaten veriyi tutuyor, render edilmiş içeriği tekrar
+        # parse etmeye gerek yok
+        if hasattr(response, 'data'):
+            return response.data
+
+        try:
+            return json.loads(content.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return self.truncated(content)
+
+    def truncated(self, body: bytes) -> dict:
+        return {
+            '_truncated': True,
+            '_size': len(body),
+            '_preview': body[:self.max_body_bytes].decode('utf-8', errors='replace'),
+        }
+
+    @staticmethod
+    def omitted(body: bytes, content_type: str) -> dict:
+        return {
+            '_truncated': True,
+            '_size': len(body),
+            '_content_type': content_type,
+        }
+
+    @staticmethod
+    def skipped(reason: str, content_type: str) -> dict:
+        return {
+            '_skipped': reason,
+            '_content_type': content_type,
+        }
+
+
+def get_capture_policy() -> BodyCapturePolicy:
+    config = {**DEFAULT_CAPTURE_SETTINGS,
+              **getattr(settings, 'REQUEST_LOG_CAPTURE', {})}
+    return BodyCapturePolicy(
+        max_body_bytes=config['MAX_BODY_BYTES'],
+        default_sample_rate=config['DEFAULT_SAMPLE_RATE'],
+        sample_rates=config['SAMPLE_RATES'],
+        always_capture_errors=config['ALWAYS_CAPTURE_ERRORS'],
+    )
@@ -0,0 +1,306 @@
+# logger/exports.py
+import csv
+import json
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from .payloads import decode_payload
+
+EXPORT_FIELDS = [
+    'id', 'timestamp', 'method', 'path', 'route', 'view_name', 'status_code', 'duration',
+    'ip_address', 'user_agent', 'error_message', 'db_query_count', 'db_time',
+    'db_slowest_query',
+]
+PAYLOAD_FIELDS = ['request_data', 'response_data']
+COMPRESSED_PAYLOAD_FIELDS = {
+    'request_data': 'request_data_compressed',
+    'response_data': 'response_data_compressed',
+}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+FILE_CHUNK_SIZE = 64 * 1024
+# Excel'in sayfa başına satır sınırı (başlık dahil)
+XLSX_MAX_ROWS = 1_048_576
+
+
+class ExportError(Exception):
+    pass
+
+
+def export_fields(include_payloads=False):
+    return EXPORT_FIELDS + (PAYLOAD_FIELDS if include_payloads else [])
+
+
+def iter_row_chunks(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields lists of up to `chunk_size` value tuples. `.iterator()` keeps a
+    server-side cursor open on Postgres, so only one chunk is in memory.
+    """
+    payload_positions = [fields.index(name) for name in PAYLOAD_FIELDS if name in fields]
+    # Sıkıştırılmış kolonlar satırın sonuna eklenip JSON kolonuna açılır
+    query_fields = list(fields) + [COMPRESSED_PAYLOAD_FIELDS[fields[position]]
+                                   for position in payload_positions]
+    chunk = []
+    for row in queryset.values_list(*query_fields).iterator(chunk_size=chunk_size):
+        if payload_positions:
+            row = list(row)
+            for offset, position in enumerate(payload_positions):
+                value = row[position]
+                if value is None:
+                    value = decode_payload(row[len(fields) + offset])
+                row[position] = (json.dumps(value, ensure_ascii=False, default=str)
+                                 if value is not None else None)
+            row = row[:len(fields)]
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Echo:
+    """csv.writer'ın yazdığı satırı olduğu gibi geri döndüren sahte dosya"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields).encode('utf-8')
+    for chunk in iter_row_chunks(queryset, fields, chunk_size):
+        yield ''.join(writer.writerow(
+            [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+        ) for row in chunk).encode('utf-8')
+
+
+def write_csv(queryset, fields, fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    for part in iter_csv(queryset, fields, chunk_size):
+        fileobj.write(part)
+
+
+def write_xlsx(queryset, fields, fileobj, chunk_size=DEFAULT_CHUNK_SIZE, max_rows=XLSX_MAX_ROWS):
+    """
+    Continues on a new worksheet (request_logs_2, ...) whenever one reaches
+    `max_rows` rows, so nothing is dropped past Excel's row limit.
+    """
+    import xlsxwriter
+
+    # constant_memory: satırlar geçici dosyaya yazılır, bellekte sadece
+    # o anki satır tutulur
+    workbook = xlsxwriter.Workbook(fileobj, {
+        'constant_memory': True,
+        'remove_timezone': True,
+        'strings_to_numbers': False,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+    })
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss.000'})
+
+    def add_worksheet():
+        count = len(workbook.worksheets())
+        sheet = workbook.add_worksheet(f'request_logs_{count + 1}' if count else 'request_logs')
+        sheet.write_row(0, 0, fields)
+        return sheet
+
+    worksheet = add_worksheet()
+    timestamp_column = fields.index('timestamp')
+    row_number = 1
+    for chunk in iter_row_chunks(queryset, fields, chunk_size):
+        for row in chunk:
+            if row_number >= max_rows:
+                worksheet = add_worksheet()
+                row_number = 1
+            for column, value in enumerate(row):
+                if column == timestamp_column:
+                    worksheet.write_datetime(row_number, column, value, date_format)
+                elif value is not None:
+                    worksheet.write(row_number, column, value)
+            row_number += 1
+    workbook.close()
+
+
+def _arrow_schema(fields):
+    import pyarrow as pa
+
+    types = {
+        'id': pa.int64(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+        'status_code': pa.int32(),
+        'duration': pa.float64(),
+        'db_query_count': pa.int32(),
+        'db_time': pa.float64(),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in fields])
+
+
+def _arrow_batches(queryset, fields, chunk_size):
+    try:
+        import pandas as pd
+        import pyarrow as pa
+    except ImportError:
+        raise ExportError("Parquet/Arrow export requires pandas and pyarrow")
+
+    schema = _arrow_schema(fields)
+    for chunk in iter_row_chunks(queryset, fields, chunk_size):
+        frame = pd.DataFrame.from_records(chunk, columns=fields)
+        if 'ip_address' in frame:
+            frame['ip_address'] = frame['ip_address'].astype('string')
+        yield pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+def write_parquet(queryset, fields, fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Each chunk becomes one Parquet row group."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires pyarrow")
+
+    writer = pq.ParquetWriter(fileobj, _arrow_schema(fields), compression='zstd')
+    try:
+        for table in _arrow_batches(queryset, fields, chunk_size):
+            writer.write_table(table)
+    finally:
+        writer.close()
+
+
+class ChunkSink:
+    """Write-only file object that hands out what was written so far."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_arrow(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Arrow IPC stream, written batch by batch so it can be streamed."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ExportError("Arrow export requires pyarrow")
+
+    sink = ChunkSink()
+    writer = pa.ipc.new_stream(sink, _arrow_schema(fields))
+    for table in _arrow_batches(queryset, fields, chunk_size):
+        writer.write_table(table)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def write_arrow(queryset, fields, fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    for part in iter_arrow(queryset, fields, chunk_size):
+        fileobj.write(part)
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+    'parquet': write_parquet,
+    'arrow': write_arrow,
+}
+
+
+def export_to_file(queryset, file_format, fileobj, include_payloads=False,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    if file_format not in WRITERS:
+        raise ExportError(f"Unsupported export format: {file_format}")
+    WRITERS[file_format](queryset, export_fields(include_payloads), fileobj, chunk_size)
+
+
+def _iter_file(fileobj):
+    try:
+        fileobj.seek(0)
+        while True:
+            data = fileobj.read(FILE_CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+    finally:
+        fileobj.close()
+
+
+def _iter_spooled(queryset, file_format, include_payloads, chunk_size):
+    """
+    XLSX and Parquet write an index/footer at the end, so the whole file is
+    built in a temporary file, in the request thread, before the response
+    starts. A large export holds the worker for all of that time; those
+    belong to the export_request_logs command.
+    """
+    fileobj = tempfile.TemporaryFile()
+    try:
+        export_to_file(queryset, file_format, fileobj, include_payloads, chunk_size)
+    except Exception:
+        fileobj.close()
+        raise
+    return _iter_file(fileobj)
+
+
+async def _aiter_sync(iterator):
+    """
+    ASGI'da senkron iterator verilirse Django tüm içeriği belleğe alır.
+    Parçaları veritabanı cursor'ının açıldığı thread'de tek tek çekiyoruz.
+    """
+    iterator = iter(iterator)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(iterator, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+def export_response(request, queryset, file_format, include_payloads=False,
+                    chunk_size=DEFAULT_CHUNK_SIZE):
+    if file_format not in FORMATS:
+        raise ExportError(f"Unsupported export format: {file_format}")
+
+    fields = export_fields(include_payloads)
+    if file_format == 'csv':
+        content = iter_csv(queryset, fields, chunk_size)
+    elif file_format == 'arrow':
+        content = iter_arrow(queryset, fields, chunk_size)
+    else:
+        content = _iter_spooled(queryset, file_format, include_payloads, chunk_size)
+
+    # DRF Request'i altındaki Django request'e bakmak gerekiyor
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = _aiter_sync(content)
+
+    content_type, extension = FORMATS[file_format]
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="request_logs.{extension}"'
+    return response
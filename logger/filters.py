@@ -0,0 +1,33 @@
+from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
+
+from .models import RequestLog
+from .search import search_request_logs
+
+
+class RequestLogFilter(filters.FilterSet):
+    since = filters.IsoDateTimeFilter(field_name='timestamp', lookup_expr='gte')
+    until = filters.IsoDateTimeFilter(field_name='timestamp', lookup_expr='lt')
+
+    class Meta:
+        model = RequestLog
+        fields = ['method', 'status_code', 'route', 'view_name', 'since', 'until']
+
+
+class RequestLogSearchFilter(BaseFilterBackend):
+    """
+    Indexed replacement for SearchFilter. Without an explicit `ordering`
+    the results come back best match first.
+    """
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+
+        queryset = search_request_logs(queryset, text)
+        if 'ordering' not in request.query_params:
+            queryset = queryset.order_by('-search_rank', '-timestamp')
+        return queryset
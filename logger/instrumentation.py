@@ -0,0 +1,84 @@
+# logger/instrumentation.py
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_INSTRUMENTATION_SETTINGS = {
+    'ENABLED': True,
+    'MAX_FINGERPRINT_LENGTH': 1000,
+}
+
+# Literal'leri '?' ile değiştiriyoruz ki aynı sorgu farklı id'lerle tek
+# parmak izine düşsün
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.I)
+WHITESPACE = re.compile(r"\s+")
+
+
+def get_instrumentation_settings() -> dict:
+    return {**DEFAULT_INSTRUMENTATION_SETTINGS,
+            **getattr(settings, 'REQUEST_LOG_DB_INSTRUMENTATION', {})}
+
+
+def fingerprint(sql: str, max_length=1000) -> str:
+    """
+    SELECT ... WHERE "id" = 42 AND "name" IN ('a', 'b')
+    -> SELECT ... WHERE "id" = ? AND "name" IN (...)
+    """
+    sql = STRING_LITERAL.sub('?', sql).replace('%s', '?')
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = IN_LIST.sub('IN (...)', sql)
+    sql = WHITESPACE.sub(' ', sql).strip()
+    return sql[:max_length]
+
+
+class QueryCounter:
+    """
+    execute_wrapper that counts the queries of one request, sums their time
+    and remembers the slowest one. Only the slowest statement is
+    fingerprinted, so the per-query overhead is a counter and a timer.
+    """
+
+    def __init__(self, max_fingerprint_length=1000):
+        self.max_fingerprint_length = max_fingerprint_length
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self._slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total_time += elapsed
+            if elapsed >= self.slowest_time:
+                self.slowest_time = elapsed
+                self._slowest_sql = sql
+
+    @property
+    def slowest_query(self):
+        if self._slowest_sql is None:
+            return None
+        return fingerprint(self._slowest_sql, self.max_fingerprint_length)
+
+
+@contextmanager
+def count_queries(using=None):
+    """
+    Installs a QueryCounter on every database connection of the current
+    thread (or only `using`) for the duration of the block.
+    """
+    config = get_instrumentation_settings()
+    counter = QueryCounter(config['MAX_FINGERPRINT_LENGTH'])
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        yield counter
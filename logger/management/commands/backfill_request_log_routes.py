@@ -0,0 +1,49 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from logger.models import RequestLog
+from logger.rollups import resolve_route
+
+
+class Command(BaseCommand):
+    help = ("Fills RequestLog.route and view_name for rows logged before the "
+            "middleware recorded them. Works through the table in primary key "
+            "batches, so it can be stopped and re-run at any time.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between batches")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+
+        while True:
+            rows = list(RequestLog.objects
+                        .filter(route__isnull=True, id__gt=last_id)
+                        .order_by('id')
+                        .values_list('id', 'path')[:batch_size])
+            if not rows:
+                break
+
+            # Aynı route'a düşen satırlar tek UPDATE ile güncellenir
+            groups = defaultdict(list)
+            for log_id, path in rows:
+                groups[resolve_route(path)].append(log_id)
+
+            with transaction.atomic():
+                for (route, view_name), ids in groups.items():
+                    RequestLog.objects.filter(id__in=ids).update(route=route, view_name=view_name)
+
+            updated += len(rows)
+            last_id = rows[-1][0]
+            self.stdout.write(f"Normalized {updated} rows (last id {last_id})")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Route backfill completed, {updated} rows updated."))
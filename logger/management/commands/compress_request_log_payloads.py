@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from logger.models import RequestLog
+from logger.payloads import (decode_payload, encode_payload, get_payload_settings,
+                             serialize_payload)
+
+PAYLOAD_COLUMNS = ['request_data', 'response_data',
+                   'request_data_compressed', 'response_data_compressed']
+
+
+class Command(BaseCommand):
+    help = ("Moves RequestLog request/response bodies from the JSON columns "
+            "into the compressed columns in primary key batches (or back with "
+            "--decompress). Safe to stop and re-run. On Postgres the freed "
+            "space is reused after VACUUM.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between batches")
+        parser.add_argument('--dictionary-id', type=int,
+                            help="Dictionary to compress with (default: DICTIONARY_ID setting)")
+        parser.add_argument('--decompress', action='store_true',
+                            help="Convert compressed rows back to the JSON columns")
+
+    def handle(self, *args, **options):
+        decompress = options['decompress']
+        dictionary_id = options['dictionary_id']
+        if dictionary_id is None:
+            dictionary_id = get_payload_settings()['DICTIONARY_ID']
+        if decompress:
+            pending = Q(request_data_compressed__isnull=False) | Q(response_data_compressed__isnull=False)
+        else:
+            pending = Q(request_data__isnull=False) | Q(response_data__isnull=False)
+
+        last_id = 0
+        converted = 0
+        raw_bytes = 0
+        stored_bytes = 0
+        while True:
+            logs = list(RequestLog.objects
+                        .filter(pending, id__gt=last_id)
+                        .order_by('id')
+                        .only('id', *PAYLOAD_COLUMNS)[:options['batch_size']])
+            if not logs:
+                break
+
+            for log in logs:
+                if decompress:
+                    log.request_data = decode_payload(log.request_data_compressed)
+                    log.response_data = decode_payload(log.response_data_compressed)
+                    log.request_data_compressed = log.response_data_compressed = None
+                    continue
+                for name in ('request_data', 'response_data'):
+                    value = getattr(log, name)
+                    blob = encode_payload(value, dictionary_id=dictionary_id)
+                    setattr(log, f'{name}_compressed', blob)
+                    setattr(log, name, None)
+                    if blob is not None:
+                        raw_bytes += len(serialize_payload(value))
+                        stored_bytes += len(blob)
+
+            with transaction.atomic():
+                RequestLog.objects.bulk_update(logs, PAYLOAD_COLUMNS)
+
+            converted += len(logs)
+            last_id = logs[-1].id
+            self.stdout.write(f"Converted {converted} rows (last id {last_id})")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        if stored_bytes:
+            self.stdout.write(f"Payload bytes: {raw_bytes} -> {stored_bytes} "
+                              f"({raw_bytes / stored_bytes:.1f}x)")
+        self.stdout.write(self.style.SUCCESS(f"Payload conversion completed, {converted} rows updated."))
@@ -0,0 +1,70 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logger.exports import DEFAULT_CHUNK_SIZE, FORMATS, ExportError, export_to_file
+from logger.filters import RequestLogFilter
+from logger.models import RequestLog
+from logger.search import search_request_logs
+
+
+class Command(BaseCommand):
+    help = ("Streams RequestLog rows to a csv, xlsx, parquet or arrow file. "
+            "Takes the same filters as /logger/logs/ and keeps memory flat "
+            "regardless of the number of rows. Prefer it to the export API "
+            "for large xlsx and parquet exports, which the API has to build "
+            "completely before it sends the first byte.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='file_format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', default='-',
+                            help="Output file, '-' for stdout (csv and arrow only)")
+        parser.add_argument('--method')
+        parser.add_argument('--status-code', type=int)
+        parser.add_argument('--route', help="Route template, e.g. /order/<int:pk>/")
+        parser.add_argument('--view-name')
+        parser.add_argument('--since', help="ISO datetime, inclusive")
+        parser.add_argument('--until', help="ISO datetime, exclusive")
+        parser.add_argument('--search', help="Same syntax as the list API search parameter")
+        parser.add_argument('--payloads', action='store_true',
+                            help="Include request/response bodies")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        file_format = options['file_format']
+        data = {
+            'method': options['method'],
+            'status_code': options['status_code'],
+            'route': options['route'],
+            'view_name': options['view_name'],
+            'since': options['since'],
+            'until': options['until'],
+        }
+        filterset = RequestLogFilter(
+            data={key: value for key, value in data.items() if value is not None},
+            queryset=RequestLog.objects.all(),
+        )
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+
+        queryset = filterset.qs
+        if options['search']:
+            queryset = search_request_logs(queryset, options['search'])
+        queryset = queryset.order_by('timestamp', 'id')
+
+        output = options['output']
+        if output == '-' and file_format in ('xlsx', 'parquet'):
+            raise CommandError(f"{file_format} needs a seekable --output file")
+
+        try:
+            if output == '-':
+                export_to_file(queryset, file_format, sys.stdout.buffer,
+                               options['payloads'], options['chunk_size'])
+                return
+            with open(output, 'wb') as fileobj:
+                export_to_file(queryset, file_format, fileobj,
+                               options['payloads'], options['chunk_size'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        self.stderr.write(self.style.SUCCESS(f"Request logs exported to {output}"))
@@ -0,0 +1,170 @@
+import os
+import socket
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from logger.models import RequestLogLoadedFile
+from logger.sinks import (bulk_load, get_sink_settings, loads_record, pid_alive, rotate_file,
+                          rotated_files, worker_files)
+
+
+class Command(BaseCommand):
+    help = ("Loads request logs written by the ndjson or redis sink into "
+            "RequestLog in bulk (COPY on Postgres). NDJSON: every rotated "
+            "file of every worker, oldest first, removed after loading; the "
+            "current files of workers that are no longer running are "
+            "rotated and loaded too. Each batch commits with the file offset "
+            "it reached, so a file loaded again resumes there. "
+            "Redis: reads the stream through a consumer group, claims "
+            "entries left pending by crashed consumers and acks entries "
+            "only after they are committed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=['ndjson', 'redis'])
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--path', nargs='*',
+                            help="NDJSON files to load instead of the rotated sink files")
+        parser.add_argument('--keep', action='store_true',
+                            help="Keep NDJSON files after loading them; loading them "
+                                 "again only picks up lines added since")
+        parser.add_argument('--no-takeover', action='store_true',
+                            help="Do not take over the current files of dead workers "
+                                 "(workers run in another pid namespace or host)")
+        parser.add_argument('--group', default='request-log-loader')
+        parser.add_argument('--consumer', default=None,
+                            help="Consumer name, defaults to <hostname>-<pid>")
+        parser.add_argument('--follow', action='store_true',
+                            help="Keep waiting for new stream entries")
+        parser.add_argument('--block', type=int, default=5000,
+                            help="Milliseconds to block per read with --follow")
+        parser.add_argument('--claim-idle', type=int, default=60000,
+                            help="Claim entries other consumers left unacked for this "
+                                 "many milliseconds")
+
+    def handle(self, *args, **options):
+        config = get_sink_settings()
+        if options['source'] == 'ndjson':
+            loaded = self.load_ndjson(config['NDJSON'], options)
+        else:
+            loaded = self.load_redis(config['REDIS'], options)
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} request logs."))
+
+    def load_ndjson(self, config, options):
+        paths = options['path']
+        if not paths:
+            paths = []
+            for active, pid in worker_files(config['PATH']):
+                # Ölen worker'ın dosyasına artık kimse yazmıyor, devralınır
+                if os.path.exists(active) and not options['no_takeover'] and not pid_alive(pid):
+                    if os.path.getsize(active):
+                        self.stdout.write(f"{active}: worker {pid} is gone, taking the file over")
+                        rotate_file(active)
+                    else:
+                        os.remove(active)
+                paths.extend(rotated_files(active))
+            if not paths:
+                self.stdout.write("No rotated NDJSON files to load.")
+
+        loaded = 0
+        for path in map(os.path.abspath, paths):
+            if not os.path.exists(path):
+                raise CommandError(f"{path} does not exist")
+            count = self._load_file(path, options['batch_size'])
+            loaded += count
+            self.stdout.write(f"{path}: {count} rows")
+            if not options['keep']:
+                os.remove(path)
+                RequestLogLoadedFile.objects.filter(path=path).delete()
+        return loaded
+
+    def _load_file(self, path, batch_size):
+        state = RequestLogLoadedFile.objects.filter(path=path).first()
+        offset = state.offset if state else 0
+        count = 0
+        batch = []
+        with open(path, 'rb') as fileobj:
+            # Önceki (yarım kalmış) yüklemede commit'lenen satırlar atlanır
+            fileobj.seek(offset)
+            for line in fileobj:
+                offset += len(line)
+                if line.strip():
+                    batch.append(loads_record(line))
+                if len(batch) >= batch_size:
+                    count += self._insert(batch, path, offset)
+                    batch = []
+        count += self._insert(batch, path, offset)
+        return count
+
+    def load_redis(self, config, options):
+        import redis
+
+        client = redis.Redis.from_url(config['URL'])
+        stream = config['STREAM']
+        group = options['group']
+        consumer = options['consumer'] or f"{socket.gethostname()}-{os.getpid()}"
+
+        try:
+            client.xgroup_create(stream, group, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+        # Önce bu consumer'a verilip ack'lenmemiş girdiler (önceki çökme)
+        loaded = 0
+        while True:
+            response = client.xreadgroup(group, consumer, {stream: '0'}, count=options['batch_size'])
+            entries = response[0][1] if response else []
+            if not entries:
+                break
+            loaded += self._load_entries(client, stream, group, entries)
+
+        # Sonra çöken/kapanan diğer consumer'larda kalanlar, en son yeniler
+        loaded += self._claim_idle(client, stream, group, consumer, options)
+        while True:
+            block = options['block'] if options['follow'] else None
+            response = client.xreadgroup(group, consumer, {stream: '>'},
+                                         count=options['batch_size'], block=block)
+            entries = response[0][1] if response else []
+            if entries:
+                loaded += self._load_entries(client, stream, group, entries)
+            elif options['follow']:
+                loaded += self._claim_idle(client, stream, group, consumer, options)
+            else:
+                break
+        return loaded
+
+    def _claim_idle(self, client, stream, group, consumer, options):
+        """XAUTOCLAIMs entries pending longer than --claim-idle and loads them."""
+        loaded = 0
+        start = '0-0'
+        while True:
+            response = client.xautoclaim(stream, group, consumer, options['claim_idle'],
+                                         start_id=start, count=options['batch_size'])
+            start, entries = response[0], response[1]
+            # MAXLEN ile silinmiş girdiler: Redis 7 ayrı listede, 6.2 boş alanla döner
+            trimmed = response[2] if len(response) > 2 else []
+            if trimmed:
+                client.xack(stream, group, *trimmed)
+                self.stderr.write(f"{stream}: {len(trimmed)} pending entries were trimmed "
+                                  f"before they could be loaded")
+            if entries:
+                loaded += self._load_entries(client, stream, group, entries)
+            if start in (b'0-0', '0-0'):
+                return loaded
+
+    def _load_entries(self, client, stream, group, entries):
+        ids = [entry_id for entry_id, _ in entries]
+        logs = [loads_record(fields.get(b'log') or fields.get('log'))
+                for _, fields in entries if fields]
+        self._insert(logs)
+        client.xack(stream, group, *ids)
+        self.stdout.write(f"{stream}: {len(logs)} rows")
+        return len(logs)
+
+    @staticmethod
+    def _insert(logs, path=None, offset=None):
+        with transaction.atomic():
+            if path is not None:
+                RequestLogLoadedFile.objects.update_or_create(path=path, defaults={'offset': offset})
+            return bulk_load(logs)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from logger.rollups import run_rollups
+
+
+class Command(BaseCommand):
+    help = ("Rolls new RequestLog rows up into per-minute latency/status "
+            "buckets and merges closed minutes into hours and days. Meant to "
+            "run every minute from cron.")
+
+    def handle(self, *args, **options):
+        result = run_rollups()
+        self.stdout.write(
+            f"Rollups written: {result['minute']} minute, {result['hour']} hour, "
+            f"{result['day']} day. Pruned {result['pruned']} expired rollups.")
+        self.stdout.write(self.style.SUCCESS("Request log rollup completed."))
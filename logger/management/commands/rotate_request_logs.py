@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from logger.partitions import INTERVALS, get_partitioning_settings, rollover
+
+
+class Command(BaseCommand):
+    help = ("Creates upcoming RequestLog partitions and drops/detaches the ones "
+            "older than the retention period. Falls back to batched deletes "
+            "when the table is not partitioned.")
+
+    def add_arguments(self, parser):
+        config = get_partitioning_settings()
+        parser.add_argument('--interval', choices=INTERVALS, default=config['INTERVAL'],
+                            help="Partition size")
+        parser.add_argument('--retention-days', type=int, default=config['RETENTION_DAYS'],
+                            help="Partitions/rows older than this many days are removed")
+        parser.add_argument('--premake', type=int, default=config['PREMAKE'],
+                            help="How many future partitions to create ahead of time")
+        parser.add_argument('--detach', action='store_true', default=config['DETACH'],
+                            help="Detach expired partitions instead of dropping them")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report what would be removed")
+
+    def handle(self, *args, **options):
+        if options['retention_days'] < 1:
+            raise CommandError("--retention-days must be at least 1")
+
+        result = rollover(
+            interval=options['interval'],
+            retention_days=options['retention_days'],
+            premake=options['premake'],
+            detach=options['detach'],
+            dry_run=options['dry_run'],
+        )
+
+        if not result['partitioned']:
+            verb = "Would delete" if options['dry_run'] else "Deleted"
+            self.stdout.write(
+                f"Table is not partitioned. {verb} {result['deleted_rows']} expired rows.")
+            return
+
+        if result['deleted_rows']:
+            verb = "Would delete" if options['dry_run'] else "Deleted"
+            self.stdout.write(f"{verb} {result['deleted_rows']} expired rows from the default partition")
+        for name in result['created']:
+            self.stdout.write(f"Created partition {name}")
+        for name in result['expired']:
+            if options['dry_run']:
+                self.stdout.write(f"Would remove partition {name}")
+            elif options['detach']:
+                self.stdout.write(f"Detached partition {name}")
+            else:
+                self.stdout.write(f"Dropped partition {name}")
+        self.stdout.write(self.style.SUCCESS("Request log rollover completed."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from logger.models import RequestLog
+from logger.payloads import (MAX_DICTIONARY_SIZE, deflate, load_dictionary,
+                             serialize_payload, train_dictionary)
+
+
+class Command(BaseCommand):
+    help = ("Trains a zlib preset dictionary from recent request/response "
+            "bodies. Register the file under a NEW id in "
+            "REQUEST_LOG_PAYLOAD_STORAGE['DICTIONARY_FILES'] and switch "
+            "DICTIONARY_ID to it; rows keep the id they were written with.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', required=True)
+        parser.add_argument('--samples', type=int, default=5000)
+        parser.add_argument('--size', type=int, default=MAX_DICTIONARY_SIZE)
+
+    def handle(self, *args, **options):
+        logs = RequestLog.objects.order_by('-timestamp').only(
+            'id', 'request_data', 'response_data',
+            'request_data_compressed', 'response_data_compressed')[:options['samples']]
+
+        samples = []
+        for log in logs.iterator(chunk_size=1000):
+            for value in (log.get_request_data(), log.get_response_data()):
+                if value is not None:
+                    samples.append(serialize_payload(value))
+        if not samples:
+            raise CommandError("No payloads to train on")
+
+        dictionary = train_dictionary(samples, min(options['size'], MAX_DICTIONARY_SIZE))
+        with open(options['output'], 'wb') as fileobj:
+            fileobj.write(dictionary)
+
+        # Eğitim örnekleri üzerinde hazır sözlükle kıyas
+        raw = sum(len(sample) for sample in samples)
+        builtin = sum(len(deflate(sample, load_dictionary(1))) + 1 for sample in samples)
+        trained = sum(len(deflate(sample, dictionary)) + 1 for sample in samples)
+        self.stdout.write(f"{len(samples)} samples, {raw} bytes. Built-in dictionary: "
+                          f"{raw / builtin:.1f}x, trained dictionary: {raw / trained:.1f}x")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(dictionary)} byte dictionary to {options['output']}"))
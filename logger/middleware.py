@@ -1,11 +1,26 @@
 # logger/middleware.py
-import json
 import time
+from contextlib import nullcontext
+from logging import getLogger
 from typing import Any
 
 from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
 
+from .capture import get_capture_policy
+from .instrumentation import count_queries, get_instrumentation_settings
 from .models import RequestLog
+from .payloads import get_payload_settings
+from .profiling import compress_profile, get_profiler
+from .rollups import route_from_match
+from .sinks import get_request_log_sink
+
+PATH_MAX_LENGTH = RequestLog._meta.get_field('path').max_length
+ROUTE_MAX_LENGTH = RequestLog._meta.get_field('route').max_length
+VIEW_NAME_MAX_LENGTH = RequestLog._meta.get_field('view_name').max_length
+METHOD_MAX_LENGTH = RequestLog._meta.get_field('method').max_length
+
+logger = getLogger("my_logger")
 
 
 class RequestResponseLogMiddleware:
@@ -26,43 +41,61 @@ class RequestResponseLogMiddleware:
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.sink = get_request_log_sink()
+        self.capture_policy = get_capture_policy()
+        self.count_queries = get_instrumentation_settings()['ENABLED']
+        self.profiler = get_profiler()
+        self.compress_payloads = get_payload_settings()['MODE'] == 'compressed'
 
     def should_log_request(self, path: str) -> bool:
         return not any(path.startswith(excluded) for excluded in self.EXCLUDED_PATHS)
 
-    def get_request_body(self, request):
-        try:
-            if request.body:
-                if isinstance(request.body, bytes):
-                    return json.loads(request.body.decode('utf-8'))
-                return json.loads(request.body)
-        except json.JSONDecodeError:
-            if hasattr(request, 'POST'):
-                return dict(request.POST.items())
-        return None
+    def get_request_body(self, request, raw_body):
+        return self.capture_policy.capture_request(request, raw_body)
 
     def get_response_body(self, response):
-        try:
-            if hasattr(response, 'content'):
-                if isinstance(response.content, bytes):
-                    return json.loads(response.content.decode('utf-8'))
-                return json.loads(response.content)
-        except json.JSONDecodeError:
-            if hasattr(response, 'data'):
-                return response.data
-        return None
+        return self.capture_policy.capture_response(response)
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
         if not self.should_log_request(request.path):
             return self.get_response(request)
 
+        timestamp = timezone.now()
         start_time = time.time()
 
-        request_body = self.get_request_body(request)
-        response = self.get_response(request)
-        response_body = self.get_response_body(response)
+        try:
+            sampled = self.capture_policy.is_sampled(request.path)
+            raw_body = self.capture_policy.read_request_body(request)
+        except Exception:
+            # Body okunamıyorsa view kendi hatasını versin, log body'siz yazılır
+            sampled, raw_body = False, None
+        profile = self.profiler.start(request) if self.profiler is not None else None
+        try:
+            # Sadece view'in sorguları sayılır, log kaydının kendisi değil
+            with (count_queries() if self.count_queries else nullcontext()) as queries:
+                response = self.get_response(request)
+        finally:
+            if profile is not None:
+                self.profiler.stop(profile)
         duration = time.time() - start_time
 
+        # Log kaydı hiçbir zaman isteği düşürmemeli
+        try:
+            self.sink.write(self.build_log(request, response, timestamp, duration,
+                                           sampled, raw_body, queries, profile))
+        except Exception:
+            logger.exception("Request log could not be recorded for %s %s",
+                             request.method, request.path)
+        return response
+
+    def build_log(self, request, response, timestamp, duration, sampled, raw_body,
+                  queries, profile) -> RequestLog:
+        request_body = None
+        response_body = None
+        if self.capture_policy.should_capture(sampled, response.status_code):
+            request_body = self.get_request_body(request, raw_body)
+            response_body = self.get_response_body(response)
+
         # Hassas verileri maskele
         if request_body and isinstance(request_body, dict):
             if 'password' in request_body:
@@ -70,16 +103,36 @@ class RequestResponseLogMiddleware:
             if 'id_token' in request_body:
                 request_body['id_token'] = '********'
 
-        RequestLog.objects.create(
-            path=request.path,
-            method=request.method,
-            request_data=request_body,
-            response_data=response_body,
+        route, view_name = route_from_match(getattr(request, 'resolver_match', None))
+
+        # Tarayıcı/bot URL'leri 255 karakteri aşabiliyor, Postgres'te DataError olmasın
+        log = RequestLog(
+            timestamp=timestamp,
+            path=request.path[:PATH_MAX_LENGTH],
+            route=route[:ROUTE_MAX_LENGTH] if route else route,
+            view_name=view_name[:VIEW_NAME_MAX_LENGTH] if view_name else view_name,
+            method=request.method[:METHOD_MAX_LENGTH],
             status_code=response.status_code,
             duration=duration,
             ip_address=request.META.get('REMOTE_ADDR'),
             user_agent=request.META.get('HTTP_USER_AGENT'),
-            error_message=getattr(response, 'error_message', None)
+            error_message=getattr(response, 'error_message', None),
+            db_query_count=queries.count if queries else None,
+            db_time=queries.total_time if queries else None,
+            db_slowest_query=queries.slowest_query if queries else None,
+            db_slowest_time=queries.slowest_time if queries else None,
         )
-
-        return response
\ No newline at end of file
+        try:
+            log.set_payloads(request_body, response_body, compress=self.compress_payloads)
+        except Exception:
+            # Kodlanamayan body sadece payload'ı düşürür, satır yine yazılır
+            logger.warning("Request log payload could not be encoded for %s %s",
+                           request.method, request.path, exc_info=True)
+            skipped = self.capture_policy.skipped
+            log.set_payloads(skipped('encoding-error', request.META.get('CONTENT_TYPE', '')),
+                             skipped('encoding-error', response.get('Content-Type', '')),
+                             compress=self.compress_payloads)
+        if profile is not None and profile.should_keep(duration):
+            log.profile = compress_profile(profile.collapsed())
+            log.profile_samples = profile.samples
+        return log
\ No newline at end of file
@@ -0,0 +1,105 @@
+# Converts logger_requestlog into a RANGE partitioned table on Postgres.
+#
+# The existing table is kept as the first partition (MINVALUE .. start of the
+# next period) so no rows are copied. The next PREMAKE periods get their
+# partitions here; later ones are created by rotate_request_logs (or the
+# writer thread's AUTO_ROLLOVER), anything outside them lands in the DEFAULT
+# partition. Other databases keep the plain table.
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations
+
+TABLE = "logger_requestlog"
+LEGACY = "logger_requestlog_legacy"
+
+
+def _next_period_start(moment, interval):
+    moment = moment.astimezone(dt_timezone.utc)
+    if interval == "month":
+        start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start + timedelta(days=1)
+
+
+def _partition_name(start, interval):
+    suffix = start.strftime("%Y%m") if interval == "month" else start.strftime("%Y%m%d")
+    return f"{TABLE}_p{suffix}"
+
+
+def partition_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    config = getattr(settings, "REQUEST_LOG_PARTITIONING", {})
+    interval = config.get("INTERVAL", "day")
+    premake = config.get("PREMAKE", 3)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT now(), max(id), max(timestamp) FROM %s" % TABLE)
+        now, max_id, max_timestamp = cursor.fetchone()
+
+    upper = _next_period_start(max(now, max_timestamp or now), interval)
+
+    statements = [
+        f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY}"',
+        f'ALTER TABLE "{LEGACY}" DROP CONSTRAINT "{TABLE}_pkey"',
+        f'ALTER TABLE "{LEGACY}" ALTER COLUMN "id" DROP IDENTITY IF EXISTS',
+        f'ALTER TABLE "{LEGACY}" ALTER COLUMN "id" DROP DEFAULT',
+        f'ALTER SEQUENCE IF EXISTS "{TABLE}_id_seq" RENAME TO "{LEGACY}_id_seq"',
+        f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ("timestamp")',
+        f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY ("id", "timestamp")',
+        f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}"."id"',
+        f"SELECT setval('\"{TABLE}_id_seq\"', {max_id or 1}, {max_id is not None})",
+        f'ALTER TABLE "{TABLE}" ALTER COLUMN "id" SET DEFAULT nextval(\'"{TABLE}_id_seq"\')',
+        f'CREATE UNIQUE INDEX "{LEGACY}_id_timestamp" ON "{LEGACY}" ("id", "timestamp")',
+        f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{LEGACY}" '
+        f"FOR VALUES FROM (MINVALUE) TO ('{upper.isoformat()}')",
+        f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT',
+    ]
+    start = upper
+    for _ in range(premake):
+        end = _next_period_start(start, interval)
+        statements.append(
+            f'CREATE TABLE "{_partition_name(start, interval)}" PARTITION OF "{TABLE}" '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def unpartition_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    statements = [
+        f'CREATE TABLE "{TABLE}_plain" (LIKE "{TABLE}" INCLUDING CONSTRAINTS)',
+        f'INSERT INTO "{TABLE}_plain" SELECT * FROM "{TABLE}"',
+        f'ALTER SEQUENCE "{TABLE}_id_seq" OWNED BY NONE',
+        f'DROP TABLE "{TABLE}" CASCADE',
+        f'ALTER TABLE "{TABLE}_plain" RENAME TO "{TABLE}"',
+        f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY ("id")',
+        f'ALTER SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}"."id"',
+        f'ALTER TABLE "{TABLE}" ALTER COLUMN "id" SET DEFAULT nextval(\'"{TABLE}_id_seq"\')',
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    atomic = True
+
+    dependencies = [
+        ("logger", "0003_requestlog_json_encoder"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, unpartition_table),
+    ]
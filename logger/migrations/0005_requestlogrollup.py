@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0004_partition_requestlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestLogRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=6)),
+                ('bucket', models.DateTimeField()),
+                ('route', models.CharField(max_length=255)),
+                ('method', models.CharField(max_length=10)),
+                ('request_count', models.IntegerField(default=0)),
+                ('client_error_count', models.IntegerField(default=0)),
+                ('server_error_count', models.IntegerField(default=0)),
+                ('duration_sum', models.FloatField(default=0)),
+                ('duration_max', models.FloatField(default=0)),
+                ('latency_sketch', models.JSONField(default=dict)),
+            ],
+            options={
+                'ordering': ['-bucket'],
+                'indexes': [models.Index(fields=['granularity', 'route', 'bucket'], name='logger_rollup_route_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='requestlogrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'bucket', 'route', 'method'), name='logger_rollup_unique_bucket'),
+        ),
+    ]
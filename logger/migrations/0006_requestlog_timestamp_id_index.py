@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0005_requestlogrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='requestlog',
+            index=models.Index(fields=['timestamp', 'id'], name='logger_reqlog_ts_id_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Search indexes for RequestLog.path and RequestLog.error_message.
+#
+# Postgres: GIN tsvector index on error_message and, when the pg_trgm
+# extension is available, a GIN trigram index on path for ILIKE '%term%'.
+# sqlite: an external-content FTS5 table kept in sync by triggers.
+# The expressions must stay identical to the ones in logger/search.py.
+
+from django.db import migrations, transaction
+
+TSVECTOR_SQL = "to_tsvector('simple'::regconfig, coalesce(\"error_message\", ''))"
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS logger_requestlog_fts USING fts5(
+        path, error_message,
+        content='logger_requestlog', content_rowid='id',
+        tokenize="unicode61 tokenchars '_'"
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS logger_requestlog_fts_ai AFTER INSERT ON logger_requestlog BEGIN
+        INSERT INTO logger_requestlog_fts(rowid, path, error_message)
+        VALUES (new.id, new.path, new.error_message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS logger_requestlog_fts_ad AFTER DELETE ON logger_requestlog BEGIN
+        INSERT INTO logger_requestlog_fts(logger_requestlog_fts, rowid, path, error_message)
+        VALUES ('delete', old.id, old.path, old.error_message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS logger_requestlog_fts_au AFTER UPDATE OF path, error_message
+    ON logger_requestlog BEGIN
+        INSERT INTO logger_requestlog_fts(logger_requestlog_fts, rowid, path, error_message)
+        VALUES ('delete', old.id, old.path, old.error_message);
+        INSERT INTO logger_requestlog_fts(rowid, path, error_message)
+        VALUES (new.id, new.path, new.error_message);
+    END
+    """,
+    "INSERT INTO logger_requestlog_fts(logger_requestlog_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS logger_requestlog_fts_ai",
+    "DROP TRIGGER IF EXISTS logger_requestlog_fts_ad",
+    "DROP TRIGGER IF EXISTS logger_requestlog_fts_au",
+    "DROP TABLE IF EXISTS logger_requestlog_fts",
+]
+
+
+def _has_trigram(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return False
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except Exception:
+        # Extension yüklemek için yetki yoksa trigram index'siz devam
+        return False
+    return True
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "logger_reqlog_error_tsv_idx" '
+            f'ON "logger_requestlog" USING gin ({TSVECTOR_SQL})'
+        )
+        if _has_trigram(schema_editor):
+            schema_editor.execute(
+                'CREATE INDEX IF NOT EXISTS "logger_reqlog_path_trgm_idx" '
+                'ON "logger_requestlog" USING gin ("path" gin_trgm_ops)'
+            )
+    elif vendor == "sqlite":
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute('DROP INDEX IF EXISTS "logger_reqlog_error_tsv_idx"')
+        schema_editor.execute('DROP INDEX IF EXISTS "logger_reqlog_path_trgm_idx"')
+    elif vendor == "sqlite":
+        for statement in SQLITE_REVERSE:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logger", "0006_requestlog_timestamp_id_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
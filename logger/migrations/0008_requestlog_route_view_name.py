@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0007_requestlog_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestlog',
+            name='route',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestlog',
+            name='view_name',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='requestlog',
+            index=models.Index(fields=['route', 'timestamp'], name='logger_reqlog_route_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestlog',
+            index=models.Index(fields=['status_code', 'timestamp'], name='logger_reqlog_status_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestlog',
+            index=models.Index(fields=['view_name', 'timestamp'], name='logger_reqlog_view_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0008_requestlog_route_view_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestlog',
+            name='db_query_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestlog',
+            name='db_slowest_query',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestlog',
+            name='db_slowest_time',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestlog',
+            name='db_time',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestlogrollup',
+            name='db_query_count',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='requestlogrollup',
+            name='db_query_max',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='requestlogrollup',
+            name='db_time_sum',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0009_request_db_instrumentation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestlog',
+            name='profile',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestlog',
+            name='profile_samples',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
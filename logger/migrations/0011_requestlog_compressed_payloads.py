@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0010_requestlog_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestlog',
+            name='request_data_compressed',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestlog',
+            name='response_data_compressed',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
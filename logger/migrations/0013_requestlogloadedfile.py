@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0012_requestlogrollupstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestLogLoadedFile',
+            fields=[
+                ('path', models.CharField(max_length=500, primary_key=True, serialize=False)),
+                ('offset', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
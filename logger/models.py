@@ -1,20 +1,134 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
+
+from .payloads import decode_payload, encode_payload
 
 
 class RequestLog(models.Model):
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     path = models.CharField(max_length=255)
+    # URL pattern ('/order/<int:pk>/') ve view adı; NULL = henüz normalize edilmedi
+    route = models.CharField(max_length=255, null=True, blank=True)
+    view_name = models.CharField(max_length=255, null=True, blank=True)
     method = models.CharField(max_length=10)
-    request_data = models.JSONField(null=True, blank=True)
-    response_data = models.JSONField(null=True, blank=True)
+    request_data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    response_data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    # REQUEST_LOG_PAYLOAD_STORAGE['MODE'] == 'compressed' iken body'ler burada
+    request_data_compressed = models.BinaryField(null=True, blank=True)
+    response_data_compressed = models.BinaryField(null=True, blank=True)
     status_code = models.IntegerField()
     duration = models.FloatField()
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
     error_message = models.TextField(null=True, blank=True)
+    # View'in çalıştırdığı SQL sorguları (REQUEST_LOG_DB_INSTRUMENTATION)
+    db_query_count = models.IntegerField(null=True, blank=True)
+    db_time = models.FloatField(null=True, blank=True)
+    db_slowest_query = models.TextField(null=True, blank=True)
+    db_slowest_time = models.FloatField(null=True, blank=True)
+    # zlib ile sıkıştırılmış collapsed stack profili (REQUEST_LOG_PROFILING)
+    profile = models.BinaryField(null=True, blank=True)
+    profile_samples = models.IntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination (timestamp, id) üzerinden ilerler
+            models.Index(fields=['timestamp', 'id'], name='logger_reqlog_ts_id_idx'),
+            models.Index(fields=['route', 'timestamp'], name='logger_reqlog_route_ts_idx'),
+            models.Index(fields=['status_code', 'timestamp'], name='logger_reqlog_status_ts_idx'),
+            models.Index(fields=['view_name', 'timestamp'], name='logger_reqlog_view_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} - {self.status_code}"
+
+    def set_payloads(self, request_data, response_data, compress=False):
+        if compress:
+            self.request_data = self.response_data = None
+            self.request_data_compressed = encode_payload(request_data)
+            self.response_data_compressed = encode_payload(response_data)
+        else:
+            self.request_data, self.response_data = request_data, response_data
+            self.request_data_compressed = self.response_data_compressed = None
+
+    def get_request_data(self):
+        if self.request_data is None and self.request_data_compressed is not None:
+            return decode_payload(self.request_data_compressed)
+        return self.request_data
+
+    def get_response_data(self):
+        if self.response_data is None and self.response_data_compressed is not None:
+            return decode_payload(self.response_data_compressed)
+        return self.response_data
+
+
+class RequestLogRollup(models.Model):
+    GRANULARITY_CHOICES = (
+        ('minute', 'Minute'),
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    )
+
+    granularity = models.CharField(max_length=6, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    route = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    request_count = models.IntegerField(default=0)
+    client_error_count = models.IntegerField(default=0)
+    server_error_count = models.IntegerField(default=0)
+    duration_sum = models.FloatField(default=0)
+    duration_max = models.FloatField(default=0)
+    db_query_count = models.BigIntegerField(default=0)
+    db_query_max = models.IntegerField(default=0)
+    db_time_sum = models.FloatField(default=0)
+    latency_sketch = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'bucket', 'route', 'method'],
+                                    name='logger_rollup_unique_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'route', 'bucket'],
+                         name='logger_rollup_route_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.bucket} {self.method} {self.route}"
+
+
+class RequestLogRollupState(models.Model):
+    """
+    Progress of the rollup job over RequestLog ids (insert order), so rows
+    stored late still get rolled up into their timestamp's buckets.
+    """
+
+    name = models.CharField(max_length=32, primary_key=True)
+    # Bu id'ye kadar (dahil) satırlar rollup'lara eklendi
+    last_id = models.BigIntegerField(default=0)
+    # Önceki çalışmada görülen en büyük id; commit'i geciken transaction'lar
+    # için bir sonraki çalışma en fazla buraya kadar ilerler
+    horizon_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
+
+class RequestLogLoadedFile(models.Model):
+    """
+    How far load_request_logs got in an NDJSON file. The offset is saved in
+    the transaction that inserts the rows before it, so loading a file
+    again after a crash resumes there instead of inserting duplicates.
+    """
+
+    path = models.CharField(max_length=500, primary_key=True)
+    # Bu byte'a kadar olan satırlar RequestLog'a yazıldı
+    offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.method} {self.path} - {self.status_code}"
\ No newline at end of file
+        return f"{self.path}: {self.offset}"
@@ -0,0 +1,334 @@
+# logger/partitions.py
+import re
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from logging import getLogger
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import RequestLog
+
+logger = getLogger("my_logger")
+
+DEFAULT_PARTITIONING_SETTINGS = {
+    'INTERVAL': 'day',
+    'RETENTION_DAYS': 30,
+    'PREMAKE': 3,
+    'DETACH': False,
+    # Açıkken writer thread'i süresi dolan logları da siler; bilerek açılmalı
+    'AUTO_ROLLOVER': False,
+    'ROLLOVER_INTERVAL': 3600,
+    'DELETE_BATCH_SIZE': 5000,
+}
+
+INTERVALS = ('day', 'month')
+
+# Aynı anda birden fazla worker rollover yapmasın
+ROLLOVER_LOCK_ID = 7311001
+
+BOUND_PATTERN = re.compile(r"FROM \((?P<lower>.+?)\) TO \((?P<upper>.+?)\)")
+
+
+def get_partitioning_settings() -> dict:
+    return {**DEFAULT_PARTITIONING_SETTINGS,
+            **getattr(settings, 'REQUEST_LOG_PARTITIONING', {})}
+
+
+def table_name() -> str:
+    return RequestLog._meta.db_table
+
+
+def period_start(moment: datetime, interval: str) -> datetime:
+    moment = moment.astimezone(dt_timezone.utc)
+    if interval == 'month':
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    if interval == 'month':
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+    return start + timedelta(days=1)
+
+
+def partition_name(start: datetime, interval: str) -> str:
+    suffix = start.strftime('%Y%m') if interval == 'month' else start.strftime('%Y%m%d')
+    return f"{table_name()}_p{suffix}"
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND pg_table_is_visible(c.oid)
+            """,
+            [table_name()],
+        )
+        return cursor.fetchone() is not None
+
+
+def _parse_bound(value: str):
+    if value == 'MINVALUE' or value == 'MAXVALUE':
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def list_partitions() -> list:
+    """
+    Attached partitions as (name, lower, upper) sorted by lower bound. The
+    DEFAULT partition has both bounds None, MINVALUE/MAXVALUE map to None.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)
+            """,
+            [table_name()],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = BOUND_PATTERN.search(bound)
+        if match is None:
+            partitions.append((name, None, None))
+            continue
+        partitions.append((name, _parse_bound(match.group('lower')),
+                           _parse_bound(match.group('upper'))))
+
+    epoch = datetime.min.replace(tzinfo=dt_timezone.utc)
+    return sorted(partitions, key=lambda p: p[1] or epoch)
+
+
+def default_partition():
+    """Name of the DEFAULT partition, or None."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)
+              AND pg_get_expr(child.relpartbound, child.oid) = 'DEFAULT'
+            """,
+            [table_name()],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _overlaps(partitions, start, end) -> bool:
+    for _, lower, upper in partitions:
+        if lower is None and upper is None:
+            continue
+        if (lower is None or lower < end) and (upper is None or start < upper):
+            return True
+    return False
+
+
+def ensure_partitions(interval: str, premake: int, now=None) -> list:
+    """
+    Creates the partition for the current period and `premake` periods
+    ahead. Ranges already covered by an existing partition are skipped.
+
+    Rows that reached the DEFAULT partition because rollover didn't run in
+    time would make CREATE TABLE ... PARTITION OF fail for their range, so
+    partitions are also created for the periods of those rows, and the
+    rows are moved into them while the DEFAULT partition is detached.
+    Run inside a transaction.
+    """
+    now = now or timezone.now()
+    existing = list_partitions()
+    table = table_name()
+    default = default_partition()
+
+    first = period_start(now, interval)
+    last = first
+    for _ in range(premake):
+        last = next_period(last, interval)
+    stray_first = stray_last = None
+    if default is not None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT min("timestamp"), max("timestamp") FROM "{default}"')
+            stray_first, stray_last = cursor.fetchone()
+    if stray_first is not None:
+        first = min(first, period_start(stray_first, interval))
+        last = max(last, period_start(stray_last, interval))
+
+    missing = []
+    start = first
+    while start <= last:
+        end = next_period(start, interval)
+        if not _overlaps(existing, start, end):
+            missing.append((partition_name(start, interval), start, end))
+            existing.append(missing[-1])
+        start = end
+    if not missing:
+        return []
+
+    with connection.cursor() as cursor:
+        if stray_first is not None:
+            # DEFAULT'ta bu aralıkta satır varken PARTITION OF hata verir
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"')
+        for name, start, end in missing:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            if stray_first is not None:
+                cursor.execute(
+                    f'WITH moved AS (DELETE FROM "{default}" '
+                    f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+                    f'INSERT INTO "{name}" SELECT * FROM moved',
+                    [start, end],
+                )
+                if cursor.rowcount:
+                    logger.warning("Moved %s request log rows from %s to %s",
+                                   cursor.rowcount, default, name)
+        if stray_first is not None:
+            cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT')
+    return [name for name, _, _ in missing]
+
+
+def expire_partitions(retention_days: int, detach: bool, now=None, dry_run=False) -> list:
+    """
+    Drops (or detaches) every partition whose upper bound is older than the
+    retention window. The DEFAULT partition is handled by
+    purge_default_partition.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days)
+    expired = [name for name, lower, upper in list_partitions()
+               if upper is not None and upper <= cutoff]
+
+    if dry_run:
+        return expired
+
+    for name in expired:
+        with connection.cursor() as cursor:
+            if detach:
+                cursor.execute(
+                    f'ALTER TABLE "{table_name()}" DETACH PARTITION "{name}"')
+            else:
+                cursor.execute(f'DROP TABLE "{name}"')
+    return expired
+
+
+def purge_default_partition(retention_days: int, now=None, dry_run=False) -> int:
+    """Deletes rows older than the retention window from the DEFAULT partition."""
+    default = default_partition()
+    if default is None:
+        return 0
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days)
+    with connection.cursor() as cursor:
+        if dry_run:
+            cursor.execute(f'SELECT count(*) FROM "{default}" WHERE "timestamp" < %s', [cutoff])
+            return cursor.fetchone()[0]
+        cursor.execute(f'DELETE FROM "{default}" WHERE "timestamp" < %s', [cutoff])
+        return cursor.rowcount
+
+
+def purge_expired_rows(retention_days: int, batch_size: int, now=None, dry_run=False) -> int:
+    """
+    Plain table fallback (sqlite or unpartitioned Postgres): deletes expired
+    rows in id-ordered batches so no single DELETE holds a long lock.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days)
+    expired = RequestLog.objects.filter(timestamp__lt=cutoff)
+    if dry_run:
+        return expired.count()
+
+    deleted = 0
+    while True:
+        ids = list(expired.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        count, _ = RequestLog.objects.filter(id__in=ids).delete()
+        deleted += count
+    return deleted
+
+
+def rollover(interval=None, retention_days=None, premake=None, detach=None, dry_run=False) -> dict:
+    config = get_partitioning_settings()
+    interval = interval or config['INTERVAL']
+    retention_days = config['RETENTION_DAYS'] if retention_days is None else retention_days
+    premake = config['PREMAKE'] if premake is None else premake
+    detach = config['DETACH'] if detach is None else detach
+
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown partition interval: {interval}")
+
+    if not is_partitioned():
+        return {
+            'partitioned': False,
+            'created': [],
+            'expired': [],
+            'deleted_rows': purge_expired_rows(
+                retention_days, config['DELETE_BATCH_SIZE'], dry_run=dry_run),
+        }
+
+    with transaction.atomic():
+        # Önce süresi dolan DEFAULT satırları silinir ki onlar için partition açılmasın
+        deleted_rows = purge_default_partition(retention_days, dry_run=dry_run)
+        created = [] if dry_run else ensure_partitions(interval, premake)
+        expired = expire_partitions(retention_days, detach, dry_run=dry_run)
+
+    return {
+        'partitioned': True,
+        'created': created,
+        'expired': expired,
+        'deleted_rows': deleted_rows,
+    }
+
+
+_last_rollover = None
+
+
+def maybe_rollover():
+    """
+    Called from the request log writer thread. Runs rollover at most once per
+    ROLLOVER_INTERVAL seconds per process, and only one process at a time
+    thanks to an advisory lock.
+    """
+    global _last_rollover
+
+    config = get_partitioning_settings()
+    if not config['AUTO_ROLLOVER']:
+        return
+
+    now = time.monotonic()
+    if _last_rollover is not None and now - _last_rollover < config['ROLLOVER_INTERVAL']:
+        return
+    _last_rollover = now
+
+    try:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [ROLLOVER_LOCK_ID])
+                if not cursor.fetchone()[0]:
+                    return
+            try:
+                result = rollover()
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", [ROLLOVER_LOCK_ID])
+        else:
+            result = rollover()
+    except Exception:
+        logger.exception("Request log rollover failed")
+        return
+
+    if result['created'] or result['expired'] or result['deleted_rows']:
+        logger.warning(f"Request log rollover: {result}")
@@ -0,0 +1,152 @@
+# logger/payloads.py
+import json
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+DEFAULT_PAYLOAD_SETTINGS = {
+    # 'json': JSONField kolonları, 'compressed': *_compressed BinaryField kolonları
+    'MODE': 'json',
+    'LEVEL': 6,
+    'DICTIONARY_ID': 1,
+    # Eğitilmiş sözlükler: {2: '/path/payloads-2.zdict'}. Bir id ile yazılmış
+    # satırlar okunabilsin diye id'ler asla yeniden kullanılmamalı.
+    'DICTIONARY_FILES': {},
+}
+
+PAYLOAD_MODES = ('json', 'compressed')
+MAX_DICTIONARY_SIZE = 32 * 1024
+RAW_DEFLATE = -15
+
+# 1 numaralı hazır sözlük: CustomSuccessResponse/CustomErrorResponse zarfı,
+# sayfalama alanları, maskeler ve capture işaretleri. zlib sona yakın
+# parçaları daha ucuza referansladığı için en sık geçenler en sonda.
+# DEĞİŞTİRMEYİN: mevcut satırlar bu baytlarla sıkıştırıldı, yeni sözlük
+# yeni id ile eklenmeli.
+ENVELOPE_DICTIONARY = ''.join([
+    '{"detail":"Given token not valid for any token type","code":"token_not_valid",'
+    '"messages":[{"token_class":"AccessToken","token_type":"access","message":"Token is invalid or expired"}]}',
+    '{"detail":"Authentication credentials were not provided."}',
+    '{"_skipped":"streaming","_content_type":"',
+    '{"_skipped":"content-type","_content_type":"multipart/form-data; boundary=',
+    '{"_truncated":true,"_size":',
+    ',"_preview":"{\\"status\\":\\"OK\\",\\"message\\":\\"Operation Successfully Done.\\",\\"data\\":',
+    '"email":"","full_name":"","phone_number":"","turkish_id_number":"',
+    '"sms_notification":false,"email_notification":false,"app_lang":"tr","device_token":',
+    '"password":"********"','"id_token":"********"',
+    '"message":"User not found."','"message":"Billing address not found."',
+    '"message":"Transaction not found"','"message":"An internal server error occurred."',
+    '"message":"User Created Successfully."',
+    '"count_is_estimate":false,"next":null,"previous":null}}',
+    '"options":{"count":',
+    '"title":"','"message":"','"is_read":false,"created_at":"20','"user":',
+    '{"id":',
+    '{"status":"NOK","message":"Operation failed.","data":{"isAvailable":false,"error_code":666},"options":{}}',
+    '{"status":"OK","message":"Operation Successfully Done.","data":[{"id":',
+    '{"status":"OK","message":"Operation Successfully Done.","data":{',
+    '","data":{"isAvailable":false,"error_code":666},"options":{}}',
+    '},"options":{}}',
+]).encode('utf-8')
+
+BUILTIN_DICTIONARIES = {
+    0: b'',
+    1: ENVELOPE_DICTIONARY,
+}
+
+
+def get_payload_settings() -> dict:
+    return {**DEFAULT_PAYLOAD_SETTINGS,
+            **getattr(settings, 'REQUEST_LOG_PAYLOAD_STORAGE', {})}
+
+
+@lru_cache(maxsize=16)
+def load_dictionary(dictionary_id: int) -> bytes:
+    if dictionary_id in BUILTIN_DICTIONARIES:
+        return BUILTIN_DICTIONARIES[dictionary_id]
+    files = {int(key): value for key, value in get_payload_settings()['DICTIONARY_FILES'].items()}
+    if dictionary_id not in files:
+        raise ValueError(f"Unknown payload dictionary id: {dictionary_id}")
+    with open(files[dictionary_id], 'rb') as fileobj:
+        return fileobj.read()[-MAX_DICTIONARY_SIZE:]
+
+
+def serialize_payload(value) -> bytes:
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def encode_payload(value, dictionary_id=None, level=None):
+    """
+    JSON value -> 1 byte dictionary id + raw deflate stream. Raw deflate
+    drops the zlib header and checksum, which matter for the many small
+    payloads.
+    """
+    if value is None:
+        return None
+    if dictionary_id is None or level is None:
+        config = get_payload_settings()
+        dictionary_id = config['DICTIONARY_ID'] if dictionary_id is None else dictionary_id
+        level = config['LEVEL'] if level is None else level
+
+    body = deflate(serialize_payload(value), load_dictionary(dictionary_id), level)
+    return bytes([dictionary_id]) + body
+
+
+def deflate(data: bytes, dictionary: bytes, level=6) -> bytes:
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, RAW_DEFLATE, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, RAW_DEFLATE)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decode_payload(blob):
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    dictionary = load_dictionary(blob[0])
+    if dictionary:
+        decompressor = zlib.decompressobj(RAW_DEFLATE, zdict=dictionary)
+    else:
+        decompressor = zlib.decompressobj(RAW_DEFLATE)
+    return json.loads(decompressor.decompress(blob[1:]) + decompressor.flush())
+
+
+FRAGMENT_PATTERN = re.compile(rb'"[^"\\]{1,48}":(?:"[^"\\]{0,32}"|-?\d+|true|false|null|\{\}|\[\])?[,}\]]*'
+                              rb'|\{"[^"\\]{1,48}":')
+WHOLE_SAMPLE_SIZE = 256
+PREFIX_SIZE = 96
+
+
+def train_dictionary(samples, size=MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    Builds a zlib preset dictionary from serialized sample payloads: the
+    JSON fragments, envelope prefixes and whole small payloads that save
+    the most bytes (frequency x length) are kept, the best ones at the end
+    where back-references are cheapest.
+    """
+    counts = Counter()
+    for sample in samples:
+        # Aynı örnekte tekrar eden parça zaten kendi içinde sıkışır
+        fragments = set(FRAGMENT_PATTERN.findall(sample))
+        fragments.add(sample[:PREFIX_SIZE])
+        if len(sample) <= WHOLE_SAMPLE_SIZE:
+            fragments.add(sample)
+        counts.update(fragments)
+
+    scored = sorted(((count * len(fragment), fragment)
+                     for fragment, count in counts.items() if count > 1),
+                    reverse=True)
+    chosen = []
+    total = 0
+    for _, fragment in scored:
+        if total + len(fragment) > size:
+            continue
+        chosen.append(fragment)
+        total += len(fragment)
+    chosen.reverse()
+    return b''.join(chosen)
@@ -0,0 +1,232 @@
+# logger/profiling.py
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from logging import getLogger
+
+from django.conf import settings
+
+logger = getLogger("my_logger")
+
+DEFAULT_PROFILING_SETTINGS = {
+    'ENABLED': False,
+    'INTERVAL': 0.005,
+    'THRESHOLD_MS': 1000,
+    'ROUTE_THRESHOLDS': {},
+    # Yavaş istekler eşiğin bu oranı kadar sürünce örneklenmeye başlar
+    'ARM_RATIO': 0.5,
+    'SAMPLE_RATE': 0.0,
+    'DEBUG_HEADER': 'X-Profile',
+    'DEBUG_TOKEN': '',
+    'MAX_DEPTH': 128,
+    'MAX_SAMPLES': 20000,
+}
+
+
+class ProfileSession:
+    __slots__ = ('thread_id', 'started', 'arm_at', 'threshold', 'forced', 'stacks', 'samples')
+
+    def __init__(self, thread_id, started, arm_at, threshold, forced):
+        self.thread_id = thread_id
+        self.started = started
+        self.arm_at = arm_at
+        self.threshold = threshold
+        self.forced = forced
+        self.stacks = Counter()
+        self.samples = 0
+
+    def should_keep(self, duration: float) -> bool:
+        return self.samples > 0 and (self.forced or duration >= self.threshold)
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format: 'root;child;leaf count' per line."""
+        return '\n'.join(f"{';'.join(stack)} {count}"
+                         for stack, count in self.stacks.most_common())
+
+
+class StackSampler:
+    """
+    Wall-clock sampling profiler for request threads.
+
+    Requests register their thread and a single daemon thread reads their
+    stacks from sys._current_frames() every `interval` seconds. A request is
+    sampled from the start when it was picked by SAMPLE_RATE or the debug
+    header, otherwise only after it has run for ARM_RATIO of its route's
+    threshold, so fast requests cost one dict insert and delete. The
+    sampler thread sleeps until the earliest session arms and only ticks
+    every `interval` while one is armed. The samples are kept only when the
+    request ends up over the threshold.
+    """
+
+    def __init__(self, interval=0.005, threshold_ms=1000, route_thresholds=None,
+                 arm_ratio=0.5, sample_rate=0.0, debug_header='X-Profile',
+                 debug_token='', max_depth=128, max_samples=20000):
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        # En uzun prefix önce eşleşsin
+        self.route_thresholds = sorted(
+            ((prefix, ms / 1000) for prefix, ms in (route_thresholds or {}).items()),
+            key=lambda item: len(item[0]), reverse=True)
+        self.arm_ratio = arm_ratio
+        self.sample_rate = sample_rate
+        self.debug_meta_key = 'HTTP_' + debug_header.upper().replace('-', '_')
+        self.debug_token = debug_token
+        self.max_depth = max_depth
+        self.max_samples = max_samples
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Sampler thread'inin bir sonraki uyanma anı (monotonic)
+        self._wake_at = float('inf')
+        self._thread = None
+        self._pid = None
+
+    def threshold_for(self, path: str) -> float:
+        for prefix, threshold in self.route_thresholds:
+            if path.startswith(prefix):
+                return threshold
+        return self.threshold
+
+    def is_forced(self, request) -> bool:
+        if self.debug_token and request.META.get(self.debug_meta_key) == self.debug_token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, request) -> ProfileSession:
+        self._ensure_started()
+        threshold = self.threshold_for(request.path)
+        forced = self.is_forced(request)
+        started = time.monotonic()
+        session = ProfileSession(
+            thread_id=threading.get_ident(),
+            started=started,
+            arm_at=started if forced else started + threshold * self.arm_ratio,
+            threshold=threshold,
+            forced=forced,
+        )
+        with self._lock:
+            self._sessions[session.thread_id] = session
+            if session.arm_at < self._wake_at:
+                self._wakeup.notify()
+        return session
+
+    def stop(self, session: ProfileSession) -> ProfileSession:
+        # Kilit bırakıldıktan sonra sampler bu session'a yazmaz
+        with self._lock:
+            if self._sessions.get(session.thread_id) is session:
+                del self._sessions[session.thread_id]
+        return session
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None:
+                return
+            # Fork sonrası thread yeni süreçte yok, yeniden başlat
+            self._sessions = {}
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def _next_delay(self, now):
+        """
+        Seconds until the next sample: `interval` while a session is armed,
+        else until the earliest one arms, None (until notified) when idle.
+        Called with the lock held.
+        """
+        arm_at = min((session.arm_at for session in self._sessions.values()
+                      if session.samples < self.max_samples), default=None)
+        if arm_at is None:
+            return None
+        return self.interval if arm_at <= now else arm_at - now
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                now = time.monotonic()
+                delay = self._next_delay(now)
+                self._wake_at = float('inf') if delay is None else now + delay
+                self._wakeup.wait(delay)
+                self._wake_at = float('-inf')
+            try:
+                self._sample()
+            except Exception:
+                logger.exception("Request profiler sampling failed")
+
+    def _sample(self):
+        now = time.monotonic()
+        with self._lock:
+            armed = [session for session in self._sessions.values()
+                     if session.arm_at <= now and session.samples < self.max_samples]
+        if not armed:
+            return
+
+        frames = sys._current_frames()
+        stacks = [(session, self._stack(frames[session.thread_id]))
+                  for session in armed if session.thread_id in frames]
+        del frames
+        with self._lock:
+            for session, stack in stacks:
+                # stop() ile çıkarılmış session'ın sonuçları okunuyor olabilir
+                if self._sessions.get(session.thread_id) is session:
+                    session.stacks[stack] += 1
+                    session.samples += 1
+
+    def _stack(self, frame) -> tuple:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            module = frame.f_globals.get('__name__', '?')
+            stack.append(f"{module}:{code.co_name}")
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+
+def compress_profile(collapsed: str) -> bytes:
+    return zlib.compress(collapsed.encode('utf-8'), 6)
+
+
+def decompress_profile(data) -> str:
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_profiler():
+    """
+    Process-wide sampler built from settings.REQUEST_LOG_PROFILING, or None
+    when profiling is disabled.
+    """
+    global _sampler
+
+    config = {**DEFAULT_PROFILING_SETTINGS,
+              **getattr(settings, 'REQUEST_LOG_PROFILING', {})}
+    if not config['ENABLED']:
+        return None
+
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = StackSampler(
+                    interval=config['INTERVAL'],
+                    threshold_ms=config['THRESHOLD_MS'],
+                    route_thresholds=config['ROUTE_THRESHOLDS'],
+                    arm_ratio=config['ARM_RATIO'],
+                    sample_rate=config['SAMPLE_RATE'],
+                    debug_header=config['DEBUG_HEADER'],
+                    debug_token=config['DEBUG_TOKEN'],
+                    max_depth=config['MAX_DEPTH'],
+                    max_samples=config['MAX_SAMPLES'],
+                )
+    return _sampler
@@ -0,0 +1,278 @@
+# logger/rollups.py
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from .models import RequestLog, RequestLogRollup, RequestLogRollupState
+from .sketch import LatencySketch
+
+DEFAULT_ROLLUP_SETTINGS = {
+    # Tek transaction'da işlenen RequestLog id aralığı
+    'ROWS_PER_TRANSACTION': 50_000,
+    'MINUTE_RETENTION_DAYS': 7,
+    'HOUR_RETENTION_DAYS': 90,
+    'DAY_RETENTION_DAYS': None,
+}
+
+STEPS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def get_rollup_settings() -> dict:
+    return {**DEFAULT_ROLLUP_SETTINGS,
+            **getattr(settings, 'REQUEST_LOG_ROLLUPS', {})}
+
+
+def floor_bucket(moment, granularity):
+    moment = moment.replace(second=0, microsecond=0)
+    if granularity in ('hour', 'day'):
+        moment = moment.replace(minute=0)
+    if granularity == 'day':
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def route_from_match(match):
+    """(route, view_name) from a ResolverMatch, e.g. request.resolver_match."""
+    if match is None:
+        return UNMATCHED_ROUTE, None
+    return '/' + (match.route or '').lstrip('^'), match.view_name or None
+
+
+@lru_cache(maxsize=4096)
+def resolve_route(path: str):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        match = None
+    return route_from_match(match)
+
+
+def route_for_path(path: str) -> str:
+    """'/user/notification/12/' -> '/user/notification/<int:pk>/'"""
+    return resolve_route(path)[0]
+
+
+class RollupAccumulator:
+    def __init__(self):
+        self.request_count = 0
+        self.client_error_count = 0
+        self.server_error_count = 0
+        self.duration_sum = 0.0
+        self.duration_max = 0.0
+        self.db_query_count = 0
+        self.db_query_max = 0
+        self.db_time_sum = 0.0
+        self.sketch = LatencySketch()
+
+    def add_request(self, status_code, duration, db_query_count=None, db_time=None):
+        self.request_count += 1
+        if 400 <= status_code < 500:
+            self.client_error_count += 1
+        elif status_code >= 500:
+            self.server_error_count += 1
+        self.duration_sum += duration
+        self.duration_max = max(self.duration_max, duration)
+        self.sketch.add(duration)
+        if db_query_count is not None:
+            self.db_query_count += db_query_count
+            self.db_query_max = max(self.db_query_max, db_query_count)
+        if db_time is not None:
+            self.db_time_sum += db_time
+
+    def add_rollup(self, rollup):
+        self.request_count += rollup.request_count
+        self.client_error_count += rollup.client_error_count
+        self.server_error_count += rollup.server_error_count
+        self.duration_sum += rollup.duration_sum
+        self.duration_max = max(self.duration_max, rollup.duration_max)
+        self.db_query_count += rollup.db_query_count
+        self.db_query_max = max(self.db_query_max, rollup.db_query_max)
+        self.db_time_sum += rollup.db_time_sum
+        self.sketch.merge(LatencySketch.from_dict(rollup.latency_sketch))
+
+    def merge(self, other):
+        self.request_count += other.request_count
+        self.client_error_count += other.client_error_count
+        self.server_error_count += other.server_error_count
+        self.duration_sum += other.duration_sum
+        self.duration_max = max(self.duration_max, other.duration_max)
+        self.db_query_count += other.db_query_count
+        self.db_query_max = max(self.db_query_max, other.db_query_max)
+        self.db_time_sum += other.db_time_sum
+        self.sketch.merge(other.sketch)
+
+    def to_rollup(self, granularity, bucket, route, method):
+        return RequestLogRollup(
+            granularity=granularity,
+            bucket=bucket,
+            route=route,
+            method=method,
+            request_count=self.request_count,
+            client_error_count=self.client_error_count,
+            server_error_count=self.server_error_count,
+            duration_sum=self.duration_sum,
+            duration_max=self.duration_max,
+            db_query_count=self.db_query_count,
+            db_query_max=self.db_query_max,
+            db_time_sum=self.db_time_sum,
+            latency_sketch=self.sketch.to_dict(),
+        )
+
+
+STATE_NAME = 'requests'
+
+ROLLUP_FIELDS = ('request_count', 'client_error_count', 'server_error_count', 'duration_sum',
+                 'duration_max', 'db_query_count', 'db_query_max', 'db_time_sum', 'latency_sketch')
+
+
+def _retention_cutoffs(config, now):
+    cutoffs = {}
+    for granularity in STEPS:
+        retention = config[f'{granularity.upper()}_RETENTION_DAYS']
+        cutoffs[granularity] = (floor_bucket(now - timedelta(days=retention), granularity)
+                                if retention is not None else None)
+    return cutoffs
+
+
+def _coarsen(accumulators, granularity):
+    """Folds (bucket, route, method) accumulators into `granularity` buckets."""
+    coarse = {}
+    for (bucket, route, method), accumulator in accumulators.items():
+        key = (floor_bucket(bucket, granularity), route, method)
+        target = coarse.get(key)
+        if target is None:
+            target = coarse[key] = RollupAccumulator()
+        target.merge(accumulator)
+    return coarse
+
+
+def _merge(accumulators, granularity, cutoff=None) -> int:
+    """
+    Adds the accumulated deltas onto the existing `granularity` rollups and
+    creates the missing ones. Buckets older than `cutoff` would be pruned
+    right away and are skipped. Run inside a transaction.
+    """
+    if cutoff is not None:
+        accumulators = {key: acc for key, acc in accumulators.items() if key[0] >= cutoff}
+    if not accumulators:
+        return 0
+
+    buckets = [bucket for bucket, _, _ in accumulators]
+    existing = {(rollup.bucket, rollup.route, rollup.method): rollup
+                for rollup in RequestLogRollup.objects.select_for_update()
+                .filter(granularity=granularity, bucket__gte=min(buckets), bucket__lte=max(buckets),
+                        route__in={route for _, route, _ in accumulators})}
+    created, updated = [], []
+    for (bucket, route, method), accumulator in accumulators.items():
+        current = existing.get((bucket, route, method))
+        if current is None:
+            created.append(accumulator.to_rollup(granularity, bucket, route, method))
+            continue
+        # Delta bir üst seviyeye de eklenecek; kendisi değişmemeli
+        combined = RollupAccumulator()
+        combined.merge(accumulator)
+        combined.add_rollup(current)
+        rollup = combined.to_rollup(granularity, bucket, route, method)
+        rollup.pk = current.pk
+        updated.append(rollup)
+    RequestLogRollup.objects.bulk_create(created, batch_size=1000)
+    RequestLogRollup.objects.bulk_update(updated, ROLLUP_FIELDS, batch_size=1000)
+    return len(created) + len(updated)
+
+
+def _rollup_rows(rows, cutoffs) -> dict:
+    """Adds a RequestLog queryset to the minute, hour and day rollups."""
+    rows = (rows.order_by()
+            .values_list('timestamp', 'route', 'path', 'method', 'status_code', 'duration',
+                         'db_query_count', 'db_time')
+            .iterator(chunk_size=2000))
+    accumulators = {}
+    for timestamp, route, path, method, status_code, duration, db_query_count, db_time in rows:
+        # Eski (backfill edilmemiş) satırlarda route boş
+        key = (floor_bucket(timestamp, 'minute'), route or route_for_path(path), method)
+        accumulator = accumulators.get(key)
+        if accumulator is None:
+            accumulator = accumulators[key] = RollupAccumulator()
+        accumulator.add_request(status_code, duration, db_query_count, db_time)
+
+    written = {}
+    for granularity in STEPS:
+        if granularity != 'minute':
+            accumulators = _coarsen(accumulators, granularity)
+        written[granularity] = _merge(accumulators, granularity, cutoffs[granularity])
+    return written
+
+
+def rollup_requests(now) -> dict:
+    """
+    Adds raw RequestLog rows to the minute, hour and day rollups in id
+    (insert) order, so rows written late (slow requests, buffered or bulk
+    loaded logs) still land in the buckets of their timestamp. Each run
+    stops at the highest id seen by the previous run, which leaves a run's
+    time for transactions that took an id to commit. One transaction per
+    ROWS_PER_TRANSACTION ids; the watermark moves with the rollups.
+    """
+    config = get_rollup_settings()
+    cutoffs = _retention_cutoffs(config, now)
+    state, _ = RequestLogRollupState.objects.get_or_create(name=STATE_NAME)
+    written = dict.fromkeys(STEPS, 0)
+    horizon = state.horizon_id
+
+    while state.last_id < horizon:
+        with transaction.atomic():
+            state = RequestLogRollupState.objects.select_for_update().get(name=STATE_NAME)
+            upper = min(state.last_id + config['ROWS_PER_TRANSACTION'], horizon)
+            if state.last_id >= upper:
+                break
+            rows = RequestLog.objects.filter(id__gt=state.last_id, id__lte=upper)
+            for granularity, count in _rollup_rows(rows, cutoffs).items():
+                written[granularity] += count
+            state.last_id = upper
+            state.save(update_fields=['last_id', 'updated_at'])
+
+    state.horizon_id = RequestLog.objects.aggregate(last=Max('id'))['last'] or 0
+    state.save(update_fields=['horizon_id', 'updated_at'])
+    return written
+
+
+def prune_rollups(now) -> int:
+    config = get_rollup_settings()
+    deleted = 0
+    for granularity, cutoff in _retention_cutoffs(config, now).items():
+        if cutoff is None:
+            continue
+        count, _ = (RequestLogRollup.objects
+                    .filter(granularity=granularity, bucket__lt=cutoff)
+                    .delete())
+        deleted += count
+    return deleted
+
+
+def run_rollups(now=None) -> dict:
+    """
+    Incremental pipeline: new raw logs are folded into the minute, hour and
+    day rollups at once, then expired rollups are pruned. Returns the rollup
+    rows written per level and the pruned count.
+    """
+    now = now or timezone.now()
+    return {**rollup_requests(now), 'pruned': prune_rollups(now)}
+
+
+def choose_granularity(start, end) -> str:
+    span = end - start
+    if span <= timedelta(hours=6):
+        return 'minute'
+    if span <= timedelta(days=14):
+        return 'hour'
+    return 'day'
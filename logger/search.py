@@ -0,0 +1,185 @@
+# logger/search.py
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import RequestLog
+
+FTS_TABLE = 'logger_requestlog_fts'
+
+# status:500  status:5xx  status:400-499  status:>=500
+STATUS_PATTERN = re.compile(r'^status:(?P<op>>=|<=|>|<)?(?P<low>\d{3}|\dxx)(?:-(?P<high>\d{3}))?$', re.I)
+TOKEN_PATTERN = re.compile(r'(?P<field>path:|error:)?(?:"(?P<phrase>[^"]+)"|(?P<word>\S+))')
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+class SearchTerm:
+    def __init__(self, text, field=None, phrase=False, prefix=False):
+        self.text = text
+        self.field = field
+        self.phrase = phrase
+        self.prefix = prefix
+
+    @property
+    def words(self):
+        return WORD_PATTERN.findall(self.text.lower())
+
+
+class ParsedQuery:
+    def __init__(self):
+        self.terms = []
+        self.status_min = None
+        self.status_max = None
+
+
+def parse_query(text: str) -> ParsedQuery:
+    """
+    Supported syntax:
+        timeout                  word in path or error message
+        Connect*                 prefix
+        "connection refused"     phrase
+        path:/order/ error:Key   restrict a term to one column
+        status:5xx status:400-499 status:>=500
+    """
+    parsed = ParsedQuery()
+    for match in TOKEN_PATTERN.finditer(text or ''):
+        field = (match.group('field') or '').rstrip(':') or None
+        if match.group('phrase'):
+            parsed.terms.append(SearchTerm(match.group('phrase'), field=field, phrase=True))
+            continue
+
+        word = match.group('word')
+        status = STATUS_PATTERN.match(word)
+        if status and field is None:
+            _apply_status(parsed, status)
+            continue
+        if word.endswith('*') and len(word) > 1:
+            parsed.terms.append(SearchTerm(word[:-1], field=field, prefix=True))
+        else:
+            parsed.terms.append(SearchTerm(word, field=field))
+    return parsed
+
+
+def _apply_status(parsed, match):
+    low = match.group('low').lower()
+    high = match.group('high')
+    op = match.group('op')
+    if low.endswith('xx'):
+        start = int(low[0]) * 100
+        parsed.status_min, parsed.status_max = start, start + 99
+    elif high:
+        parsed.status_min, parsed.status_max = int(low), int(high)
+    elif op in ('>=', '>'):
+        parsed.status_min = int(low) + (1 if op == '>' else 0)
+    elif op in ('<=', '<'):
+        parsed.status_max = int(low) - (1 if op == '<' else 0)
+    else:
+        parsed.status_min = parsed.status_max = int(low)
+
+
+def search_request_logs(queryset, text):
+    """
+    Filters `queryset` by the search expression and annotates `search_rank`
+    (higher is better). Postgres uses the trigram index on path and the
+    tsvector index on error_message, sqlite uses the FTS5 shadow table.
+    """
+    parsed = parse_query(text)
+    if parsed.status_min is not None:
+        queryset = queryset.filter(status_code__gte=parsed.status_min)
+    if parsed.status_max is not None:
+        queryset = queryset.filter(status_code__lte=parsed.status_max)
+
+    terms = [term for term in parsed.terms if term.words]
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgresql(queryset, terms)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, terms)
+    return _search_fallback(queryset, terms)
+
+
+TSVECTOR_SQL = "to_tsvector('simple'::regconfig, coalesce(\"logger_requestlog\".\"error_message\", ''))"
+
+
+def _tsquery(term):
+    words = term.words
+    if term.phrase:
+        return "phraseto_tsquery('simple'::regconfig, %s)", [' '.join(words)]
+    if term.prefix:
+        words[-1] = words[-1] + ':*'
+    return "to_tsquery('simple'::regconfig, %s)", [' & '.join(words)]
+
+
+def _like_pattern(text):
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    # '/order/' gibi path'ler baştan eşleşsin, diğerleri her yerde
+    if escaped.startswith('/'):
+        return f'{escaped}%'
+    return f'%{escaped}%'
+
+
+PATH_ILIKE_SQL = "\"logger_requestlog\".\"path\" ILIKE %s"
+
+
+def _search_postgresql(queryset, terms):
+    rank_sql = []
+    rank_params = []
+    for term in terms:
+        condition = Q()
+        if term.field in (None, 'path'):
+            pattern = _like_pattern(term.text)
+            condition |= Q(RawSQL(PATH_ILIKE_SQL, [pattern], output_field=BooleanField()))
+            rank_sql.append(f"CASE WHEN {PATH_ILIKE_SQL} THEN 0.5 ELSE 0 END")
+            rank_params.append(pattern)
+        if term.field in (None, 'error'):
+            tsquery_sql, tsquery_params = _tsquery(term)
+            condition |= Q(RawSQL(f"{TSVECTOR_SQL} @@ {tsquery_sql}", tsquery_params,
+                                  output_field=BooleanField()))
+            rank_sql.append(f"ts_rank({TSVECTOR_SQL}, {tsquery_sql})")
+            rank_params.extend(tsquery_params)
+        queryset = queryset.filter(condition)
+
+    return queryset.annotate(search_rank=RawSQL(' + '.join(rank_sql), rank_params,
+                                                output_field=FloatField()))
+
+
+def _fts5_expression(terms):
+    parts = []
+    for term in terms:
+        # Kelimeler \w+ olduğu için tırnak kaçırmaya gerek yok
+        token = '"' + ' '.join(term.words) + '"'
+        if term.prefix:
+            token += ' *'
+        if term.field == 'path':
+            token = f'path : {token}'
+        elif term.field == 'error':
+            token = f'error_message : {token}'
+        parts.append(token)
+    return ' AND '.join(parts)
+
+
+def _search_sqlite(queryset, terms):
+    expression = _fts5_expression(terms)
+    table = RequestLog._meta.db_table
+    queryset = queryset.filter(id__in=RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression]))
+    return queryset.annotate(search_rank=RawSQL(
+        f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid = \"{table}\".\"id\"",
+        [expression], output_field=FloatField()))
+
+
+def _search_fallback(queryset, terms):
+    for term in terms:
+        condition = Q()
+        if term.field in (None, 'path'):
+            condition |= Q(path__icontains=term.text)
+        if term.field in (None, 'error'):
+            condition |= Q(error_message__icontains=term.text)
+        queryset = queryset.filter(condition)
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
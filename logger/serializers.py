@@ -4,7 +4,18 @@ from .models import RequestLog
 
 
 class RequestLogSerializer(serializers.ModelSerializer):
+    # JSON ya da sıkıştırılmış kolondan, hangisi doluysa
+    request_data = serializers.SerializerMethodField()
+    response_data = serializers.SerializerMethodField()
+
     class Meta:
         model = RequestLog
-        fields = ['timestamp', 'path', 'method', 'request_data',
-                  'response_data', 'status_code', 'error_message']
+        fields = ['id', 'timestamp', 'path', 'route', 'view_name', 'method', 'request_data',
+                  'response_data', 'status_code', 'error_message', 'db_query_count',
+                  'db_time', 'db_slowest_query', 'db_slowest_time', 'profile_samples']
+
+    def get_request_data(self, obj):
+        return obj.get_request_data()
+
+    def get_response_data(self, obj):
+        return obj.get_response_data()
@@ -0,0 +1,432 @@
+# logger/sinks.py
+import atexit
+import base64
+import io
+import json
+import os
+import re
+import threading
+import time
+from logging import getLogger
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .buffer import RequestLogBuffer, get_request_log_buffer
+from .models import RequestLog
+
+logger = getLogger("my_logger")
+
+DEFAULT_SINK_SETTINGS = {
+    # 'database', 'ndjson' veya 'redis'
+    'BACKEND': 'database',
+    'NDJSON': {
+        # {pid}: her worker kendi dosyasına yazar, rotation yarışı olmaz
+        'PATH': 'logs/request_logs-{pid}.ndjson',
+        'MAX_BYTES': 64 * 1024 * 1024,
+        # Az trafikli worker'ların satırları da bu kadar saniyede yüklenebilir olur
+        'MAX_AGE': 300,
+        # Bu kadar dosya yüklenmeyi beklerse hata loglanır; dosyalar silinmez
+        'MAX_BACKLOG': 50,
+        'BUFFER_SIZE': 200,
+        'FLUSH_INTERVAL': 1.0,
+    },
+    'REDIS': {
+        'URL': 'redis://localhost:6379/0',
+        'STREAM': 'request_logs',
+        'MAXLEN': 1000000,
+        'BATCH_SIZE': 200,
+        'FLUSH_INTERVAL': 0.5,
+        'MAX_QUEUE_SIZE': 10000,
+    },
+}
+
+
+def get_sink_settings() -> dict:
+    configured = getattr(settings, 'REQUEST_LOG_SINK', {})
+    config = {**DEFAULT_SINK_SETTINGS, **configured}
+    for section in ('NDJSON', 'REDIS'):
+        config[section] = {**DEFAULT_SINK_SETTINGS[section], **configured.get(section, {})}
+    return config
+
+
+# --- Kayıt formatı -----------------------------------------------------------
+
+RECORD_FIELDS = [field for field in RequestLog._meta.concrete_fields if not field.primary_key]
+
+
+def log_to_record(log: RequestLog) -> dict:
+    """RequestLog -> JSON-safe dict (datetimes as ISO 8601, binary as base64)."""
+    record = {}
+    for field in RECORD_FIELDS:
+        value = getattr(log, field.attname)
+        if value is not None:
+            kind = field.get_internal_type()
+            if kind == 'BinaryField':
+                value = base64.b64encode(bytes(value)).decode('ascii')
+            elif kind == 'DateTimeField':
+                value = value.isoformat()
+        record[field.attname] = value
+    return record
+
+
+def record_to_log(record: dict) -> RequestLog:
+    values = {}
+    for field in RECORD_FIELDS:
+        value = record.get(field.attname)
+        if value is not None:
+            kind = field.get_internal_type()
+            if kind == 'BinaryField':
+                value = base64.b64decode(value)
+            elif kind == 'DateTimeField':
+                value = parse_datetime(value)
+        values[field.attname] = value
+    return RequestLog(**values)
+
+
+def dumps_record(log: RequestLog) -> str:
+    return json.dumps(log_to_record(log), cls=DjangoJSONEncoder, ensure_ascii=False,
+                      separators=(',', ':'))
+
+
+def loads_record(line) -> RequestLog:
+    return record_to_log(json.loads(line))
+
+
+# --- Sink'ler -----------------------------------------------------------------
+
+class RequestLogSink:
+    """Where RequestResponseLogMiddleware hands finished RequestLog rows."""
+
+    def write(self, log: RequestLog):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class DatabaseSink(RequestLogSink):
+    """Current behaviour: the in-process buffer, or an inline INSERT without it."""
+
+    def __init__(self, buffer=None):
+        self.buffer = buffer
+
+    def write(self, log):
+        if self.buffer is not None:
+            self.buffer.put(log)
+        else:
+            log.save()
+
+    def flush(self):
+        if self.buffer is not None:
+            self.buffer.flush()
+
+
+class NDJSONFileSink(RequestLogSink):
+    """
+    Appends one JSON record per line. Lines are collected in memory and
+    written once BUFFER_SIZE lines are pending, or by a daemon thread every
+    FLUSH_INTERVAL seconds, so an idle worker holds no line for longer than
+    that. A file is renamed to `<path>.<timestamp>` when it is full, MAX_AGE
+    seconds after it was opened (checked by the same thread) and when the
+    sink is closed, and never touched again, so load_request_logs can pick
+    up rotated files while the worker keeps writing. The active files of
+    workers that died are taken over by the loader.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, max_age=300, max_backlog=50,
+                 buffer_size=200, flush_interval=1.0):
+        self.path_template = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_backlog = max_backlog
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._file = None
+        self._opened_at = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        atexit.register(self.close)
+
+    @property
+    def path(self):
+        return self.path_template.format(pid=os.getpid())
+
+    def write(self, log):
+        self._ensure_started()
+        line = (dumps_record(log) + '\n').encode('utf-8')
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= self.buffer_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            self._flush_locked()
+            if self._file is None:
+                return
+            # Fork'tan kalan ebeveyn dosyası ebeveynindir, sadece kapatılır
+            if self._pid == os.getpid() and self._file.tell():
+                try:
+                    self._rotate()
+                except OSError:
+                    logger.exception("Request log NDJSON rotation failed on close")
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._thread_pid == pid:
+            return
+        with self._start_lock:
+            if self._thread_pid == pid:
+                return
+            # Fork sonrası ebeveynin thread'i bu süreçte yok, yenisi başlatılır
+            self._stopped = threading.Event()
+            self._thread_pid = pid
+            self._thread = threading.Thread(target=self._run, name='request-log-ndjson', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            with self._lock:
+                self._flush_locked()
+                try:
+                    self._rotate_if_old()
+                except OSError:
+                    logger.exception("Request log NDJSON rotation failed")
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        data = b''.join(self._pending)
+        self._pending = []
+
+        try:
+            fileobj = self._open()
+            if fileobj.tell() and fileobj.tell() + len(data) > self.max_bytes:
+                self._rotate()
+                fileobj = self._open()
+            fileobj.write(data)
+            fileobj.flush()
+            self._rotate_if_old()
+        except OSError:
+            logger.exception("Request log NDJSON write failed, %s bytes discarded", len(data))
+
+    def _rotate_if_old(self):
+        if (self.max_age and self._file is not None and self._pid == os.getpid()
+                and self._file.tell() and time.monotonic() - self._opened_at >= self.max_age):
+            self._rotate()
+
+    def _open(self):
+        # Fork sonrası ebeveynin dosyası değil, bu sürecin dosyası
+        if self._file is None or self._pid != os.getpid():
+            path = self.path
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._file = open(path, 'ab')
+            self._opened_at = time.monotonic()
+            self._pid = os.getpid()
+        return self._file
+
+    def _rotate(self):
+        path = self.path
+        self._file.close()
+        self._file = None
+        rotate_file(path)
+
+        backlog = len(rotated_files(path))
+        if self.max_backlog and backlog > self.max_backlog:
+            logger.error("%s rotated request log files of %s are waiting for "
+                         "load_request_logs", backlog, path)
+
+
+def rotate_file(path) -> str:
+    """Renames `path` to `<path>.<timestamp>` and returns the new name."""
+    rotated = f"{path}.{timezone.now().strftime('%Y%m%d%H%M%S%f')}"
+    os.rename(path, rotated)
+    return rotated
+
+
+def worker_files(path_template):
+    """
+    (path, pid) of every worker that has a current or rotated file for a
+    '{pid}' path template; `path` may no longer exist after a clean exit.
+    """
+    directory = os.path.dirname(path_template) or '.'
+    prefix, _, suffix = os.path.basename(path_template).partition('{pid}')
+    pattern = re.compile(re.escape(prefix) + r'(\d+)' + re.escape(suffix) + r'(?:\.\d+)?$')
+    if not os.path.isdir(directory):
+        return []
+    pids = set()
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            pids.add(int(match.group(1)))
+    return [(os.path.join(directory, f"{prefix}{pid}{suffix}"), pid) for pid in sorted(pids)]
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with `pid` exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def rotated_files(path):
+    """Rotated files of `path`, oldest first."""
+    directory = os.path.dirname(path) or '.'
+    prefix = os.path.basename(path) + '.'
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith(prefix) and name[len(prefix):].isdigit())
+
+
+class RedisStreamSink(RequestLogSink):
+    """
+    XADDs records to a Redis stream trimmed with MAXLEN ~. The XADDs are
+    pipelined from a background thread, so the request thread only
+    enqueues.
+    """
+
+    def __init__(self, client=None, url=None, stream='request_logs', maxlen=1000000,
+                 batch_size=200, flush_interval=0.5, max_queue_size=10000):
+        self._client = client
+        self.url = url
+        self.stream = stream
+        self.maxlen = maxlen
+        self.buffer = RequestLogBuffer(
+            max_queue_size=max_queue_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            writer=self.write_batch,
+            name='request-log-redis',
+        )
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def write(self, log):
+        self.buffer.put(log)
+
+    def write_batch(self, logs):
+        pipe = self.client.pipeline(transaction=False)
+        for log in logs:
+            pipe.xadd(self.stream, {'log': dumps_record(log)},
+                      maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+
+    def flush(self):
+        self.buffer.flush()
+
+
+def build_sink(config=None) -> RequestLogSink:
+    config = config or get_sink_settings()
+    backend = config['BACKEND']
+    if backend == 'database':
+        return DatabaseSink(get_request_log_buffer())
+    if backend == 'ndjson':
+        options = config['NDJSON']
+        return NDJSONFileSink(
+            path=options['PATH'],
+            max_bytes=options['MAX_BYTES'],
+            max_age=options['MAX_AGE'],
+            max_backlog=options['MAX_BACKLOG'],
+            buffer_size=options['BUFFER_SIZE'],
+            flush_interval=options['FLUSH_INTERVAL'],
+        )
+    if backend == 'redis':
+        options = config['REDIS']
+        return RedisStreamSink(
+            url=options['URL'],
+            stream=options['STREAM'],
+            maxlen=options['MAXLEN'],
+            batch_size=options['BATCH_SIZE'],
+            flush_interval=options['FLUSH_INTERVAL'],
+            max_queue_size=options['MAX_QUEUE_SIZE'],
+        )
+    raise ValueError(f"Unknown request log sink: {backend}")
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_request_log_sink() -> RequestLogSink:
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = build_sink()
+    return _sink
+
+
+# --- Toplu yükleme ------------------------------------------------------------
+
+def _copy_text(value, field):
+    """One value in Postgres COPY text format."""
+    if value is None:
+        return '\\N'
+    kind = field.get_internal_type()
+    if kind == 'BinaryField':
+        text = '\\x' + bytes(value).hex()
+    elif kind == 'JSONField':
+        text = json.dumps(value, cls=field.encoder or DjangoJSONEncoder, ensure_ascii=False)
+    elif kind == 'DateTimeField':
+        text = value.isoformat()
+    else:
+        text = str(value)
+    return (text.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def bulk_load(logs, using='default') -> int:
+    """
+    Inserts RequestLog rows with COPY FROM STDIN on Postgres (ids come from
+    the table's sequence) and bulk_create elsewhere.
+    """
+    if not logs:
+        return 0
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        RequestLog.objects.using(using).bulk_create(logs, batch_size=1000)
+        return len(logs)
+
+    data = io.StringIO()
+    for log in logs:
+        data.write('\t'.join(_copy_text(getattr(log, field.attname), field)
+                             for field in RECORD_FIELDS))
+        data.write('\n')
+    data.seek(0)
+
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in RECORD_FIELDS)
+    table = connection.ops.quote_name(RequestLog._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", data)
+    return len(logs)
@@ -0,0 +1,70 @@
+# logger/sketch.py
+import math
+
+
+class LatencySketch:
+    """
+    Mergeable latency histogram with logarithmic buckets (DDSketch style).
+
+    Every value lands in bucket ceil(log_gamma(value)), so quantiles come back
+    within RELATIVE_ACCURACY of the real value and two sketches merge by
+    adding their bucket counts. That is what lets minute rollups be combined
+    into hours and days without keeping raw durations.
+    """
+
+    RELATIVE_ACCURACY = 0.01
+    MIN_VALUE = 1e-6
+
+    gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    log_gamma = math.log(gamma)
+
+    def __init__(self, buckets=None, zero_count=0):
+        self.buckets = dict(buckets or {})
+        self.zero_count = zero_count
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1):
+        if value <= self.MIN_VALUE:
+            self.zero_count += count
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def merge(self, other: 'LatencySketch') -> 'LatencySketch':
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q: float):
+        total = self.count
+        if total == 0:
+            return None
+
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            'zero': self.zero_count,
+            'buckets': {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> 'LatencySketch':
+        if not data:
+            return cls()
+        return cls(
+            buckets={int(index): count for index, count in data.get('buckets', {}).items()},
+            zero_count=data.get('zero', 0),
+        )
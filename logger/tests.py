@@ -1,3 +1,425 @@
-from django.test import TestCase
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import CustomUser
+
+from .buffer import RequestLogBuffer
+from .capture import BodyCapturePolicy
+from .api import RequestLogStatsAPI
+from .models import RequestLog, RequestLogLoadedFile, RequestLogRollup
+from .rollups import run_rollups
+from .search import parse_query, search_request_logs
+from .sinks import (RECORD_FIELDS, NDJSONFileSink, RedisStreamSink, _copy_text, bulk_load,
+                    dumps_record, loads_record, rotated_files)
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def make_log(index=0, **values):
+    log = RequestLog(
+        timestamp=timezone.now() - timedelta(seconds=index),
+        path=f'/order/{index}/',
+        route='/order/<int:pk>/',
+        view_name='order-detail',
+        method='GET',
+        status_code=200,
+        duration=0.125,
+        ip_address='10.0.0.1',
+        user_agent='tests\tagent\n',
+        db_query_count=3,
+        db_time=0.01,
+        profile=b'\x00\x01zlib\\',
+        profile_samples=2,
+    )
+    log.set_payloads({'note': 'line\nbreak\t\\', 'index': index}, {'status': 'OK'},
+                     compress=index % 2 == 1)
+    for name, value in values.items():
+        setattr(log, name, value)
+    return log
+
+
+class RequestLogLoadTestMixin:
+    def assertLoaded(self, logs):
+        stored = {log.path: log for log in RequestLog.objects.all()}
+        self.assertEqual(sorted(stored), sorted(log.path for log in logs))
+        for log in logs:
+            row = stored[log.path]
+            for field in RECORD_FIELDS:
+                expected = getattr(log, field.attname)
+                actual = getattr(row, field.attname)
+                if field.get_internal_type() == 'BinaryField' and actual is not None:
+                    actual = bytes(actual)
+                self.assertEqual(actual, expected, field.attname)
+
+
+class RecordFormatTests(TestCase):
+    def test_dumps_loads_round_trip(self):
+        log = make_log(1)
+        loaded = loads_record(dumps_record(log))
+        for field in RECORD_FIELDS:
+            self.assertEqual(getattr(loaded, field.attname), getattr(log, field.attname), field.attname)
+
+    def test_copy_text_escapes_copy_specials(self):
+        field = RequestLog._meta.get_field('user_agent')
+        self.assertEqual(_copy_text(None, field), '\\N')
+        self.assertEqual(_copy_text('a\tb\nc\\d\re', field), 'a\\tb\\nc\\\\d\\re')
+        self.assertEqual(_copy_text(b'\x01\xff', RequestLog._meta.get_field('profile')), '\\\\x01ff')
+
+
+class BodyCaptureTests(TestCase):
+    def capture(self, body, content_type='application/json', max_body_bytes=64):
+        request = RequestFactory().post('/auth/login/', body, content_type=content_type)
+        policy = BodyCapturePolicy(max_body_bytes=max_body_bytes)
+        return policy.capture_request(request, policy.read_request_body(request))
+
+    def test_parses_json(self):
+        self.assertEqual(self.capture('{"email": "a@b.c"}'), {'email': 'a@b.c'})
+
+    def test_unparsable_request_body_keeps_only_size_and_type(self):
+        body = '{"email": "a@b.c", "password": "hunter2"'
+        self.assertEqual(self.capture(body), {'_truncated': True, '_size': len(body),
+                                              '_content_type': 'application/json'})
+
+    def test_oversized_request_body_keeps_only_size_and_type(self):
+        body = '{"password": "%s"}' % ('x' * 100)
+        captured = self.capture(body)
+        self.assertEqual(captured['_size'], len(body))
+        self.assertNotIn('xxx', str(captured))
+
+
+class RequestLogSearchTests(TestCase):
+    def setUp(self):
+        rows = [
+            ('/order/12/', 200, None),
+            ('/order/13/', 500, 'ConnectionRefusedError: connection refused by upstream'),
+            ('/invoice/7/', 502, 'Timeout while reading invoice'),
+            ('/user/profile/', 404, None),
+        ]
+        RequestLog.objects.bulk_create(
+            [make_log(index, path=path, status_code=status_code, error_message=error)
+             for index, (path, status_code, error) in enumerate(rows)])
+
+    def search(self, text):
+        return sorted(search_request_logs(RequestLog.objects.all(), text).values_list('path', flat=True))
+
+    def test_parse_query(self):
+        parsed = parse_query('path:/order/ "connection refused" Time* status:5xx')
+        self.assertEqual([(term.field, term.text, term.phrase, term.prefix) for term in parsed.terms],
+                         [('path', '/order/', False, False), (None, 'connection refused', True, False),
+                          (None, 'Time', False, True)])
+        self.assertEqual((parsed.status_min, parsed.status_max), (500, 599))
+
+    def test_words_phrases_and_prefixes(self):
+        self.assertEqual(self.search('order'), ['/order/12/', '/order/13/'])
+        self.assertEqual(self.search('"connection refused"'), ['/order/13/'])
+        self.assertEqual(self.search('Time*'), ['/invoice/7/'])
+        self.assertEqual(self.search('error:invoice'), ['/invoice/7/'])
+
+    def test_status_ranges(self):
+        self.assertEqual(self.search('status:5xx'), ['/invoice/7/', '/order/13/'])
+        self.assertEqual(self.search('status:>=404'), ['/invoice/7/', '/order/13/', '/user/profile/'])
+        self.assertEqual(self.search('order status:500'), ['/order/13/'])
+
+    def test_index_follows_updates_and_deletes(self):
+        RequestLog.objects.filter(path='/user/profile/').update(error_message='profile timeout')
+        self.assertEqual(self.search('timeout'), ['/invoice/7/', '/user/profile/'])
+        RequestLog.objects.filter(path='/invoice/7/').delete()
+        self.assertEqual(self.search('timeout'), ['/user/profile/'])
+
+
+class RequestLogCursorPaginationTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        # Aynı timestamp'li satırlar id ile ayrışmalı
+        self.logs = RequestLog.objects.bulk_create(
+            [make_log(index, timestamp=now - timedelta(seconds=index // 3)) for index in range(10)])
+        self.expected = [log.id for log in sorted(self.logs, key=lambda log: (log.timestamp, log.id),
+                                                  reverse=True)]
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        return response, response.json()
+
+    def test_pages_through_every_row_once(self):
+        _, body = self.get('/logger/logs/', pagination='cursor', page_size=3)
+        seen = [row['id'] for row in body['data']]
+        self.assertIsNone(body['options']['count'])
+        while body['options']['next']:
+            _, body = self.get(body['options']['next'])
+            seen.extend(row['id'] for row in body['data'])
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link_returns_the_previous_page(self):
+        _, first = self.get('/logger/logs/', pagination='cursor', page_size=4)
+        _, second = self.get(first['options']['next'])
+        _, back = self.get(second['options']['previous'])
+        self.assertEqual([row['id'] for row in back['data']], self.expected[:4])
+        self.assertIsNone(back['options']['previous'])
+
+    def test_ascending_ordering_and_exact_count(self):
+        _, body = self.get('/logger/logs/', pagination='cursor', page_size=20,
+                           ordering='timestamp', count='exact')
+        self.assertEqual([row['id'] for row in body['data']], self.expected[::-1])
+        self.assertEqual(body['options']['count'], 10)
+
+    def test_rejects_tampered_cursor(self):
+        response, _ = self.get('/logger/logs/', cursor='not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+
+class RequestLogStatsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create(email='stats@example.com'))
+
+    def test_rejects_unparsable_dates(self):
+        for params in ({'start': 'yesterday'}, {'end': '2026-13-01T00:00'}):
+            response = self.client.get('/logger/stats/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_schema_is_attached_to_get(self):
+        self.assertTrue(hasattr(RequestLogStatsAPI.get, '_swagger_auto_schema'))
+
+    def test_late_rows_are_rolled_up(self):
+        run_rollups()
+        RequestLog.objects.bulk_create([make_log(0), make_log(1)])
+        run_rollups()
+        run_rollups()
+        # Geç yazılmış, eski timestamp'li satır
+        RequestLog.objects.bulk_create([make_log(3600)])
+        run_rollups()
+        run_rollups()
+        for granularity in ('minute', 'hour', 'day'):
+            counts = (RequestLogRollup.objects.filter(granularity=granularity)
+                      .values_list('request_count', flat=True))
+            self.assertEqual(sum(counts), 3, granularity)
+
+
+class NDJSONSinkTests(RequestLogLoadTestMixin, TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.template = os.path.join(self.directory, 'request_logs-{pid}.ndjson')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def load(self, *args):
+        with override_settings(REQUEST_LOG_SINK={'NDJSON': {'PATH': self.template}}):
+            call_command('load_request_logs', 'ndjson', *args, stdout=open(os.devnull, 'w'))
+
+    def test_rotate_and_load_round_trip(self):
+        sink = NDJSONFileSink(self.template, max_bytes=600, max_age=0, buffer_size=1)
+        logs = [make_log(index) for index in range(6)]
+        for log in logs:
+            sink.write(log)
+        sink.close()
+
+        active = self.template.format(pid=os.getpid())
+        self.assertGreater(len(rotated_files(active)), 1)
+        self.load()
+        self.assertLoaded(logs)
+        self.assertEqual(rotated_files(active), [])
+
+    def test_rotates_on_age(self):
+        sink = NDJSONFileSink(self.template, max_age=0.01, buffer_size=1)
+        self.addCleanup(sink.close)
+        sink.write(make_log(0))
+        time.sleep(0.02)
+        sink.write(make_log(1))
+        self.assertEqual(len(rotated_files(sink.path)), 1)
+
+    def test_takes_over_files_of_dead_workers(self):
+        process = subprocess.Popen(['true'])
+        process.wait()
+        logs = [make_log(index) for index in range(3)]
+        with open(self.template.format(pid=process.pid), 'w') as fileobj:
+            fileobj.writelines(dumps_record(log) + '\n' for log in logs)
+        # Çalışan bir worker'ın dosyasına dokunulmamalı
+        alive = self.template.format(pid=os.getpid())
+        with open(alive, 'w') as fileobj:
+            fileobj.write(dumps_record(make_log(9)) + '\n')
+
+        self.load()
+        self.assertLoaded(logs)
+        self.assertTrue(os.path.exists(alive))
+        self.assertFalse(os.path.exists(self.template.format(pid=process.pid)))
+
+    def test_idle_sink_flushes_and_rotates_in_background(self):
+        sink = NDJSONFileSink(self.template, max_age=0.05, buffer_size=100, flush_interval=0.02)
+        self.addCleanup(sink.close)
+        logs = [make_log(index) for index in range(5)]
+        for log in logs:
+            sink.write(log)
+        time.sleep(0.3)
+        self.assertEqual(sink._pending, [])
+        self.assertEqual(len(rotated_files(sink.path)), 1)
+        self.load()
+        self.assertLoaded(logs)
+
+    def test_reloading_a_partly_loaded_file_skips_loaded_lines(self):
+        logs = [make_log(index) for index in range(5)]
+        path = os.path.join(self.directory, 'partial.ndjson')
+        with open(path, 'w') as fileobj:
+            fileobj.writelines(dumps_record(log) + '\n' for log in logs)
+        # İlk yükleme ikinci batch'te ölsün
+        calls = []
+
+        def crashing_bulk_load(batch):
+            calls.append(batch)
+            if len(calls) > 1:
+                raise RuntimeError('killed')
+            return bulk_load(batch)
+
+        with mock.patch('logger.management.commands.load_request_logs.bulk_load',
+                        crashing_bulk_load):
+            with self.assertRaises(RuntimeError):
+                self.load('--path', path, '--batch-size', '2')
+        self.assertEqual(RequestLog.objects.count(), 2)
+
+        self.load('--path', path, '--batch-size', '2')
+        self.assertLoaded(logs)
+        self.assertFalse(RequestLogLoadedFile.objects.exists())
+
+    def test_rotation_keeps_unloaded_files(self):
+        sink = NDJSONFileSink(self.template, max_bytes=1, max_age=0, max_backlog=1, buffer_size=1)
+        with self.assertLogs('my_logger', 'ERROR'):
+            for index in range(4):
+                sink.write(make_log(index))
+            sink.close()
+        self.assertEqual(len(rotated_files(sink.path)), 4)
+
+
+@skipIf(fakeredis is None, "fakeredis is not installed")
+class RedisStreamTests(RequestLogLoadTestMixin, TestCase):
+    stream = 'request_logs'
+    group = 'request-log-loader'
+
+    def setUp(self):
+        self.client = fakeredis.FakeRedis()
+        patcher = mock.patch('redis.Redis.from_url', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def load(self, *args):
+        call_command('load_request_logs', 'redis', *args, stdout=open(os.devnull, 'w'),
+                     stderr=open(os.devnull, 'w'))
+
+    def write(self, logs):
+        sink = RedisStreamSink(client=self.client, stream=self.stream)
+        for log in logs:
+            sink.write(log)
+        sink.buffer.stop()
+
+    def test_xadd_xreadgroup_xack(self):
+        logs = [make_log(index) for index in range(5)]
+        self.write(logs)
+        self.assertEqual(self.client.xlen(self.stream), 5)
+
+        self.load()
+        self.assertLoaded(logs)
+        self.assertEqual(self.client.xpending(self.stream, self.group)['pending'], 0)
+
+        # Ack'lenen girdiler ikinci kez yüklenmez
+        self.load()
+        self.assertEqual(RequestLog.objects.count(), 5)
+
+    def test_claims_entries_of_crashed_consumers(self):
+        logs = [make_log(index) for index in range(4)]
+        self.write(logs)
+        self.client.xgroup_create(self.stream, self.group, id='0')
+        self.client.xreadgroup(self.group, 'crashed', {self.stream: '>'}, count=3)
+        time.sleep(0.02)
+
+        self.load('--claim-idle', '10')
+        self.assertLoaded(logs)
+        self.assertEqual(self.client.xpending(self.stream, self.group)['pending'], 0)
+
+
+class RequestLogBufferTests(TestCase):
+    def make_buffer(self, **options):
+        buffer = RequestLogBuffer(flush_interval=60, **options)
+        # Yazma thread'i başlatılmaz, flush testte elle çağrılır
+        buffer._ensure_started = lambda: None
+        return buffer
+
+    def test_flush_writes_queued_rows_in_batches(self):
+        batches = []
+        buffer = self.make_buffer(batch_size=2, writer=batches.append)
+        for index in range(5):
+            self.assertTrue(buffer.put(make_log(index)))
+        self.assertEqual(buffer.flush(), 5)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(buffer.stats()['flushed'], 5)
+
+    def test_flush_bulk_creates_by_default(self):
+        buffer = self.make_buffer()
+        logs = [make_log(index) for index in range(3)]
+        for log in logs:
+            buffer.put(log)
+        # Yazma thread'inin bağlantı temizliği test transaction'ının bağlantısını kapatmasın
+        with mock.patch('logger.buffer.close_old_connections'):
+            buffer.flush()
+        self.assertEqual(RequestLog.objects.count(), 3)
+
+    def test_overflow_policies(self):
+        for policy, kept in (('drop_newest', [0, 1]), ('drop_oldest', [2, 3])):
+            written = []
+            buffer = self.make_buffer(max_queue_size=2, overflow_policy=policy,
+                                      writer=lambda rows: written.extend(rows))
+            with self.assertLogs('my_logger', 'WARNING'):
+                for index in range(4):
+                    buffer.put(make_log(index, path=str(index)))
+            buffer.flush()
+            self.assertEqual([int(log.path) for log in written], kept, policy)
+            self.assertEqual(buffer.stats()['dropped'], 2, policy)
+
+    def test_bad_row_does_not_discard_its_batch(self):
+        written = []
+
+        def writer(rows):
+            if any(log.path == 'bad' for log in rows):
+                raise ValueError('bad row')
+            written.extend(rows)
+
+        buffer = self.make_buffer(writer=writer)
+        for index in range(4):
+            buffer.put(make_log(index, path='bad' if index == 1 else str(index)))
+        with self.assertLogs('my_logger', 'WARNING'):
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual([log.path for log in written], ['0', '2', '3'])
+        self.assertEqual(buffer.stats()['failed'], 1)
+
+    def test_registers_atexit_once_across_forks(self):
+        buffer = RequestLogBuffer(writer=lambda rows: None)
+        self.addCleanup(buffer.stop, 1)
+        with mock.patch('logger.buffer.atexit.register') as register, \
+                mock.patch('logger.buffer.os.getpid', side_effect=[100, 100, 200, 200, 300, 300]):
+            for _ in range(3):
+                buffer._ensure_started()
+        register.assert_called_once_with(buffer.stop)
+
+
+class BulkLoadTests(RequestLogLoadTestMixin, TestCase):
+    def test_bulk_load(self):
+        logs = [make_log(index) for index in range(4)]
+        self.assertEqual(bulk_load(logs), 4)
+        self.assertLoaded(logs)
+
+    @skipUnless(connection.vendor == 'postgresql', "COPY needs Postgres")
+    def test_copy_uses_the_sequence(self):
+        bulk_load([make_log(0)])
+        bulk_load([make_log(1)])
+        ids = list(RequestLog.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(len(set(ids)), 2)
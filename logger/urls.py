@@ -1,8 +1,12 @@
 from django.urls import path
 
-from .api import RequestLogAPI, RequestLogDetailAPI
+from .api import (RequestLogAPI, RequestLogDetailAPI, RequestLogExportAPI,
+                  RequestLogProfileAPI, RequestLogStatsAPI)
 
 urlpatterns = [
     path("logs/", RequestLogAPI.as_view()),
     path("logs/<int:log_id>/", RequestLogDetailAPI.as_view()),
-]
\ No newline at end of file
+    path("logs/<int:log_id>/profile/", RequestLogProfileAPI.as_view()),
+    path("logs/export/<str:file_format>/", RequestLogExportAPI.as_view()),
+    path("stats/", RequestLogStatsAPI.as_view()),
+]
@@ -1,9 +1,13 @@
 import os
+from datetime import datetime
 from logging import getLogger
 
-import firebase_admin.messaging as fbm
 from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
 from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
 from dotenv import load_dotenv
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
@@ -16,26 +20,86 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from authentication.models import CustomUser
+from utils.pagination import InvalidCursor, KeysetPagination
 from utils.utils import CustomErrorResponse, CustomSuccessResponse
 
-from .models import Notification
-from .serializers import NotificationSerializer
+from .broadcasts import broadcast_devices
+from .counters import adjust_unread, get_unread_count
+from .fanout import fan_out
+from .models import Notification, NotificationBroadcast
+from .realtime import push_notifications
+from .retention import archived_months, archived_notifications
+from .serializers import (MAX_BULK_IDS, NotificationBroadcastSerializer,
+                          NotificationBulkSelectionSerializer, NotificationSerializer)
+from .topics import all_topic, language_topic
+from .transport import get_notification_transport
 
 logger = getLogger("my_logger")
 
 
+class NotificationInboxPagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
+    default_ordering = '-created_at'
+    ordering_fields = ('created_at',)
+
+
+BROADCAST_MODES = ['devices', 'topic']
+
+
+def save_to_inbox(user, title, message):
+    with transaction.atomic():
+        notification = Notification.objects.create(user=user, title=title, message=message)
+        adjust_unread({user.id: 1})
+        push_notifications([notification])
+    return notification
+
+
+def has_valid_api_key(request):
+    x_api_key = request.headers.get("x-api-key")
+    expected_api_key = getattr(settings, "X_API_KEY", None)
+    return bool(x_api_key) and x_api_key == expected_api_key
+
+
 class NotificationListCreate(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
     @swagger_auto_schema(
-        operation_description="Get the list of notifications for the authenticated user",
-        responses={200: NotificationSerializer(many=True)}
+        operation_description=(
+            "Get the authenticated user's notifications, newest first, one page at a time. "
+            "The cursor of the next page is returned in the X-Next-Cursor header (and as a "
+            "Link: rel=\"next\" URL); there is no next page when the header is missing."),
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Cursor from a previous X-Next-Cursor header'),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='Notifications per page (default 50, max 200)'),
+            openapi.Parameter('is_read', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                              description='Only read (true) or unread (false) notifications'),
+        ],
+        responses={200: NotificationSerializer(many=True), 400: "Invalid cursor"}
     )
     def get(self, request, format=None):
         notifications = Notification.objects.filter(user=request.user)
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        is_read = request.query_params.get('is_read')
+        if is_read is not None:
+            notifications = notifications.filter(is_read=is_read.lower() in ('1', 'true', 'yes'))
+
+        paginator = NotificationInboxPagination()
+        try:
+            page = paginator.paginate_queryset(notifications, request)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Gövde eskisi gibi liste; sayfalama bilgisi header'larda
+        serializer = NotificationSerializer(page, many=True)
+        response = Response(serializer.data)
+        next_cursor = paginator.get_next_cursor()
+        if next_cursor:
+            response['X-Next-Cursor'] = next_cursor
+            response['Link'] = f'<{paginator.get_next_link()}>; rel="next"'
+        return response
 
     @swagger_auto_schema(
         operation_description="Create a new notification",
@@ -45,7 +109,11 @@ class NotificationListCreate(APIView):
     def post(self, request, format=None):
         serializer = NotificationSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            with transaction.atomic():
+                notification = serializer.save(user=request.user)
+                if not notification.is_read:
+                    adjust_unread({request.user.id: 1})
+                push_notifications([notification])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -54,6 +122,9 @@ class NotificationDetail(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
+    def get_object(self, pk, user):
+        return Notification.objects.filter(pk=pk, user=user).first()
+
     @swagger_auto_schema(
         operation_description="Get a specific notification by its ID",
         responses={200: NotificationSerializer, 404: "Notification not found"}
@@ -75,9 +146,13 @@ class NotificationDetail(APIView):
         notification = self.get_object(pk, request.user)
         if notification is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
+        was_read = notification.is_read
         serializer = NotificationSerializer(notification, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                notification = serializer.save()
+                if notification.is_read != was_read:
+                    adjust_unread({request.user.id: 1 if was_read else -1})
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -89,10 +164,30 @@ class NotificationDetail(APIView):
         notification = self.get_object(pk, request.user)
         if notification is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        notification.delete()
+        with transaction.atomic():
+            notification.delete()
+            if not notification.is_read:
+                adjust_unread({request.user.id: -1})
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class NotificationUnreadCount(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @swagger_auto_schema(
+        operation_description="Unread notification count for the app badge (served from the counter, not the notification list)",
+        responses={200: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'unread_count': openapi.Schema(type=openapi.TYPE_INTEGER),
+            }
+        )}
+    )
+    def get(self, request, format=None):
+        return Response({'unread_count': get_unread_count(request.user.id)})
+
+
 class NotificationRead(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
@@ -110,15 +205,149 @@ class NotificationRead(APIView):
     )
     def post(self, request, format=None):
         notification_id = request.data.get('id')
+        notifications = Notification.objects.filter(id=notification_id, user=request.user)
+        with transaction.atomic():
+            # Sadece okunmamışsa güncellenir, sayaç bir kez düşer
+            if notifications.filter(is_read=False).update(is_read=True):
+                adjust_unread({request.user.id: -1})
+            elif not notifications.exists():
+                return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response({'status': 'Notification marked as read'}, status=status.HTTP_200_OK)
+
+
+BULK_SELECTION_SCHEMA = {
+    'all': openapi.Schema(type=openapi.TYPE_BOOLEAN, description='Every notification of the user'),
+    'ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                          description=f'Notification IDs (at most {MAX_BULK_IDS})'),
+    'before_id': openapi.Schema(type=openapi.TYPE_INTEGER,
+                                description='This notification and every older one'),
+    'before': openapi.Schema(type=openapi.TYPE_STRING,
+                             description='Inbox cursor (X-Next-Cursor): that row and every older one'),
+}
+
+
+def delete_notifications(notifications):
+    """
+    Deletes `notifications` with a single DELETE ... RETURNING, so the
+    unread count comes from the rows actually removed. Notification has no
+    cascades or delete signals to run. Returns (deleted, unread deleted).
+    """
+    ids_sql, params = notifications.values('id').query.sql_with_params()
+    table = connection.ops.quote_name(Notification._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({ids_sql}) RETURNING is_read", params)
+        deleted = [is_read for is_read, in cursor.fetchall()]
+    return len(deleted), sum(1 for is_read in deleted if not is_read)
+
+
+def bulk_selection(request):
+    """
+    The caller's notifications picked by exactly one of `all`, `ids`,
+    `before_id` or `before` (inbox order is (created_at, id) descending, so
+    "before" means that row and everything older). Returns (queryset, error).
+    """
+    serializer = NotificationBulkSelectionSerializer(data=request.data)
+    if not serializer.is_valid():
+        errors = serializer.errors
+        field = next(iter(errors))
+        message = errors[field][0] if isinstance(errors[field], list) else errors[field]
+        return None, message if field == 'non_field_errors' else f"{field}: {message}"
+    data = serializer.validated_data
+
+    notifications = Notification.objects.filter(user=request.user)
+    selector = next(iter(data))
+    if selector == 'all':
+        return notifications, None
+
+    if selector == 'ids':
+        return notifications.filter(id__in=data['ids']), None
+
+    if selector == 'before_id':
+        position = notifications.filter(id=data['before_id']).values_list('created_at', 'id').first()
+        if position is None:
+            return None, "before_id is not one of your notifications"
+    else:
         try:
-            notification = Notification.objects.get(
-                id=notification_id, user=request.user)
-        except Notification.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
+            position = NotificationInboxPagination().cursor_position(notifications, data['before'])
+        except InvalidCursor as e:
+            return None, str(e)
+    created_at, notification_id = position
+    return notifications.filter(Q(created_at__lt=created_at)
+                                | Q(created_at=created_at, id__lte=notification_id)), None
 
-        notification.is_read = True
-        notification.save()
-        return Response({'status': 'Notification marked as read'}, status=status.HTTP_200_OK)
+
+class NotificationBulkRead(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @swagger_auto_schema(
+        operation_description="Mark many notifications as read with a single UPDATE",
+        request_body=openapi.Schema(type=openapi.TYPE_OBJECT, properties=BULK_SELECTION_SCHEMA),
+        responses={200: "Number of notifications marked as read and the new unread count",
+                   400: "Invalid selection"}
+    )
+    def post(self, request, format=None):
+        notifications, error = bulk_selection(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            updated = notifications.filter(is_read=False).update(is_read=True)
+            adjust_unread({request.user.id: -updated})
+        return Response({'updated': updated, 'unread_count': get_unread_count(request.user.id)},
+                        status=status.HTTP_200_OK)
+
+
+class NotificationBulkDelete(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @swagger_auto_schema(
+        operation_description="Delete many notifications at once",
+        request_body=openapi.Schema(type=openapi.TYPE_OBJECT, properties=BULK_SELECTION_SCHEMA),
+        responses={200: "Number of deleted notifications and the new unread count",
+                   400: "Invalid selection"}
+    )
+    def post(self, request, format=None):
+        notifications, error = bulk_selection(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            deleted, unread_deleted = delete_notifications(notifications)
+            adjust_unread({request.user.id: -unread_deleted})
+        return Response({'deleted': deleted,
+                         'unread_count': get_unread_count(request.user.id)},
+                        status=status.HTTP_200_OK)
+
+
+class NotificationArchiveList(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Notifications removed from the inbox by the retention job. Without `month` "
+            "returns the archived months and their notification counts; with `month` "
+            "(YYYY-MM) returns that month's notifications, oldest first."),
+        manual_parameters=[
+            openapi.Parameter('month', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Archived month, e.g. 2024-01'),
+        ],
+        responses={200: "Archived months or notifications", 400: "Invalid month"}
+    )
+    def get(self, request, format=None):
+        month = request.query_params.get('month')
+        if month is None:
+            months = archived_months(request.user)
+            return Response([{'month': f'{archive_month:%Y-%m}', 'notification_count': count}
+                             for archive_month, count in months])
+        try:
+            month = datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            return Response({'error': "month must be in YYYY-MM format"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(archived_notifications(request.user, month))
 
 
 class SendNotificationAPI(APIView):
@@ -147,55 +376,28 @@ class SendNotificationAPI(APIView):
         if not message_body:
             return CustomErrorResponse(msj={"error": "Message body is required"}, status_code=status.HTTP_400_BAD_REQUEST)
 
-        if not hasattr(settings, 'FIREBASE_APP') or settings.FIREBASE_APP is None:
-            Notification.objects.create(
-                user=user,
-                title=title,
-                message=message_body
-            )
+        transport = get_notification_transport()
+        if not transport.available:
+            save_to_inbox(user, title, message_body)
             logger.warning(
                 "Firebase yapılandırması bulunamadı. Bildirim sadece veritabanına kaydedildi.")
             return CustomSuccessResponse(input_data={"warning": "Notification saved to database but not sent to devices due to Firebase configuration issue"}, status_code=status.HTTP_200_OK)
 
-        devices = FCMDevice.objects.filter(user=user)
+        devices = list(FCMDevice.objects.filter(user=user, active=True)
+                       .values_list('id', 'registration_id', 'user_id'))
 
-        if not devices.exists():
-            Notification.objects.create(
-                user=user,
-                title=title,
-                message=message_body
-            )
+        if not devices:
+            save_to_inbox(user, title, message_body)
             return CustomSuccessResponse(input_data={"warning": "No devices registered for this user. Notification saved to database."}, status_code=status.HTTP_200_OK)
 
-        success_count = 0
-        error_messages = []
-
-        for device in devices:
-            try:
-                message = fbm.Message(
-                    notification=fbm.Notification(
-                        title=title, body=message_body),
-                    token=device.registration_id)
-
-                response = fbm.send(message)
-                logger.warning(response)
-                success_count += 1
-
-                Notification.objects.create(
-                    user=user,
-                    title=title,
-                    message=message_body
-                )
+        result = fan_out(devices, title, message_body, transport=transport)
+        response_data = result.as_dict()
 
-            except Exception as e:
-                logger.error(
-                    f"Failed to send message to device {device.registration_id}: {str(e)}")
-                error_messages.append(str(e))
-
-        if success_count > 0:
-            return CustomSuccessResponse(input_data={"success": f"Successfully sent to {success_count} devices"}, status_code=status.HTTP_200_OK)
-        elif error_messages:
-            return CustomErrorResponse(msj={"error": f"Failed to send message: {error_messages}"}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if result.success_count > 0:
+            response_data["success"] = f"Successfully sent to {result.success_count} devices"
+            return CustomSuccessResponse(input_data=response_data, status_code=status.HTTP_200_OK)
+        elif result.failure_count:
+            return CustomErrorResponse(msj={"error": "Failed to send message", "details": response_data}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
         else:
             return CustomErrorResponse(msj={"error": "No messages were sent"}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -205,26 +407,36 @@ class SendGeneralNotificationAPI(APIView):
     authentication_classes = [JWTAuthentication]
 
     @swagger_auto_schema(
-        operation_description="Send general notification to all registered devices",
+        operation_description=(
+            "Queue a general notification to all registered devices; progress is served by the "
+            "status endpoint. In 'topic' mode the message is published to the `all` (or "
+            "`lang_<language>`) FCM topic with a single call and only the inbox rows are queued. "
+            "Topic mode only reaches devices subscribed to the topics: devices registered before "
+            "topics were enabled are subscribed by running `manage.py sync_notification_topics` "
+            "once after deploying."),
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
                 'title': openapi.Schema(type=openapi.TYPE_STRING, description='Notification title'),
                 'message': openapi.Schema(type=openapi.TYPE_STRING, description='Notification message'),
+                'mode': openapi.Schema(type=openapi.TYPE_STRING, enum=BROADCAST_MODES,
+                                       description="'devices' (default) or 'topic'"),
+                'language': openapi.Schema(type=openapi.TYPE_STRING,
+                                           description="Only users with this app_lang"),
             },
             required=['message']
         ),
         responses={
-            200: "Notification sent successfully",
+            202: NotificationBroadcastSerializer,
             400: "Message body is required",
             403: "Invalid or missing API key",
-            500: "Failed to send message"
+            404: "No devices found",
+            502: "Topic publish failed",
+            503: "Firebase configuration not available"
         }
     )
     def post(self, request):
-        x_api_key = request.headers.get("x-api-key")
-        expected_api_key = getattr(settings, "X_API_KEY", None)
-        if not x_api_key or x_api_key != expected_api_key:
+        if not has_valid_api_key(request):
             return CustomErrorResponse(
                 msj={"error": "Invalid or missing API key"},
                 status_code=status.HTTP_403_FORBIDDEN
@@ -233,14 +445,22 @@ class SendGeneralNotificationAPI(APIView):
         request_data = request.data
         title = request_data.get("title", "Gönder Gelsin")
         message_body = request_data.get("message")
+        mode = request_data.get("mode", "devices")
+        language = request_data.get("language") or None
 
         if not message_body:
             return CustomErrorResponse(
                 msj={"error": "Message body is required"},
                 status_code=status.HTTP_400_BAD_REQUEST
             )
+        if mode not in BROADCAST_MODES:
+            return CustomErrorResponse(
+                msj={"error": f"mode must be one of {BROADCAST_MODES}"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-        if not hasattr(settings, 'FIREBASE_APP') or settings.FIREBASE_APP is None:
+        transport = get_notification_transport()
+        if not transport.available:
             logger.warning(
                 "Firebase yapılandırması bulunamadı. Genel bildirim gönderilemedi.")
             return CustomErrorResponse(
@@ -249,56 +469,76 @@ class SendGeneralNotificationAPI(APIView):
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE
             )
 
-        devices = FCMDevice.objects.all()
-
-        if not devices.exists():
+        broadcast = NotificationBroadcast(
+            title=title,
+            message=message_body,
+            language=language,
+            created_by=request.user
+        )
+        if not broadcast_devices(broadcast).exists():
             return CustomErrorResponse(
                 msj={"error": "No devices found in the system."},
                 status_code=status.HTTP_404_NOT_FOUND
             )
 
-        sended_notification_count = 0
-        error_count = 0
+        # Cihaz modunda gönderim isteğin içinde değil, run_notification_broadcasts
+        # worker'ında checkpoint'li chunk'lar halinde yapılır. Kayıt yayından
+        # önce yazılır: FCM'e giden her mesajın bir satırı olsun
+        if mode == "topic":
+            broadcast.topic = language_topic(language) if language else all_topic()
+        broadcast.save()
 
-        for device in devices:
+        if mode == "topic":
+            # Tek FCM çağrısı; message_id yazılana kadar worker işi almaz
             try:
-                if not device.registration_id:
-                    continue
-
-                message = fbm.Message(
-                    notification=fbm.Notification(
-                        title=title, body=message_body
-                    ),
-                    token=device.registration_id
-                )
-                response = fbm.send(message)
-                logger.warning(f"Device: {device.registration_id}, Response: {response}")
-                sended_notification_count += 1
-
-                if device.user:
-                    Notification.objects.create(
-                        user=device.user,
-                        title=title,
-                        message=message_body
-                    )
+                broadcast.message_id = transport.send_to_topic(broadcast.topic, title, message_body)
             except Exception as e:
-                error_count += 1
-                logger.error(f"Failed to send message to device {device.registration_id}: {str(e)}")
+                logger.exception("Topic broadcast to %s failed", broadcast.topic)
+                broadcast.status = 'failed'
+                broadcast.last_error = str(e)
+                broadcast.finished_at = timezone.now()
+                broadcast.save(update_fields=['status', 'last_error', 'finished_at'])
+                return CustomErrorResponse(
+                    msj={"error": f"Failed to publish to topic {broadcast.topic}: {e}"},
+                    status_code=status.HTTP_502_BAD_GATEWAY
+                )
+            broadcast.save(update_fields=['message_id'])
+        return CustomSuccessResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            msj="Broadcast queued.",
+            input_data={
+                **NotificationBroadcastSerializer(broadcast).data,
+                "status_url": reverse('notification-broadcast-detail', args=[broadcast.id]),
+            }
+        )
 
-        response_data = {
-            "total_device_count": devices.count(),
-            "notification_sent_count": sended_notification_count,
-            "error_count": error_count
-        }
 
-        if sended_notification_count > 0:
-            return CustomSuccessResponse(
-                status_code=status.HTTP_200_OK,
-                input_data=response_data
+class NotificationBroadcastDetailAPI(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @swagger_auto_schema(
+        operation_description="Progress of a queued general notification broadcast",
+        responses={
+            200: NotificationBroadcastSerializer,
+            403: "Invalid or missing API key",
+            404: "Broadcast not found"
+        }
+    )
+    def get(self, request, pk):
+        if not has_valid_api_key(request):
+            return CustomErrorResponse(
+                msj={"error": "Invalid or missing API key"},
+                status_code=status.HTTP_403_FORBIDDEN
             )
-        else:
+
+        broadcast = NotificationBroadcast.objects.filter(pk=pk).first()
+        if broadcast is None:
             return CustomErrorResponse(
-                msj={"error": "Failed to send notifications to any device.",
-                     "details": response_data},
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+                msj={"error": "Broadcast not found"},
+                status_code=status.HTTP_404_NOT_FOUND
             )
+        return CustomSuccessResponse(
+            status_code=status.HTTP_200_OK,
+            input_data=NotificationBroadcastSerializer(broadcast).data
+        )
@@ -0,0 +1,184 @@
+# notification/broadcasts.py
+import os
+import socket
+from datetime import timedelta
+from logging import getLogger
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from fcm_django.models import FCMDevice
+
+from .fanout import FanOut, FanOutResult
+from .models import NotificationBroadcast
+from .transport import get_notification_transport
+
+logger = getLogger("my_logger")
+
+DEFAULT_BROADCAST_SETTINGS = {
+    'BATCH_SIZE': 500,
+    # Bu kadar saniye heartbeat atmayan worker'ın işi başkası tarafından devralınır
+    'LEASE_TIMEOUT': 300,
+    'POLL_INTERVAL': 5.0,
+}
+
+
+def get_broadcast_settings() -> dict:
+    return {**DEFAULT_BROADCAST_SETTINGS, **getattr(settings, 'NOTIFICATION_BROADCAST', {})}
+
+
+def default_worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def broadcast_devices(broadcast=None):
+    devices = FCMDevice.objects.filter(active=True)
+    if broadcast is not None and broadcast.language:
+        devices = devices.filter(user__app_lang=broadcast.language)
+    return devices
+
+
+def claim_broadcast(worker, lease_timeout=None):
+    """
+    Takes the oldest pending broadcast, or a running one whose worker
+    stopped sending heartbeats, with SELECT ... FOR UPDATE SKIP LOCKED so
+    concurrent workers never claim the same job. Returns None when there
+    is nothing to do.
+    """
+    if lease_timeout is None:
+        lease_timeout = get_broadcast_settings()['LEASE_TIMEOUT']
+    now = timezone.now()
+    claimable = Q(status='pending') | Q(status='running', heartbeat_at__lt=now - timedelta(seconds=lease_timeout))
+    # Topic yayını API'de henüz FCM'e gitmediyse inbox satırları yazılmamalı
+    claimable &= Q(topic__isnull=True) | Q(message_id__isnull=False)
+
+    with transaction.atomic():
+        broadcast = (NotificationBroadcast.objects
+                     .select_for_update(skip_locked=True)
+                     .filter(claimable)
+                     .order_by('created_at', 'id')
+                     .first())
+        if broadcast is None:
+            return None
+
+        if broadcast.status == 'running':
+            logger.warning("Taking over broadcast %s from worker %s", broadcast.id, broadcast.worker)
+            _settle_unconfirmed(broadcast)
+        else:
+            broadcast.started_at = now
+            broadcast.total_device_count = broadcast_devices(broadcast).count()
+
+        broadcast.status = 'running'
+        broadcast.worker = worker
+        broadcast.heartbeat_at = now
+        broadcast.attempts += 1
+        broadcast.save()
+    return broadcast
+
+
+def _settle_unconfirmed(broadcast):
+    """
+    A worker died between checkpointing a chunk and recording its result,
+    so that chunk may or may not have reached FCM. It is not sent again
+    (at most once); its devices are counted as unconfirmed instead.
+    """
+    if broadcast.last_device_id <= broadcast.confirmed_device_id:
+        return
+    if broadcast.topic:
+        # Topic modunda chunk sadece inbox satırı yazar, tekrarı zararsız
+        broadcast.last_device_id = broadcast.confirmed_device_id
+        return
+    unconfirmed = broadcast_devices(broadcast).filter(id__gt=broadcast.confirmed_device_id,
+                                             id__lte=broadcast.last_device_id).count()
+    logger.warning("Broadcast %s: %s devices in an interrupted chunk are not resent",
+                   broadcast.id, unconfirmed)
+    broadcast.unconfirmed_count += unconfirmed
+    broadcast.confirmed_device_id = broadcast.last_device_id
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def topic_batch_result(chunk):
+    """
+    A chunk of a topic broadcast. FCM accepted one message for the topic
+    and never reports per device, so the chunk's devices are counted as
+    reached through the topic, not as sent.
+    """
+    result = FanOutResult()
+    result.device_count = result.topic_count = len(chunk)
+    result.batch_count = 1
+    result.notified_user_ids = {user_id for _, _, user_id in chunk if user_id is not None}
+    return result
+
+
+def process_broadcast(broadcast, worker, transport=None, batch_size=None):
+    """
+    Sends the broadcast to active devices in id order, one chunk at a time.
+    Before a chunk is sent its last device id is committed as the
+    checkpoint; the chunk's inbox rows and counters are committed together
+    after it is sent. A restarted job continues after the checkpoint.
+
+    Topic broadcasts were already published by the API, so their chunks
+    only write the inbox rows of the devices' users.
+    """
+    transport = transport or get_notification_transport()
+    fan_out = FanOut(broadcast.title, broadcast.message, data=broadcast.data,
+                     transport=transport,
+                     batch_size=batch_size or get_broadcast_settings()['BATCH_SIZE'],
+                     save_results=False, broadcast=broadcast)
+    owned = NotificationBroadcast.objects.filter(pk=broadcast.pk, worker=worker, status='running')
+
+    try:
+        if not broadcast.topic and not transport.available:
+            raise RuntimeError("Notification transport is not available (Firebase not configured)")
+
+        cursor = broadcast.last_device_id
+        while True:
+            chunk = list(broadcast_devices(broadcast).filter(id__gt=cursor).order_by('id')
+                         .values_list('id', 'registration_id', 'user_id')[:fan_out.batch_size])
+            if not chunk:
+                break
+            cursor = chunk[-1][0]
+
+            # Önce checkpoint: bu noktadan sonra çökerse chunk tekrar gönderilmez
+            if not owned.update(last_device_id=cursor, heartbeat_at=timezone.now()):
+                raise LeaseLost()
+
+            if broadcast.topic:
+                result = topic_batch_result(chunk)
+            else:
+                result = fan_out.send_batch(chunk)
+
+            with transaction.atomic():
+                fan_out.save_batch(result)
+                errors = dict(owned.values_list('errors', flat=True).first() or {})
+                for code, count in result.errors.items():
+                    errors[code] = errors.get(code, 0) + count
+                updated = owned.update(
+                    confirmed_device_id=cursor,
+                    sent_count=F('sent_count') + result.success_count,
+                    failure_count=F('failure_count') + result.failure_count,
+                    skipped_count=F('skipped_count') + result.skipped_count,
+                    topic_device_count=F('topic_device_count') + result.topic_count,
+                    inbox_written_count=F('inbox_written_count') + result.inbox_written_count,
+                    batch_count=F('batch_count') + result.batch_count,
+                    deactivated_count=F('deactivated_count') + result.deactivated_count,
+                    errors=errors,
+                    heartbeat_at=timezone.now(),
+                )
+                if not updated:
+                    raise LeaseLost()
+    except LeaseLost:
+        logger.warning("Broadcast %s was taken over by another worker, %s stops", broadcast.id, worker)
+        return None
+    except Exception as e:
+        logger.exception("Broadcast %s failed", broadcast.id)
+        owned.update(status='failed', last_error=str(e), finished_at=timezone.now())
+    else:
+        owned.update(status='completed', finished_at=timezone.now(), heartbeat_at=timezone.now())
+
+    broadcast.refresh_from_db()
+    return broadcast
@@ -0,0 +1,22 @@
+# notification/checks.py
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register('notification', deploy=True)
+def check_channel_layer(app_configs, **kwargs):
+    """
+    The in-memory channel layer only reaches clients connected to the same
+    process, so with several workers most users would silently miss their
+    WebSocket pushes.
+    """
+    backend = settings.CHANNEL_LAYERS['default']['BACKEND']
+    if (backend != 'channels.layers.InMemoryChannelLayer'
+            or settings.DEBUG or settings.CHANNEL_LAYER_IN_MEMORY):
+        return []
+    return [Error(
+        "The in-memory channel layer is used with DEBUG off.",
+        hint="Set CHANNEL_LAYER_REDIS_URL (or REDIS_URL), or CHANNEL_LAYER_IN_MEMORY=True "
+             "to run a single process with the in-memory layer.",
+        id='notification.E001',
+    )]
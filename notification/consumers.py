@@ -0,0 +1,39 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .counters import get_unread_count
+from .realtime import user_group_name
+
+# Token yok / geçersiz: istemci yeniden login olmalı
+CLOSE_UNAUTHORIZED = 4401
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    One connection per app session. New Notification rows of the user are
+    pushed as {"type": "notification", "notification": {...}} right after
+    they are committed; the current unread count is sent on connect.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHORIZED)
+            return
+
+        self.group_name = user_group_name(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        unread_count = await database_sync_to_async(get_unread_count)(user.id)
+        await self.send_json({'type': 'unread_count', 'unread_count': unread_count})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def notification_created(self, event):
+        await self.send_json({'type': 'notification', 'notification': event['notification']})
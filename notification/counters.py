@@ -0,0 +1,182 @@
+# notification/counters.py
+import os
+import threading
+from collections import defaultdict
+from logging import getLogger
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter
+
+logger = getLogger("my_logger")
+
+DEFAULT_COUNTER_SETTINGS = {
+    # Boşsa sayaç sadece veritabanında tutulur
+    'REDIS_URL': None,
+    'KEY_PREFIX': 'notification:unread:',
+    # Redis kopyası en fazla bu kadar saniye yaşar, sonra DB'den yeniden yüklenir
+    'TTL': 3600,
+}
+
+# Okuma DB'den yüklediği değeri, arada bir yazma (generation artışı) olmadıysa
+# yazar; yoksa eski değer TTL boyunca Redis'te kalırdı
+SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[2]) or '') == ARGV[1] then
+    return redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3], 'NX')
+end
+return nil
+"""
+
+
+def get_counter_settings() -> dict:
+    return {**DEFAULT_COUNTER_SETTINGS, **getattr(settings, 'NOTIFICATION_UNREAD_COUNTER', {})}
+
+
+_redis = None
+_redis_pid = None
+_redis_lock = threading.Lock()
+
+
+def get_counter_redis():
+    """Process-wide Redis client for the counter mirror, or None when it is not configured."""
+    global _redis, _redis_pid
+    url = get_counter_settings()['REDIS_URL']
+    if not url:
+        return None
+    pid = os.getpid()
+    if _redis is None or _redis_pid != pid:
+        with _redis_lock:
+            if _redis is None or _redis_pid != pid:
+                import redis
+                _redis = redis.Redis.from_url(url)
+                _redis_pid = pid
+    return _redis
+
+
+def counter_key(user_id) -> str:
+    return f"{get_counter_settings()['KEY_PREFIX']}{user_id}"
+
+
+def generation_key(user_id) -> str:
+    return f"{counter_key(user_id)}:gen"
+
+
+def adjust_unread(deltas):
+    """
+    Adds `deltas` ({user_id: delta}) to the users' unread counters. Users
+    that share a delta are updated with one UPDATE, so a fan-out chunk
+    costs two statements. The Redis copies are dropped after commit and
+    reloaded by the next read.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in deltas],
+        ignore_conflicts=True,
+    )
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(
+            unread_count=Greatest(F('unread_count') + delta, 0))
+
+    transaction.on_commit(lambda: forget_cached_counts(deltas))
+
+
+def forget_cached_counts(user_ids):
+    """
+    Drops the users' Redis copies and bumps their generation, so a read
+    that loaded the old count from the database before this commit does
+    not put it back.
+    """
+    client = get_counter_redis()
+    if client is None:
+        return
+    ttl = get_counter_settings()['TTL']
+    try:
+        pipe = client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.incr(generation_key(user_id))
+            pipe.expire(generation_key(user_id), ttl)
+            pipe.delete(counter_key(user_id))
+        pipe.execute()
+    except Exception:
+        logger.exception("Unread counter cache invalidation failed")
+
+
+def get_unread_count(user_id) -> int:
+    """Redis first, then the counter row; never counts the notifications table."""
+    client = get_counter_redis()
+    if client is not None:
+        try:
+            cached, generation = client.mget(counter_key(user_id), generation_key(user_id))
+            if cached is not None:
+                return int(cached)
+        except Exception:
+            logger.exception("Unread counter read from Redis failed")
+            client = None
+
+    count = (NotificationCounter.objects.filter(user_id=user_id)
+             .values_list('unread_count', flat=True).first()) or 0
+    if client is not None:
+        try:
+            client.register_script(SET_IF_GENERATION)(
+                keys=[counter_key(user_id), generation_key(user_id)],
+                args=[generation or b'', count, get_counter_settings()['TTL']])
+        except Exception:
+            logger.exception("Unread counter write to Redis failed")
+    return count
+
+
+def reconcile_counters(batch_size=1000, user_ids=None):
+    """
+    Recomputes counters from the notifications table for users in id
+    batches, fixes rows that drifted and drops their Redis copies.
+    Returns (checked, fixed).
+    """
+    from authentication.models import CustomUser
+
+    users = CustomUser.objects.order_by('id')
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+
+    checked = fixed = 0
+    last_id = 0
+    while True:
+        ids = list(users.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        checked += len(ids)
+
+        with transaction.atomic():
+            # Sayım ve düzeltme arasında sayaç değişmesin
+            stored = dict(NotificationCounter.objects.select_for_update()
+                          .filter(user_id__in=ids).values_list('user_id', 'unread_count'))
+            actual = dict(Notification.objects.filter(user_id__in=ids, is_read=False)
+                          .values('user_id').annotate(count=Count('id'))
+                          .values_list('user_id', 'count'))
+            drifted = [user_id for user_id in ids
+                       if stored.get(user_id, 0) != actual.get(user_id, 0)]
+            if not drifted:
+                continue
+            NotificationCounter.objects.bulk_create(
+                [NotificationCounter(user_id=user_id) for user_id in drifted],
+                ignore_conflicts=True,
+            )
+            now = timezone.now()
+            counters = list(NotificationCounter.objects.filter(user_id__in=drifted))
+            for counter in counters:
+                counter.unread_count = actual.get(counter.user_id, 0)
+                counter.updated_at = now
+            NotificationCounter.objects.bulk_update(counters, ['unread_count', 'updated_at'])
+            transaction.on_commit(lambda drifted=drifted: forget_cached_counts(drifted))
+        fixed += len(drifted)
+    return checked, fixed
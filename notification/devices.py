@@ -0,0 +1,119 @@
+# notification/devices.py
+from datetime import timedelta
+from logging import getLogger
+
+import firebase_admin.messaging as fbm
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from fcm_django.models import FCMDevice
+from firebase_admin.exceptions import InvalidArgumentError
+
+from .models import DeviceDeliveryState
+
+logger = getLogger("my_logger")
+
+DEFAULT_DEVICE_PRUNING_SETTINGS = {
+    # Bu kadar arka arkaya geçici hata alan cihaz pasife çekilir
+    'FAILURE_STREAK_LIMIT': 10,
+    # Pasif cihazlar bu kadar gün sonra silinir
+    'INACTIVE_RETENTION_DAYS': 30,
+    'DELETE_BATCH_SIZE': 1000,
+}
+
+# FCM'in token için "bir daha deneme" dediği hatalar
+PERMANENT_ERRORS = (fbm.UnregisteredError, fbm.SenderIdMismatchError)
+
+
+def get_device_pruning_settings() -> dict:
+    return {**DEFAULT_DEVICE_PRUNING_SETTINGS,
+            **getattr(settings, 'NOTIFICATION_DEVICE_PRUNING', {})}
+
+
+def is_permanent_failure(exception) -> bool:
+    """
+    True when the token itself is dead: unregistered, issued for another
+    sender, or not a valid registration token. INVALID_ARGUMENT is also
+    returned for bad payloads, so it only counts when it is about the token.
+    """
+    if isinstance(exception, PERMANENT_ERRORS):
+        return True
+    if isinstance(exception, InvalidArgumentError):
+        return 'registration token' in str(exception).lower()
+    return False
+
+
+def record_delivery_results(succeeded_ids, failures, now=None):
+    """
+    Updates DeviceDeliveryState for one batch and deactivates devices with
+    a permanent failure, a handful of statements per batch. `failures` are
+    DeliveryResults with success False; only per-token FCM errors count
+    towards the failure streak, whole-batch transport failures say nothing
+    about the devices and leave their state untouched.
+    """
+    now = now or timezone.now()
+    failures = [failure for failure in failures if not failure.batch_failure]
+    failed_ids = [failure.device_id for failure in failures]
+    device_ids = list(succeeded_ids) + failed_ids
+    if not device_ids:
+        return 0
+
+    DeviceDeliveryState.objects.bulk_create(
+        [DeviceDeliveryState(device_id=device_id) for device_id in device_ids],
+        ignore_conflicts=True,
+    )
+    if succeeded_ids:
+        DeviceDeliveryState.objects.filter(device_id__in=succeeded_ids).update(
+            last_success_at=now, failure_streak=0, last_error=None)
+
+    by_error = {}
+    for failure in failures:
+        by_error.setdefault(failure.error, []).append(failure.device_id)
+    for error, ids in by_error.items():
+        DeviceDeliveryState.objects.filter(device_id__in=ids).update(
+            last_failure_at=now, failure_streak=F('failure_streak') + 1, last_error=error)
+
+    permanent_ids = [failure.device_id for failure in failures if failure.permanent]
+    deactivated = 0
+    if permanent_ids:
+        deactivated = FCMDevice.objects.filter(id__in=permanent_ids, active=True).update(active=False)
+        logger.info("Deactivated %s devices with dead FCM tokens", deactivated)
+    return deactivated
+
+
+def reactivate_device(device):
+    """A client registered the token again, give it a fresh start."""
+    if not device.active:
+        device.active = True
+        device.save(update_fields=['active'])
+    DeviceDeliveryState.objects.filter(device=device).update(failure_streak=0, last_error=None)
+
+
+def compact_devices(dry_run=False, config=None):
+    """
+    Deactivates devices whose failure streak reached FAILURE_STREAK_LIMIT
+    and deletes devices that have been inactive for INACTIVE_RETENTION_DAYS.
+    Returns (deactivated, deleted).
+    """
+    config = config or get_device_pruning_settings()
+    cutoff = timezone.now() - timedelta(days=config['INACTIVE_RETENTION_DAYS'])
+
+    failing = FCMDevice.objects.filter(
+        active=True, delivery_state__failure_streak__gte=config['FAILURE_STREAK_LIMIT'])
+    deactivated = failing.count() if dry_run else failing.update(active=False)
+
+    # Son hatası (ya da hiç gönderim yoksa kaydı) cutoff'tan eski pasif cihazlar
+    stale = FCMDevice.objects.filter(active=False).filter(
+        Q(delivery_state__last_failure_at__lt=cutoff)
+        | Q(delivery_state__isnull=True, date_created__lt=cutoff))
+    if dry_run:
+        return deactivated, stale.count()
+
+    deleted = 0
+    while True:
+        ids = list(stale.order_by('id').values_list('id', flat=True)[:config['DELETE_BATCH_SIZE']])
+        if not ids:
+            break
+        FCMDevice.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+    return deactivated, deleted
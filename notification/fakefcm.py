@@ -0,0 +1,146 @@
+# notification/fakefcm.py
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# FakeHTTPTransport'un error kodu -> firebase_admin exception eşlemesi transport.py'de
+FAKE_ERROR_CODES = ('UNREGISTERED', 'SENDER_ID_MISMATCH', 'QUOTA_EXCEEDED', 'UNAVAILABLE', 'INTERNAL')
+
+
+class FakeFCMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Header ve gövde ayrı yazılıyor; Nagle + delayed ACK her isteğe ~40ms ekliyor
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._reply(400, {'error': 'INVALID_ARGUMENT'})
+
+        routes = {
+            '/v1/messages:sendEach': self.server.send_each,
+            '/v1/messages:sendTopic': self.server.send_topic,
+            '/v1/topics:subscribe': self.server.subscribe,
+            '/v1/topics:unsubscribe': self.server.unsubscribe,
+        }
+        handler = routes.get(self.path)
+        if handler is None:
+            return self._reply(404, {'error': 'NOT_FOUND'})
+        self.server.wait()
+        self._reply(200, handler(payload))
+
+    def _reply(self, status_code, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeFCMServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the FCM HTTP API, used by FakeHTTPTransport for
+    offline benchmarks and tests. Each request waits `latency` seconds
+    (plus up to `jitter`); each token fails with a random code from
+    FAKE_ERROR_CODES with probability `error_rate`, and tokens in
+    `failing_tokens` always fail with UNREGISTERED.
+
+        server = FakeFCMServer(latency=0.05, error_rate=0.01).start()
+        ...
+        server.stop()
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, jitter=0.0, error_rate=0.0,
+                 failing_tokens=(), seed=None):
+        super().__init__(address, FakeFCMHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.failing_tokens = set(failing_tokens)
+        self.topics = {}
+        self.request_count = 0
+        self.token_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-fcm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def wait(self):
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+    def _error_for(self, token):
+        if token in self.failing_tokens:
+            return 'UNREGISTERED'
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self._random.choice(FAKE_ERROR_CODES)
+        return None
+
+    def send_each(self, payload):
+        tokens = payload.get('tokens', [])
+        with self._lock:
+            first_id = self.token_count
+            self.token_count += len(tokens)
+        responses = []
+        for offset, token in enumerate(tokens):
+            error = self._error_for(token)
+            if error:
+                responses.append({'success': False, 'error': error})
+            else:
+                responses.append({'success': True, 'message_id': f"fake/{first_id + offset}"})
+        return {'responses': responses}
+
+    def send_topic(self, payload):
+        return {'message_id': f"fake/topic/{self.request_count}"}
+
+    def subscribe(self, payload):
+        return self._change_topic(payload, subscribe=True)
+
+    def unsubscribe(self, payload):
+        return self._change_topic(payload, subscribe=False)
+
+    def _change_topic(self, payload, subscribe):
+        tokens = payload.get('tokens', [])
+        errors = []
+        valid = []
+        for index, token in enumerate(tokens):
+            if token in self.failing_tokens:
+                errors.append({'index': index, 'reason': 'NOT_FOUND'})
+            else:
+                valid.append(token)
+        with self._lock:
+            members = self.topics.setdefault(payload.get('topic'), set())
+            if subscribe:
+                members.update(valid)
+            else:
+                members.difference_update(valid)
+        return {'success_count': len(valid), 'failure_count': len(errors), 'errors': errors}
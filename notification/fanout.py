@@ -0,0 +1,226 @@
+# notification/fanout.py
+from collections import Counter
+from itertools import islice
+from logging import getLogger
+from typing import NamedTuple, Optional
+
+from django.db import transaction
+
+from .counters import adjust_unread
+from .devices import is_permanent_failure, record_delivery_results
+from .models import Notification
+from .realtime import push_notifications
+from .transport import get_delivery_settings, get_notification_transport
+
+logger = getLogger("my_logger")
+
+NOTIFICATION_INSERT_BATCH_SIZE = 2000
+
+
+class DeliveryResult(NamedTuple):
+    device_id: int
+    user_id: Optional[int]
+    token: str
+    success: bool
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    permanent: bool = False
+    # Tüm multicast başarısız oldu (ağ, kimlik doğrulama); token'la ilgisi yok
+    batch_failure: bool = False
+
+
+def error_code(exception) -> str:
+    return type(exception).__name__ if exception is not None else 'UnknownError'
+
+
+class FanOutResult:
+    """Aggregate counts of a fan-out plus the per-device failures."""
+
+    def __init__(self):
+        self.device_count = 0
+        self.success_count = 0
+        self.failure_count = 0
+        self.skipped_count = 0
+        self.topic_count = 0
+        self.inbox_written_count = 0
+        self.batch_count = 0
+        self.deactivated_count = 0
+        self.errors = Counter()
+        self.failures = []
+        self.delivered_device_ids = []
+        self.notified_user_ids = set()
+
+    def add(self, result: DeliveryResult):
+        if result.success:
+            self.success_count += 1
+            self.delivered_device_ids.append(result.device_id)
+            if result.user_id is not None:
+                self.notified_user_ids.add(result.user_id)
+        else:
+            self.failure_count += 1
+            self.errors[result.error] += 1
+            self.failures.append(result)
+
+    def merge(self, other, details=True):
+        """Adds `other`'s counts; per-device failures and user ids only with `details`."""
+        self.device_count += other.device_count
+        self.success_count += other.success_count
+        self.failure_count += other.failure_count
+        self.skipped_count += other.skipped_count
+        self.topic_count += other.topic_count
+        self.inbox_written_count += other.inbox_written_count
+        self.batch_count += other.batch_count
+        self.deactivated_count += other.deactivated_count
+        self.errors.update(other.errors)
+        if details:
+            self.failures.extend(other.failures)
+            self.delivered_device_ids.extend(other.delivered_device_ids)
+            self.notified_user_ids |= other.notified_user_ids
+
+    @property
+    def permanent_failure_count(self):
+        return sum(1 for failure in self.failures if failure.permanent)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_device_count": self.device_count,
+            "notification_sent_count": self.success_count,
+            "error_count": self.failure_count,
+            "skipped_count": self.skipped_count,
+            "inbox_written_count": self.inbox_written_count,
+            "batch_count": self.batch_count,
+            "deactivated_device_count": self.deactivated_count,
+            "errors": dict(self.errors),
+        }
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class FanOut:
+    """
+    Sends one notification to (device_id, registration_id, user_id)
+    targets in multicast batches and maps each token's result back to its
+    device. Every user with at least one successful delivery gets one
+    Notification row, bulk-inserted per batch in its own transaction
+    together with the devices' delivery state; devices whose token FCM
+    reports as dead are deactivated.
+
+    Without a broadcast, users already written by an earlier batch are
+    remembered in memory. With one, the (broadcast, user) unique constraint
+    drops duplicates instead (also across worker restarts), and the running
+    totals keep counts only, so memory stays bounded however many devices
+    the broadcast reaches.
+    """
+
+    def __init__(self, title, body, data=None, transport=None, batch_size=None,
+                 save_results=True, broadcast=None):
+        self.title = title
+        self.body = body
+        self.data = data
+        self.transport = transport or get_notification_transport()
+        self.batch_size = min(batch_size or get_delivery_settings()['BATCH_SIZE'],
+                              self.transport.max_batch_size)
+        self.save_results = save_results
+        self.broadcast = broadcast
+        self.result = FanOutResult()
+        self._notified_user_ids = set()
+
+    def send(self, targets) -> FanOutResult:
+        for chunk in chunked(targets, self.batch_size):
+            self.send_batch(chunk)
+        return self.result
+
+    def send_batch(self, chunk) -> FanOutResult:
+        """Sends a single batch (at most batch_size targets) and returns its result."""
+        if len(chunk) > self.batch_size:
+            raise ValueError(f"Batch of {len(chunk)} exceeds batch size {self.batch_size}")
+        result = FanOutResult()
+        result.device_count = len(chunk)
+        devices = [target for target in chunk if target[1]]
+        result.skipped_count = len(chunk) - len(devices)
+        if devices:
+            result.batch_count = 1
+            self._deliver(devices, result)
+            if self.save_results:
+                with transaction.atomic():
+                    self.save_batch(result)
+        self.result.merge(result, details=self.broadcast is None)
+        return result
+
+    def save_batch(self, result):
+        """Persists one batch: inbox rows, device delivery state and dead tokens."""
+        result.inbox_written_count = self.write_notifications(result.notified_user_ids)
+        result.deactivated_count = record_delivery_results(result.delivered_device_ids,
+                                                           result.failures)
+
+    def write_notifications(self, user_ids):
+        """
+        Inserts one inbox row per user that has not been written yet, bumps
+        their unread counters and pushes the rows to connected clients once
+        the transaction commits. Returns the number of rows written. Run
+        inside a transaction.
+        """
+        user_ids = set(user_ids)
+        if self.broadcast is None:
+            user_ids -= self._notified_user_ids
+            self._notified_user_ids |= user_ids
+        elif user_ids:
+            # Devralınan chunk'ta satırı zaten yazılmış kullanıcıların sayacı artmasın
+            user_ids -= set(Notification.objects.filter(broadcast=self.broadcast, user_id__in=user_ids)
+                            .values_list('user_id', flat=True))
+        if not user_ids:
+            return 0
+        notifications = Notification.objects.bulk_create(
+            [Notification(user_id=user_id, title=self.title, message=self.body,
+                          broadcast=self.broadcast)
+             for user_id in user_ids],
+            batch_size=NOTIFICATION_INSERT_BATCH_SIZE,
+            ignore_conflicts=self.broadcast is not None,
+        )
+        adjust_unread({user_id: 1 for user_id in user_ids})
+        if self.broadcast is not None:
+            # ignore_conflicts ile pk dönmüyor, satırları tekrar oku
+            notifications = Notification.objects.filter(broadcast=self.broadcast, user_id__in=user_ids)
+        push_notifications(notifications)
+        return len(user_ids)
+
+    def _deliver(self, devices, result):
+        title, body, data = self.title, self.body, self.data
+        tokens = [token for _, token, _ in devices]
+        try:
+            responses = self.transport.send_multicast(tokens, title, body, data=data)
+        except Exception as e:
+            # Tüm batch başarısız (kimlik doğrulama, ağ vb.), token'ları tek tek işaretle
+            logger.exception("Multicast of %s tokens failed", len(tokens))
+            code = error_code(e)
+            responses = [None] * len(tokens)
+        else:
+            code = None
+
+        for (device_id, token, user_id), response in zip(devices, responses):
+            if response is None:
+                delivery = DeliveryResult(device_id, user_id, token, False, error=code,
+                                          batch_failure=True)
+            elif response.success:
+                delivery = DeliveryResult(device_id, user_id, token, True, response.message_id)
+            else:
+                delivery = DeliveryResult(device_id, user_id, token, False,
+                                          error=error_code(response.exception),
+                                          permanent=is_permanent_failure(response.exception))
+                logger.warning("Failed to send message to device %s: %s",
+                               device_id, response.exception)
+            result.add(delivery)
+
+
+def fan_out(targets, title, body, data=None, transport=None, batch_size=None,
+            save_results=True) -> FanOutResult:
+    """Sends to every target in `targets`, see FanOut."""
+    return FanOut(title, body, data=data, transport=transport, batch_size=batch_size,
+                  save_results=save_results).send(targets)
@@ -0,0 +1,181 @@
+import logging
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from fcm_django.models import FCMDevice
+
+from authentication.models import CustomUser
+from notification.broadcasts import process_broadcast
+from notification.fakefcm import FakeFCMServer
+from notification.fanout import FanOut, chunked
+from notification.models import NotificationBroadcast
+from notification.transport import FakeHTTPTransport, InMemoryTransport
+
+# Sentetik kullanıcıların dili; broadcast sadece onlara gider
+BENCHMARK_LANGUAGE = 'zzb'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class Command(BaseCommand):
+    help = ("Measures broadcast fan-out offline: sends to N synthetic devices "
+            "through the fake FCM HTTP server (or the in-memory transport) and "
+            "reports throughput, per-batch latency percentiles and peak memory. "
+            "By default nothing touches the database; --with-db runs "
+            "process_broadcast against synthetic users and FCMDevice rows, "
+            "including inbox writes and checkpoints, inside a transaction that "
+            "is rolled back. Firebase is never called.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--devices', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--transport', choices=['fake_http', 'memory'], default='fake_http')
+        parser.add_argument('--url', default=None,
+                            help="Use an already running fake FCM server instead of starting one")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--latency', type=float, default=0.02,
+                            help="Simulated FCM round trip per batch (seconds)")
+        parser.add_argument('--jitter', type=float, default=0.01)
+        parser.add_argument('--error-rate', type=float, default=0.01,
+                            help="Fraction of tokens that fail with a random FCM error")
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--with-db', action='store_true',
+                            help="Drive process_broadcast against synthetic FCMDevice rows "
+                                 "(rolled back afterwards)")
+        parser.add_argument('--devices-per-user', type=int, default=2)
+        parser.add_argument('--rss', action='store_true',
+                            help="Report the process max RSS (cumulative over all runs, "
+                                 "cheaper) instead of each run's tracemalloc peak")
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger("my_logger")
+        level = logger.level
+        if options['verbosity'] < 2:
+            # Hatalı token başına bir warning satırı; 1M cihazda binlerce
+            logger.setLevel(logging.ERROR)
+        server = None
+        if options['transport'] == 'fake_http' and not options['url']:
+            server = FakeFCMServer(latency=options['latency'], jitter=options['jitter'],
+                                   error_rate=options['error_rate'], seed=options['seed']).start()
+        memory_column = 'maxrss MB' if options['rss'] else 'peak MB'
+        try:
+            self.stdout.write(f"{'devices':>10} {'batches':>8} {'seconds':>9} {'tokens/s':>10} "
+                              f"{'p50 ms':>8} {'p99 ms':>8} {'failed':>8} {memory_column:>9}")
+            for device_count in options['devices']:
+                transport = self.build_transport(options, server)
+                run = self.run_with_db if options['with_db'] else self.run
+                self.stdout.write(self.format_row(device_count, run(device_count, transport, options)))
+        finally:
+            if server is not None:
+                server.stop()
+            logger.setLevel(level)
+        self.stdout.write(self.style.SUCCESS("Fan-out benchmark completed."))
+
+    def build_transport(self, options, server):
+        if options['transport'] == 'memory':
+            return InMemoryTransport(latency=options['latency'])
+        return FakeHTTPTransport(options['url'] or server.url)
+
+    def run(self, device_count, transport, options):
+        # Worker'ın kullandığı mod: broadcast sonuçları sadece sayaç tutar
+        broadcast = NotificationBroadcast(title="Benchmark", message="Fan-out benchmark")
+        fan_out = FanOut(broadcast.title, broadcast.message, data={'benchmark': '1'},
+                         transport=transport, batch_size=options['batch_size'],
+                         save_results=False, broadcast=broadcast)
+        targets = ((device_id, f"benchmark-token-{device_id}", device_id)
+                   for device_id in range(1, device_count + 1))
+
+        self.start_memory(options)
+        batch_seconds = []
+        started = time.perf_counter()
+        for chunk in chunked(targets, fan_out.batch_size):
+            batch_started = time.perf_counter()
+            fan_out.send_batch(chunk)
+            batch_seconds.append(time.perf_counter() - batch_started)
+        elapsed = time.perf_counter() - started
+        return self.stats(device_count, batch_seconds, elapsed, fan_out.result.failure_count,
+                          self.stop_memory(options))
+
+    def run_with_db(self, device_count, transport, options):
+        """
+        process_broadcast over synthetic rows. A batch is timed from one
+        multicast call to the next, so it includes the checkpoint, inbox
+        rows, counters and delivery state writes.
+        """
+        with transaction.atomic():
+            broadcast = self.create_synthetic_broadcast(device_count, options['devices_per_user'])
+            send_started = []
+            send_multicast = transport.send_multicast
+
+            def timed_send_multicast(*args, **kwargs):
+                send_started.append(time.perf_counter())
+                return send_multicast(*args, **kwargs)
+            transport.send_multicast = timed_send_multicast
+
+            self.start_memory(options)
+            started = time.perf_counter()
+            broadcast = process_broadcast(broadcast, broadcast.worker, transport=transport,
+                                          batch_size=options['batch_size'])
+            elapsed = time.perf_counter() - started
+            peak_mb = self.stop_memory(options)
+            if broadcast.status != 'completed':
+                self.stderr.write(f"Broadcast {broadcast.status}: {broadcast.last_error}")
+
+            marks = send_started + [started + elapsed]
+            batch_seconds = [end - start for start, end in zip(marks, marks[1:])]
+            failed = broadcast.failure_count
+            transaction.set_rollback(True)
+        return self.stats(device_count, batch_seconds, elapsed, failed, peak_mb)
+
+    @staticmethod
+    def create_synthetic_broadcast(device_count, devices_per_user):
+        user_count = -(-device_count // devices_per_user)
+        users = CustomUser.objects.bulk_create(
+            [CustomUser(email=f"benchmark-{index}@example.invalid", app_lang=BENCHMARK_LANGUAGE)
+             for index in range(user_count)], batch_size=5000)
+        FCMDevice.objects.bulk_create(
+            [FCMDevice(user=users[index // devices_per_user], type='android', active=True,
+                       registration_id=f"benchmark-token-{index}")
+             for index in range(device_count)], batch_size=5000)
+        # Gerçek kuyruktan iş almamak için doğrudan running olarak yaratılır
+        return NotificationBroadcast.objects.create(
+            title="Benchmark", message="Fan-out benchmark", data={'benchmark': '1'},
+            language=BENCHMARK_LANGUAGE, status='running', worker='fanout-benchmark',
+            total_device_count=device_count)
+
+    @staticmethod
+    def start_memory(options):
+        if not options['rss']:
+            tracemalloc.start()
+
+    @staticmethod
+    def stop_memory(options):
+        if options['rss']:
+            # Linux'ta KB; süreç ömrü boyunca en yüksek değer, önceki koşular dahil
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+        return peak_mb
+
+    @staticmethod
+    def stats(device_count, batch_seconds, elapsed, failed, peak_mb):
+        return {
+            'batches': len(batch_seconds),
+            'seconds': elapsed,
+            'throughput': device_count / elapsed if elapsed else 0.0,
+            'p50': percentile(batch_seconds, 0.50) * 1000,
+            'p99': percentile(batch_seconds, 0.99) * 1000,
+            'failed': failed,
+            'peak_mb': peak_mb,
+        }
+
+    @staticmethod
+    def format_row(device_count, stats):
+        return (f"{device_count:>10} {stats['batches']:>8} {stats['seconds']:>9.2f} "
+                f"{stats['throughput']:>10.0f} {stats['p50']:>8.1f} {stats['p99']:>8.1f} "
+                f"{stats['failed']:>8} {stats['peak_mb']:>9.1f}")
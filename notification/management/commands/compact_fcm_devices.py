@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from notification.devices import compact_devices, get_device_pruning_settings
+
+
+class Command(BaseCommand):
+    help = ("Deactivates FCM devices that keep failing and deletes devices "
+            "that have been inactive longer than INACTIVE_RETENTION_DAYS, so "
+            "dead tokens stop taking up room in every broadcast. Meant to run "
+            "daily from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many devices would be affected")
+        parser.add_argument('--failure-streak-limit', type=int, default=None)
+        parser.add_argument('--retention-days', type=int, default=None)
+
+    def handle(self, *args, **options):
+        config = get_device_pruning_settings()
+        if options['failure_streak_limit'] is not None:
+            config['FAILURE_STREAK_LIMIT'] = options['failure_streak_limit']
+        if options['retention_days'] is not None:
+            config['INACTIVE_RETENTION_DAYS'] = options['retention_days']
+
+        deactivated, deleted = compact_devices(dry_run=options['dry_run'], config=config)
+        prefix = "Would have " if options['dry_run'] else ""
+        self.stdout.write(f"{prefix}deactivated {deactivated} failing devices, "
+                          f"deleted {deleted} stale devices.")
+        self.stdout.write(self.style.SUCCESS("FCM device compaction completed."))
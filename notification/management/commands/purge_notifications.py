@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from notification.retention import get_retention_settings, purge_notifications
+
+
+class Command(BaseCommand):
+    help = ("Deletes notifications older than their retention period "
+            "(READ_TTL_DAYS / UNREAD_TTL_DAYS) in short primary key ranged "
+            "transactions, optionally archiving them per user and month first. "
+            "Meant to run daily from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many notifications would be deleted")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Width of the id range handled per transaction")
+        parser.add_argument('--read-days', type=int, default=None)
+        parser.add_argument('--unread-days', type=int, default=None)
+        parser.add_argument('--archive', action='store_true', default=None,
+                            help="Archive notifications before deleting them")
+        parser.add_argument('--no-archive', action='store_false', dest='archive')
+
+    def handle(self, *args, **options):
+        config = get_retention_settings()
+        for option, key in (('batch_size', 'BATCH_SIZE'), ('read_days', 'READ_TTL_DAYS'),
+                            ('unread_days', 'UNREAD_TTL_DAYS'), ('archive', 'ARCHIVE')):
+            if options[option] is not None:
+                config[key] = options[option]
+
+        stats = purge_notifications(config=config, dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {stats['read']} read and {stats['unread']} "
+                              f"unread notifications.")
+        else:
+            self.stdout.write(f"Deleted {stats['read']} read and {stats['unread']} unread "
+                              f"notifications in {stats['batches']} batches, "
+                              f"archived {stats['archived']}.")
+        self.stdout.write(self.style.SUCCESS("Notification purge completed."))
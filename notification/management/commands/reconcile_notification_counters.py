@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from notification.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = ("Recomputes every user's unread notification counter from the "
+            "notifications table, fixes the ones that drifted and drops their "
+            "Redis copies. Meant to run periodically from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help="Only this user id (can be repeated)")
+
+    def handle(self, *args, **options):
+        checked, fixed = reconcile_counters(batch_size=options['batch_size'],
+                                            user_ids=options['user_ids'])
+        self.stdout.write(f"Checked {checked} users, fixed {fixed} counters.")
+        self.stdout.write(self.style.SUCCESS("Notification counter reconciliation completed."))
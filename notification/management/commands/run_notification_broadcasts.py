@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notification.broadcasts import (claim_broadcast, default_worker_name,
+                                     get_broadcast_settings, process_broadcast)
+
+
+class Command(BaseCommand):
+    help = ("Works through queued NotificationBroadcast jobs. Jobs are claimed "
+            "with SELECT ... FOR UPDATE SKIP LOCKED, so several workers can run "
+            "side by side, and a job whose worker died is taken over after "
+            "LEASE_TIMEOUT and continued from its last checkpoint.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Process the jobs that are queued now and exit")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument('--worker', default=None,
+                            help="Worker name, defaults to <hostname>-<pid>")
+
+    def handle(self, *args, **options):
+        config = get_broadcast_settings()
+        worker = options['worker'] or default_worker_name()
+        poll_interval = options['poll_interval'] or config['POLL_INTERVAL']
+
+        while True:
+            broadcast = claim_broadcast(worker, lease_timeout=config['LEASE_TIMEOUT'])
+            if broadcast is None:
+                if options['once']:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            self.stdout.write(f"Broadcast {broadcast.id}: {broadcast.total_device_count} devices, "
+                              f"resuming after device {broadcast.last_device_id}")
+            broadcast = process_broadcast(broadcast, worker, batch_size=options['batch_size'])
+            if broadcast is not None:
+                reached = (f"{broadcast.topic_device_count} through topic {broadcast.topic}"
+                           if broadcast.topic else f"{broadcast.sent_count} sent")
+                self.stdout.write(
+                    f"Broadcast {broadcast.id} {broadcast.status}: {reached}, "
+                    f"{broadcast.failure_count} failed, {broadcast.skipped_count} skipped, "
+                    f"{broadcast.unconfirmed_count} unconfirmed, "
+                    f"{broadcast.inbox_written_count} inbox rows")
+
+        self.stdout.write(self.style.SUCCESS("Notification broadcast queue is empty."))
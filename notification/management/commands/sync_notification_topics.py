@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from fcm_django.models import FCMDevice
+
+from notification.topics import (all_topic, change_subscriptions, get_topic_settings,
+                                 language_topic)
+from notification.transport import get_notification_transport
+
+
+class Command(BaseCommand):
+    help = ("Re-subscribes every active device to the `all` topic and to its "
+            "user's language topic in batches of up to 1000 tokens. Run once "
+            "after enabling topics (devices registered earlier are not "
+            "subscribed, so mode=topic broadcasts would miss them), then "
+            "daily to repair subscriptions that failed in the background.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--unsubscribe-other-languages', action='store_true',
+                            help="Also remove devices from the topics of the other languages in use")
+
+    def handle(self, *args, **options):
+        transport = get_notification_transport()
+        if not transport.available:
+            raise CommandError("Notification transport is not available (Firebase not configured)")
+        batch_size = min(options['batch_size'] or get_topic_settings()['BATCH_SIZE'],
+                         transport.max_topic_batch_size)
+
+        devices = (FCMDevice.objects.filter(active=True).exclude(registration_id='')
+                   .order_by('id').values_list('registration_id', 'user__app_lang'))
+        other_languages = []
+        if options['unsubscribe_other_languages']:
+            other_languages = sorted(set(devices.values_list('user__app_lang', flat=True)
+                                         .order_by().distinct()) - {None})
+
+        pending = {}
+        totals = {'subscribed': 0, 'unsubscribed': 0, 'failed': 0}
+
+        def flush(key, force=False):
+            tokens = pending.get(key)
+            if tokens and (force or len(tokens) >= batch_size):
+                topic, subscribe = key
+                succeeded, failed = change_subscriptions(tokens, topic, subscribe=subscribe,
+                                                         transport=transport,
+                                                         batch_size=batch_size)
+                totals['subscribed' if subscribe else 'unsubscribed'] += succeeded
+                totals['failed'] += failed
+                pending[key] = []
+
+        for token, app_lang in devices.iterator(chunk_size=2000):
+            keys = [(all_topic(), True)]
+            if app_lang:
+                keys.append((language_topic(app_lang), True))
+            keys.extend((language_topic(other), False)
+                        for other in other_languages if other != app_lang)
+            for key in keys:
+                pending.setdefault(key, []).append(token)
+                flush(key)
+
+        for key in list(pending):
+            flush(key, force=True)
+
+        self.stdout.write(f"Subscribed {totals['subscribed']}, unsubscribed "
+                          f"{totals['unsubscribed']}, failed {totals['failed']}.")
+        self.stdout.write(self.style.SUCCESS("Notification topic sync completed."))
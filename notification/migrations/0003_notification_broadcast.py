@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0002_notificationbroadcast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='broadcast',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='notification.notificationbroadcast'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('broadcast', 'user'), name='notification_unique_broadcast_user'),
+        ),
+    ]
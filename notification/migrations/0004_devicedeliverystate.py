@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fcm_django', '0011_fcmdevice_fcm_django_registration_id_user_id_idx'),
+        ('notification', '0003_notification_broadcast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceDeliveryState',
+            fields=[
+                ('device', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='delivery_state', serialize=False, to=settings.FCM_DJANGO_FCMDEVICE_MODEL)),
+                ('last_success_at', models.DateTimeField(blank=True, null=True)),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True)),
+                ('failure_streak', models.IntegerField(default=0)),
+                ('last_error', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='deactivated_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
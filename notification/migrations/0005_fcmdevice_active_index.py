@@ -0,0 +1,41 @@
+# Partial index on the active rows of fcm_django's device table.
+#
+# Fan-out reads active devices in id order (WHERE active AND id > cursor
+# ORDER BY id LIMIT n); once dead tokens are deactivated the index only
+# holds the devices that are actually sent to. fcm_django's model can't
+# carry our index, so it is created here with plain SQL (Postgres and
+# sqlite both support partial indexes).
+
+from django.conf import settings
+from django.db import migrations
+
+INDEX_NAME = 'notif_fcmdevice_active_idx'
+
+
+def device_table(apps):
+    app_label, model_name = settings.FCM_DJANGO_FCMDEVICE_MODEL.split('.')
+    return apps.get_model(app_label, model_name)._meta.db_table
+
+
+def create_index(apps, schema_editor):
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {quote(INDEX_NAME)} "
+        f"ON {quote(device_table(apps))} ({quote('id')}) WHERE {quote('active')}"
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(INDEX_NAME)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.FCM_DJANGO_FCMDEVICE_MODEL),
+        ('notification', '0004_devicedeliverystate'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
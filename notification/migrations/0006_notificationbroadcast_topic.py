@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0005_fcmdevice_active_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='language',
+            field=models.CharField(blank=True, max_length=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='message_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='topic',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_counters(apps, schema_editor):
+    # Mevcut okunmamış bildirimlerden sayaçları bir kere üret
+    Notification = apps.get_model('notification', 'Notification')
+    NotificationCounter = apps.get_model('notification', 'NotificationCounter')
+    unread = (Notification.objects.filter(is_read=False).values('user_id')
+              .annotate(count=models.Count('id')).order_by('user_id'))
+    batch = []
+    for row in unread.iterator():
+        batch.append(NotificationCounter(user_id=row['user_id'], unread_count=row['count']))
+        if len(batch) >= 2000:
+            NotificationCounter.objects.bulk_create(batch)
+            batch = []
+    NotificationCounter.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_customuser_is_new_user_alter_customuser_phone_number_and_more'),
+        ('notification', '0007_notification_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0009_notificationarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='inbox_written_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='topic_device_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0010_notificationbroadcast_topic_counts'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='notificationarchive',
+            name='notification_archive_user_month',
+        ),
+        migrations.AddIndex(
+            model_name='notificationarchive',
+            index=models.Index(fields=['user', 'month'], name='notification_archive_user_idx'),
+        ),
+    ]
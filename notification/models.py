@@ -12,6 +12,136 @@ class Notification(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    broadcast = models.ForeignKey('NotificationBroadcast', null=True, blank=True,
+                                  on_delete=models.SET_NULL, related_name='notifications')
+
+    class Meta:
+        constraints = [
+            # Yeniden başlatılan broadcast aynı kullanıcıya ikinci satır yazmasın
+            models.UniqueConstraint(fields=['broadcast', 'user'],
+                                    name='notification_unique_broadcast_user'),
+        ]
+        # Inbox sayfaları (created_at, id) üzerinde seek eder; is_read filtreli
+        # ve filtresiz listeler için ayrı index
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at', '-id'],
+                         name='notification_user_read_idx'),
+            models.Index(fields=['user', '-created_at', '-id'],
+                         name='notification_user_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} - {self.user.username}'
+
+
+class NotificationBroadcast(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    data = models.JSONField(null=True, blank=True)
+    # Sadece bu dildeki kullanıcılar (boşsa herkes)
+    language = models.CharField(max_length=3, null=True, blank=True)
+    # Topic modunda mesaj FCM topic'ine tek çağrıyla gider, worker sadece
+    # inbox satırlarını yazar
+    topic = models.CharField(max_length=255, null=True, blank=True)
+    message_id = models.CharField(max_length=255, null=True, blank=True)
+    created_by = models.ForeignKey(CustomUser, null=True, blank=True, on_delete=models.SET_NULL,
+                                   related_name='notification_broadcasts')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Worker kiralaması: heartbeat_at LEASE_TIMEOUT'tan eskiyse iş başka worker'a geçer
+    worker = models.CharField(max_length=255, null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    # Checkpoint: last_device_id gönderimden önce, confirmed_device_id sonuç
+    # sayaçlarıyla birlikte gönderimden sonra yazılır
+    last_device_id = models.BigIntegerField(default=0)
+    confirmed_device_id = models.BigIntegerField(default=0)
+    total_device_count = models.IntegerField(default=0)
+    sent_count = models.IntegerField(default=0)
+    failure_count = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
+    unconfirmed_count = models.IntegerField(default=0)
+    # Topic modunda FCM cihaz bazında sonuç dönmez: topic'e düşen cihazlar
+    # sent_count'a değil buraya sayılır
+    topic_device_count = models.IntegerField(default=0)
+    inbox_written_count = models.IntegerField(default=0)
+    deactivated_count = models.IntegerField(default=0)
+    batch_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=dict)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='notif_broadcast_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title} ({self.status})'
+
+    @property
+    def processed_count(self):
+        return (self.sent_count + self.failure_count + self.skipped_count + self.unconfirmed_count
+                + self.topic_device_count)
+
+
+class DeviceDeliveryState(models.Model):
+    """Delivery history of one FCMDevice, updated in bulk after every multicast batch."""
+
+    device = models.OneToOneField('fcm_django.FCMDevice', primary_key=True,
+                                  on_delete=models.CASCADE, related_name='delivery_state')
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_failure_at = models.DateTimeField(null=True, blank=True)
+    # Arka arkaya başarısız gönderim sayısı, ilk başarılı gönderimde sıfırlanır
+    failure_streak = models.IntegerField(default=0)
+    last_error = models.CharField(max_length=100, null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.device_id} ({self.failure_streak} failures)'
+
+
+class NotificationCounter(models.Model):
+    """Denormalized unread count of a user's inbox, kept in step with Notification writes."""
+
+    user = models.OneToOneField(CustomUser, primary_key=True, on_delete=models.CASCADE,
+                                related_name='notification_counter')
+    unread_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread_count} unread'
+
+
+class NotificationArchive(models.Model):
+    """
+    Notifications removed from the inbox by the retention purge. Rows are
+    append-only chunks: each purge batch adds one row per user and month it
+    touched. `payload` is the zlib-compressed JSON list of the chunk's
+    notifications, see notification.retention.
+    """
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notification_archives')
+    # Ayın ilk günü
+    month = models.DateField()
+    notification_count = models.IntegerField(default=0)
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-month']
+        indexes = [
+            models.Index(fields=['user', 'month'], name='notification_archive_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.month:%Y-%m} ({self.notification_count})'
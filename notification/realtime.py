@@ -0,0 +1,46 @@
+# notification/realtime.py
+import asyncio
+from logging import getLogger
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = getLogger("my_logger")
+
+
+def user_group_name(user_id) -> str:
+    return f"notifications.user.{user_id}"
+
+
+def push_notifications(notifications):
+    """
+    Sends each Notification to its user's WebSocket group once the current
+    transaction commits. Nothing is pushed when the write rolls back or no
+    channel layer is configured.
+    """
+    from .serializers import NotificationSerializer
+
+    notifications = [notification for notification in notifications if notification.pk]
+    if not notifications:
+        return
+    events = [(user_group_name(notification.user_id),
+               {'type': 'notification.created',
+                'notification': NotificationSerializer(notification).data})
+              for notification in notifications]
+    transaction.on_commit(lambda: send_events(events))
+
+
+def send_events(events):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        async_to_sync(_group_send_all)(layer, events)
+    except Exception:
+        # Push kaçarsa istemci bir sonraki inbox yüklemesinde görür
+        logger.exception("Pushing %s notifications over WebSocket failed", len(events))
+
+
+async def _group_send_all(layer, events):
+    await asyncio.gather(*(layer.group_send(group, event) for group, event in events))
@@ -0,0 +1,154 @@
+# notification/retention.py
+import json
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import timedelta
+from logging import getLogger
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, Q, Sum
+from django.utils import timezone
+
+from .counters import adjust_unread
+from .models import Notification, NotificationArchive
+
+logger = getLogger("my_logger")
+
+DEFAULT_RETENTION_SETTINGS = {
+    # Okunmuş bildirimler bu kadar gün sonra inbox'tan kalkar (None: hiç)
+    'READ_TTL_DAYS': 90,
+    # Okunmamışlar için ayrı süre (None: hiç silinmez)
+    'UNREAD_TTL_DAYS': 365,
+    # Silinenler kullanıcı/ay başına sıkıştırılmış JSON chunk'ları olarak NotificationArchive'e yazılır
+    'ARCHIVE': False,
+    # Tek transaction'da taranan id aralığı genişliği
+    'BATCH_SIZE': 5000,
+    # Chunk'lar arası bekleme (saniye), replikaların yetişmesi için
+    'SLEEP': 0.0,
+}
+
+ARCHIVE_FIELDS = ('id', 'title', 'message', 'is_read', 'created_at', 'broadcast_id')
+
+
+def get_retention_settings() -> dict:
+    return {**DEFAULT_RETENTION_SETTINGS, **getattr(settings, 'NOTIFICATION_RETENTION', {})}
+
+
+def expired_filter(config, now=None):
+    """Q matching notifications past their TTL, or None when nothing ever expires."""
+    now = now or timezone.now()
+    conditions = Q()
+    if config['READ_TTL_DAYS'] is not None:
+        conditions |= Q(is_read=True, created_at__lt=now - timedelta(days=config['READ_TTL_DAYS']))
+    if config['UNREAD_TTL_DAYS'] is not None:
+        conditions |= Q(is_read=False, created_at__lt=now - timedelta(days=config['UNREAD_TTL_DAYS']))
+    return conditions or None
+
+
+def archive_month(created_at):
+    return timezone.localtime(created_at).date().replace(day=1)
+
+
+def encode_archive(notifications) -> bytes:
+    return zlib.compress(json.dumps(notifications, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_archive(payload) -> list:
+    return json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+
+
+def archive_rows(rows):
+    """
+    Appends purged rows (dicts of ARCHIVE_FIELDS plus user_id) as one new
+    chunk per user/month. Earlier chunks are never read or rewritten, so a
+    batch costs the same however much a month already holds. Run inside the
+    transaction that deletes the rows.
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        item = {field: row[field] for field in ARCHIVE_FIELDS}
+        item['created_at'] = row['created_at'].isoformat()
+        groups[(row['user_id'], archive_month(row['created_at']))].append(item)
+
+    chunks = []
+    for (user_id, month), items in groups.items():
+        items.sort(key=lambda item: (item['created_at'], item['id']))
+        chunks.append(NotificationArchive(user_id=user_id, month=month,
+                                          notification_count=len(items),
+                                          payload=encode_archive(items)))
+    NotificationArchive.objects.bulk_create(chunks)
+
+
+def purge_notifications(config=None, dry_run=False, now=None):
+    """
+    Deletes notifications past their TTL, walking the primary key in
+    ranges of BATCH_SIZE ids with one short transaction per range, so
+    no lock is held for long and the pass can be interrupted at any
+    point. Unread counters are decremented with each range; with ARCHIVE
+    the rows are copied to NotificationArchive first.
+
+    Ids grow with created_at, so the walk stops at the first range without
+    expired rows that holds a notification newer than every cutoff, and no
+    created_at index is needed on the hot table. Returns a Counter of
+    read, unread, archived and batch counts.
+    """
+    config = config or get_retention_settings()
+    now = now or timezone.now()
+    expired = expired_filter(config, now)
+    stats = Counter()
+    if expired is None:
+        return stats
+    if dry_run:
+        for is_read in Notification.objects.filter(expired).values_list('is_read', flat=True).iterator():
+            stats['read' if is_read else 'unread'] += 1
+        return stats
+
+    ttls = [days for days in (config['READ_TTL_DAYS'], config['UNREAD_TTL_DAYS']) if days is not None]
+    newest_cutoff = now - timedelta(days=min(ttls))
+    bounds = Notification.objects.aggregate(first_id=Min('id'), last_id=Max('id'))
+    if bounds['first_id'] is None:
+        return stats
+
+    batch_size = config['BATCH_SIZE']
+    columns = ('user_id', *ARCHIVE_FIELDS)
+    for low in range(bounds['first_id'], bounds['last_id'] + 1, batch_size):
+        id_range = Notification.objects.filter(id__gte=low, id__lt=low + batch_size)
+        with transaction.atomic():
+            rows = list(id_range.select_for_update().filter(expired).values(*columns))
+            if not rows:
+                if id_range.filter(created_at__gte=newest_cutoff).exists():
+                    break
+                continue
+            if config['ARCHIVE']:
+                archive_rows(rows)
+                stats['archived'] += len(rows)
+            Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+            unread = Counter(row['user_id'] for row in rows if not row['is_read'])
+            adjust_unread({user_id: -count for user_id, count in unread.items()})
+        stats['unread'] += sum(unread.values())
+        stats['read'] += len(rows) - sum(unread.values())
+        stats['batches'] += 1
+        if config['SLEEP']:
+            time.sleep(config['SLEEP'])
+    logger.info("Notification purge: %s read, %s unread deleted, %s archived in %s batches",
+                stats['read'], stats['unread'], stats['archived'], stats['batches'])
+    return stats
+
+
+def archived_months(user):
+    """[(month, notification_count)] of the user's archive, newest first."""
+    return list(NotificationArchive.objects.filter(user=user)
+                .values('month').annotate(count=Sum('notification_count'))
+                .order_by('-month').values_list('month', 'count'))
+
+
+def archived_notifications(user, month):
+    """The user's archived notifications of `month` (a date), oldest first."""
+    notifications = {}
+    for payload in (NotificationArchive.objects.filter(user=user, month=month)
+                    .values_list('payload', flat=True)):
+        for item in decode_archive(payload):
+            notifications[item['id']] = item
+    return sorted(notifications.values(), key=lambda item: (item['created_at'], item['id']))
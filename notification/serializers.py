@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import Notification
+from .models import Notification, NotificationBroadcast
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -8,3 +8,44 @@ class NotificationSerializer(serializers.ModelSerializer):
         model = Notification
         fields = '__all__'
         read_only_fields = ['user']
+
+
+class NotificationBroadcastSerializer(serializers.ModelSerializer):
+    processed_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = NotificationBroadcast
+        fields = ['id', 'title', 'message', 'language', 'topic', 'message_id', 'status',
+                  'total_device_count', 'processed_count',
+                  'sent_count', 'failure_count', 'skipped_count', 'unconfirmed_count',
+                  'topic_device_count', 'inbox_written_count',
+                  'deactivated_count', 'batch_count', 'errors', 'last_error', 'attempts', 'created_at',
+                  'started_at', 'finished_at', 'heartbeat_at']
+        read_only_fields = fields
+
+
+MAX_BULK_IDS = 1000
+
+
+class NotificationBulkSelectionSerializer(serializers.Serializer):
+    """Exactly one selector of the bulk read/delete endpoints."""
+
+    SELECTORS = ('all', 'ids', 'before_id', 'before')
+
+    # Form ile gelen 'false' gibi değerler de gerçek boolean'a çevrilir
+    all = serializers.BooleanField(required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False,
+                                allow_empty=False, max_length=MAX_BULK_IDS)
+    before_id = serializers.IntegerField(required=False)
+    before = serializers.CharField(required=False)
+
+    def validate_all(self, value):
+        if not value:
+            raise serializers.ValidationError("all must be true when given")
+        return value
+
+    def validate(self, attrs):
+        if len(attrs) != 1:
+            raise serializers.ValidationError(
+                "Exactly one of all, ids, before_id or before is required")
+        return attrs
@@ -1,3 +1,354 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from fcm_django.models import FCMDevice
+from rest_framework.test import APIClient
+
+from authentication.models import CustomUser
+
+from .broadcasts import claim_broadcast, process_broadcast
+from .counters import adjust_unread, counter_key, forget_cached_counts, get_unread_count
+from .fanout import FanOut
+from .models import DeviceDeliveryState, Notification, NotificationArchive, NotificationBroadcast
+from .retention import archived_months, archived_notifications, purge_notifications
+from .transport import InMemoryTransport
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def make_user(email='user@example.com', **values):
+    return CustomUser.objects.create(email=email, **values)
+
+
+def make_notifications(user, count, read=0):
+    notifications = Notification.objects.bulk_create(
+        [Notification(user=user, title=f"Title {index}", message=f"Message {index}",
+                      is_read=index < read)
+         for index in range(count)])
+    adjust_unread({user.id: count - read})
+    return notifications
+
+
+def make_devices(count, devices_per_user=1, app_lang='tr'):
+    users = CustomUser.objects.bulk_create(
+        [CustomUser(email=f"device-user-{index}@example.com", app_lang=app_lang)
+         for index in range(-(-count // devices_per_user))])
+    return FCMDevice.objects.bulk_create(
+        [FCMDevice(user=users[index // devices_per_user], type='android', active=True,
+                   registration_id=f"token-{index}")
+         for index in range(count)])
+
+
+def device_targets(devices):
+    return [(device.id, device.registration_id, device.user_id) for device in devices]
+
+
+class FanOutTests(TestCase):
+    def test_sends_multicasts_of_at_most_500_tokens(self):
+        devices = make_devices(1201, devices_per_user=3)
+        transport = InMemoryTransport(record=True)
+        result = FanOut("Title", "Body", transport=transport, batch_size=1000).send(device_targets(devices))
+
+        self.assertEqual([len(batch['tokens']) for batch in transport.sent], [500, 500, 201])
+        self.assertEqual(sum((batch['tokens'] for batch in transport.sent), []),
+                         [device.registration_id for device in devices])
+        self.assertEqual(result.batch_count, 3)
+        self.assertEqual(result.device_count, 1201)
+
+    def test_maps_each_token_result_to_its_device(self):
+        devices = make_devices(10, devices_per_user=2)
+        dead = {devices[3], devices[6], devices[7]}
+        transport = InMemoryTransport(failing_tokens=[device.registration_id for device in dead])
+        result = FanOut("Title", "Body", transport=transport, batch_size=4).send(device_targets(devices))
+
+        self.assertEqual((result.success_count, result.failure_count), (7, 3))
+        self.assertEqual(result.errors, {'UnregisteredError': 3})
+        self.assertEqual({failure.device_id for failure in result.failures}, {device.id for device in dead})
+        self.assertTrue(all(failure.permanent for failure in result.failures))
+        self.assertEqual(sorted(result.delivered_device_ids),
+                         sorted(device.id for device in devices if device not in dead))
+        self.assertEqual(result.deactivated_count, 3)
+        self.assertEqual(set(FCMDevice.objects.filter(active=False)), dead)
+        self.assertEqual(DeviceDeliveryState.objects.filter(failure_streak=1).count(), 3)
+
+    def test_writes_one_inbox_row_per_reached_user(self):
+        devices = make_devices(6, devices_per_user=2)
+        # Üçüncü kullanıcının iki cihazı da ölü
+        transport = InMemoryTransport(failing_tokens=['token-4', 'token-5'])
+        result = FanOut("Title", "Body", transport=transport, batch_size=3).send(device_targets(devices))
+
+        self.assertEqual(result.inbox_written_count, 2)
+        self.assertEqual(sorted(Notification.objects.values_list('user_id', flat=True)),
+                         sorted({devices[0].user_id, devices[2].user_id}))
+        self.assertEqual(get_unread_count(devices[0].user_id), 1)
+
+    def test_skips_targets_without_token(self):
+        devices = make_devices(2)
+        targets = device_targets(devices) + [(0, None, None)]
+        result = FanOut("Title", "Body", transport=InMemoryTransport()).send(targets)
+        self.assertEqual((result.device_count, result.success_count, result.skipped_count), (3, 2, 1))
+
+
+class BroadcastJobTests(TestCase):
+    def setUp(self):
+        self.devices = make_devices(7, devices_per_user=1)
+        self.transport = InMemoryTransport(record=True, failing_tokens=['token-2'])
+
+    def test_claims_the_oldest_pending_broadcast_once(self):
+        first = NotificationBroadcast.objects.create(title="First", message="Body")
+        NotificationBroadcast.objects.create(title="Second", message="Body")
+        claimed = claim_broadcast('worker-a')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.worker, claimed.total_device_count), ('running', 'worker-a', 7))
+        self.assertNotEqual(claim_broadcast('worker-b').pk, first.pk)
+        self.assertIsNone(claim_broadcast('worker-c'))
+
+    def test_processes_in_checkpointed_chunks(self):
+        NotificationBroadcast.objects.create(title="Title", message="Body")
+        broadcast = process_broadcast(claim_broadcast('worker-a'), 'worker-a',
+                                      transport=self.transport, batch_size=3)
+        self.assertEqual(broadcast.status, 'completed')
+        self.assertEqual([len(batch['tokens']) for batch in self.transport.sent], [3, 3, 1])
+        self.assertEqual((broadcast.sent_count, broadcast.failure_count, broadcast.batch_count), (6, 1, 3))
+        self.assertEqual(broadcast.errors, {'UnregisteredError': 1})
+        self.assertEqual(broadcast.last_device_id, self.devices[-1].id)
+        self.assertEqual(broadcast.confirmed_device_id, self.devices[-1].id)
+        self.assertEqual(Notification.objects.filter(broadcast=broadcast).count(), 6)
+
+    def test_restarted_job_continues_after_the_checkpoint(self):
+        broadcast = NotificationBroadcast.objects.create(
+            title="Title", message="Body", status='running', worker='dead-worker',
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+            last_device_id=self.devices[2].id, confirmed_device_id=self.devices[2].id)
+        broadcast = claim_broadcast('worker-b', lease_timeout=60)
+        self.assertEqual(broadcast.attempts, 1)
+        broadcast = process_broadcast(broadcast, 'worker-b', transport=self.transport, batch_size=10)
+        self.assertEqual(self.transport.sent[0]['tokens'],
+                         [device.registration_id for device in self.devices[3:]])
+        self.assertEqual(broadcast.sent_count, 4)
+
+    def test_interrupted_chunk_is_counted_as_unconfirmed_not_resent(self):
+        NotificationBroadcast.objects.create(
+            title="Title", message="Body", status='running', worker='dead-worker',
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+            last_device_id=self.devices[4].id, confirmed_device_id=self.devices[1].id)
+        broadcast = process_broadcast(claim_broadcast('worker-b', lease_timeout=60), 'worker-b',
+                                      transport=self.transport, batch_size=10)
+        self.assertEqual(broadcast.unconfirmed_count, 3)
+        self.assertEqual(self.transport.sent[0]['tokens'], ['token-5', 'token-6'])
+
+    def test_stops_when_the_lease_is_taken_over(self):
+        NotificationBroadcast.objects.create(title="Title", message="Body")
+        broadcast = claim_broadcast('worker-a')
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(worker='worker-b')
+        self.assertIsNone(process_broadcast(broadcast, 'worker-a', transport=self.transport))
+        self.assertEqual(self.transport.sent, [])
+
+
+class BroadcastInboxTests(TestCase):
+    def test_one_row_per_user_across_chunks(self):
+        devices = make_devices(9, devices_per_user=3)
+        NotificationBroadcast.objects.create(title="Title", message="Body")
+        # 2'lik chunk'lar kullanıcıların cihazlarını farklı chunk'lara böler
+        broadcast = process_broadcast(claim_broadcast('worker-a'), 'worker-a',
+                                      transport=InMemoryTransport(), batch_size=2)
+        self.assertEqual(broadcast.inbox_written_count, 3)
+        self.assertEqual(sorted(Notification.objects.values_list('user_id', flat=True)),
+                         sorted({device.user_id for device in devices}))
+        for device in devices[::3]:
+            self.assertEqual(get_unread_count(device.user_id), 1)
+
+    def test_replayed_chunk_does_not_write_or_count_twice(self):
+        devices = make_devices(4, devices_per_user=2)
+        broadcast = NotificationBroadcast.objects.create(title="Title", message="Body")
+        targets = device_targets(devices)
+        for _ in range(2):
+            fan_out = FanOut("Title", "Body", transport=InMemoryTransport(), broadcast=broadcast)
+            fan_out.send(targets)
+        self.assertEqual(Notification.objects.filter(broadcast=broadcast).count(), 2)
+        self.assertEqual(fan_out.result.inbox_written_count, 0)
+        self.assertEqual(get_unread_count(devices[0].user_id), 1)
+
+
+class NotificationInboxTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.notifications = make_notifications(self.user, 7, read=3)
+        make_notifications(make_user('other@example.com'), 2)
+        # Aynı created_at'li satırlar id ile sıralanmalı
+        moment = timezone.now()
+        for index, notification in enumerate(self.notifications):
+            notification.created_at = moment - timedelta(seconds=index // 2)
+        Notification.objects.bulk_update(self.notifications, ['created_at'])
+        self.expected = [notification.id for notification in
+                         sorted(self.notifications, key=lambda row: (row.created_at, row.id), reverse=True)]
+
+    def walk(self, **params):
+        ids = []
+        while True:
+            response = self.client.get('/user/notification/', {'page_size': 2, **params})
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data)
+            if 'X-Next-Cursor' not in response:
+                return ids
+            params['cursor'] = response['X-Next-Cursor']
+
+    def test_pages_newest_first_without_gaps(self):
+        self.assertEqual(self.walk(), self.expected)
+
+    def test_filters_by_read_state(self):
+        unread = [notification.id for notification in self.notifications if not notification.is_read]
+        self.assertEqual(self.walk(is_read='false'), [notification_id for notification_id in self.expected
+                                                          if notification_id in unread])
+
+    def test_new_rows_do_not_shift_later_pages(self):
+        response = self.client.get('/user/notification/', {'page_size': 3})
+        make_notifications(self.user, 2)
+        response = self.client.get('/user/notification/',
+                                   {'page_size': 3, 'cursor': response['X-Next-Cursor']})
+        self.assertEqual([row['id'] for row in response.data], self.expected[3:6])
+
+    def test_rejects_invalid_cursor(self):
+        response = self.client.get('/user/notification/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+
+@skipIf(fakeredis is None, "fakeredis is not installed")
+@override_settings(NOTIFICATION_UNREAD_COUNTER={'REDIS_URL': 'redis://counter-tests/0'})
+class UnreadCounterCacheTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch('notification.counters.get_counter_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = make_user()
+
+    def test_caches_the_database_count(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_notifications(self.user, 3)
+        self.assertEqual(get_unread_count(self.user.id), 3)
+        self.assertEqual(self.redis.get(counter_key(self.user.id)), b'3')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user.id), 3)
+
+    def test_writes_invalidate_after_commit(self):
+        make_notifications(self.user, 3)
+        get_unread_count(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            adjust_unread({self.user.id: -1})
+            # Commit'ten önce eski değer okunabilir, sonra gitmeli
+            self.assertEqual(self.redis.get(counter_key(self.user.id)), b'3')
+        self.assertIsNone(self.redis.get(counter_key(self.user.id)))
+        self.assertEqual(get_unread_count(self.user.id), 2)
+
+    def test_racing_read_does_not_cache_a_stale_count(self):
+        make_notifications(self.user, 3)
+        mget = self.redis.mget
+
+        def mget_then_write(*keys):
+            values = mget(*keys)
+            # Okuma DB'den eski değeri alırken bir yazma commit'lendi
+            forget_cached_counts([self.user.id])
+            return values
+
+        with mock.patch.object(self.redis, 'mget', mget_then_write):
+            self.assertEqual(get_unread_count(self.user.id), 3)
+        self.assertIsNone(self.redis.get(counter_key(self.user.id)))
+
+
+class RetentionTests(TestCase):
+    config = {'READ_TTL_DAYS': 30, 'UNREAD_TTL_DAYS': 60, 'ARCHIVE': True, 'BATCH_SIZE': 2, 'SLEEP': 0}
+
+    def setUp(self):
+        self.user = make_user()
+        self.now = timezone.now()
+
+    def age(self, notifications, days):
+        for notification in notifications:
+            notification.created_at = self.now - timedelta(days=days)
+        Notification.objects.bulk_update(notifications, ['created_at'])
+
+    def test_purges_expired_rows_and_adjusts_the_counter(self):
+        old_read, old_unread, recent = (make_notifications(self.user, 2, read=2),
+                                        make_notifications(self.user, 2), make_notifications(self.user, 1))
+        self.age(old_read, 40)
+        self.age(old_unread, 70)
+        stats = purge_notifications(self.config, now=self.now)
+        self.assertEqual((stats['read'], stats['unread'], stats['archived']), (2, 2, 4))
+        self.assertEqual(list(Notification.objects.values_list('id', flat=True)), [recent[0].id])
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+    def test_archive_appends_a_chunk_per_pass(self):
+        first = make_notifications(self.user, 3, read=3)
+        self.age(first, 40)
+        purge_notifications(self.config, now=self.now)
+        second = make_notifications(self.user, 2, read=2)
+        self.age(second, 40)
+        purge_notifications(self.config, now=self.now)
+
+        month = timezone.localtime(self.now - timedelta(days=40)).date().replace(day=1)
+        self.assertGreater(NotificationArchive.objects.filter(user=self.user, month=month).count(), 1)
+        self.assertEqual(archived_months(self.user), [(month, 5)])
+        archived = archived_notifications(self.user, month)
+        self.assertEqual(sorted(item['id'] for item in archived),
+                         sorted(notification.id for notification in first + second))
+        self.assertTrue(all(item['is_read'] for item in archived))
+
+    def test_disabled_ttls_purge_nothing(self):
+        self.age(make_notifications(self.user, 2), 400)
+        config = {**self.config, 'READ_TTL_DAYS': None, 'UNREAD_TTL_DAYS': None}
+        self.assertEqual(sum(purge_notifications(config, now=self.now).values()), 0)
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class NotificationBulkTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.other = make_user('other@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_delete_all_counts_unread_rows(self):
+        make_notifications(self.user, 5, read=2)
+        make_notifications(self.other, 3)
+        response = self.client.post('/user/notification/delete/bulk/', {'all': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'deleted': 5, 'unread_count': 0})
+        self.assertEqual(Notification.objects.filter(user=self.other).count(), 3)
+        self.assertEqual(get_unread_count(self.other.id), 3)
+
+    def test_form_encoded_false_selects_nothing(self):
+        make_notifications(self.user, 3)
+        for value in ('false', '0', 'banana'):
+            response = self.client.post('/user/notification/delete/bulk/', {'all': value})
+            self.assertEqual(response.status_code, 400, value)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 3)
+
+    def test_requires_exactly_one_selector(self):
+        notifications = make_notifications(self.user, 3)
+        for data in ({}, {'all': True, 'ids': [notifications[0].id]}):
+            response = self.client.post('/user/notification/read/bulk/', data, format='json')
+            self.assertEqual(response.status_code, 400, data)
+
+    def test_read_by_ids_only_touches_own_notifications(self):
+        own = make_notifications(self.user, 3)
+        foreign = make_notifications(self.other, 1)
+        response = self.client.post('/user/notification/read/bulk/',
+                                    {'ids': [own[0].id, own[1].id, foreign[0].id]}, format='json')
+        self.assertEqual(response.data, {'updated': 2, 'unread_count': 1})
+        self.assertFalse(Notification.objects.get(id=foreign[0].id).is_read)
+
+    def test_before_id_selects_that_row_and_older(self):
+        notifications = make_notifications(self.user, 4)
+        response = self.client.post('/user/notification/delete/bulk/',
+                                    {'before_id': notifications[1].id}, format='json')
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(sorted(Notification.objects.values_list('id', flat=True)),
+                         [notifications[2].id, notifications[3].id])
@@ -0,0 +1,131 @@
+# notification/topics.py
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+
+from django.conf import settings
+from django.db import transaction
+from fcm_django.models import FCMDevice
+
+from .fanout import chunked
+from .transport import get_notification_transport
+
+logger = getLogger("my_logger")
+
+DEFAULT_TOPIC_SETTINGS = {
+    'ENABLED': True,
+    'ALL_TOPIC': 'all',
+    'LANGUAGE_PREFIX': 'lang_',
+    # FCM topic yönetimi çağrısı başına en fazla 1000 token
+    'BATCH_SIZE': 1000,
+    # Cihaz kaydı / dil değişikliği sonrası abonelikler istek thread'ini bekletmez
+    'WORKERS': 2,
+}
+
+INVALID_TOPIC_CHARS = re.compile(r'[^a-zA-Z0-9_.~%-]')
+
+
+def get_topic_settings() -> dict:
+    return {**DEFAULT_TOPIC_SETTINGS, **getattr(settings, 'NOTIFICATION_TOPICS', {})}
+
+
+def all_topic() -> str:
+    return get_topic_settings()['ALL_TOPIC']
+
+
+def language_topic(app_lang) -> str:
+    return get_topic_settings()['LANGUAGE_PREFIX'] + INVALID_TOPIC_CHARS.sub('_', app_lang or '')
+
+
+def topics_for_language(app_lang) -> list:
+    return [all_topic(), language_topic(app_lang)]
+
+
+def change_subscriptions(tokens, topic, subscribe=True, transport=None, batch_size=None):
+    """
+    (Un)subscribes `tokens` to `topic` in calls of at most BATCH_SIZE
+    tokens. Returns (success_count, failure_count); failed tokens are
+    logged, sync_notification_topics fixes any drift later.
+    """
+    transport = transport or get_notification_transport()
+    batch_size = min(batch_size or get_topic_settings()['BATCH_SIZE'],
+                     transport.max_topic_batch_size)
+    change = transport.subscribe_to_topic if subscribe else transport.unsubscribe_from_topic
+
+    success_count = failure_count = 0
+    for batch in chunked(tokens, batch_size):
+        try:
+            result = change(batch, topic)
+        except Exception:
+            logger.exception("Topic %s update for %s tokens failed", topic, len(batch))
+            failure_count += len(batch)
+            continue
+        success_count += result.success_count
+        failure_count += result.failure_count
+        for token, reason in result.errors:
+            logger.warning("Topic %s update failed for token %s...: %s", topic, token[:16], reason)
+    return success_count, failure_count
+
+
+def sync_device_topics(tokens, app_lang, previous_lang=None, transport=None):
+    """Subscribes tokens to `all` and their language topic, leaving the previous language topic."""
+    tokens = list(tokens)
+    if not tokens:
+        return
+    for topic in topics_for_language(app_lang):
+        change_subscriptions(tokens, topic, transport=transport)
+    if previous_lang is not None and language_topic(previous_lang) != language_topic(app_lang):
+        change_subscriptions(tokens, language_topic(previous_lang), subscribe=False,
+                             transport=transport)
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_topic_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            # Fork sonrası ebeveynin thread'leri bu süreçte yok
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=get_topic_settings()['WORKERS'],
+                                               thread_name_prefix='notification-topics')
+                _executor_pid = pid
+    return _executor
+
+
+def _submit(func, *args, **kwargs):
+    def run():
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception("Topic subscription update failed")
+    transaction.on_commit(lambda: get_topic_executor().submit(run))
+
+
+def subscribe_device(device):
+    """Called after a device registers; the FCM calls run in the background after commit."""
+    config = get_topic_settings()
+    if not config['ENABLED'] or not device.registration_id or device.user is None:
+        return
+    if not get_notification_transport().available:
+        return
+    _submit(sync_device_topics, [device.registration_id], device.user.app_lang)
+
+
+def resubscribe_user(user, previous_lang):
+    """Moves the user's active devices from the previous language topic to the current one."""
+    config = get_topic_settings()
+    if not config['ENABLED'] or previous_lang == user.app_lang:
+        return
+    if not get_notification_transport().available:
+        return
+    tokens = list(FCMDevice.objects.filter(user=user, active=True)
+                  .exclude(registration_id='').values_list('registration_id', flat=True))
+    if tokens:
+        _submit(sync_device_topics, tokens, user.app_lang, previous_lang=previous_lang)
@@ -0,0 +1,299 @@
+# notification/transport.py
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import firebase_admin.messaging as fbm
+import requests
+from django.conf import settings
+from firebase_admin import exceptions as fb_exceptions
+
+DEFAULT_DELIVERY_SETTINGS = {
+    # 'fcm', 'fake_http' (yerel sahte FCM sunucusu) veya 'memory' (offline
+    # benchmark / geliştirme)
+    'BACKEND': 'fcm',
+    # FCM tek multicast isteğinde en fazla 500 token kabul ediyor
+    'BATCH_SIZE': 500,
+    'DRY_RUN': False,
+    'MEMORY': {
+        # Her batch için simüle edilen round trip süresi (saniye)
+        'LATENCY': 0.0,
+        'FAILING_TOKENS': [],
+    },
+    'FAKE_HTTP': {
+        # notification.fakefcm.FakeFCMServer adresi
+        'URL': 'http://127.0.0.1:8765',
+        'TIMEOUT': 10.0,
+    },
+}
+
+FCM_MAX_BATCH_SIZE = 500
+# subscribe_to_topic / unsubscribe_from_topic çağrısı başına token limiti
+FCM_MAX_TOPIC_BATCH_SIZE = 1000
+
+
+def get_delivery_settings() -> dict:
+    configured = getattr(settings, 'NOTIFICATION_DELIVERY', {})
+    config = {**DEFAULT_DELIVERY_SETTINGS, **configured}
+    for key in ('MEMORY', 'FAKE_HTTP'):
+        config[key] = {**DEFAULT_DELIVERY_SETTINGS[key], **configured.get(key, {})}
+    return config
+
+
+class SendResult(NamedTuple):
+    token: str
+    success: bool
+    message_id: Optional[str] = None
+    exception: Optional[Exception] = None
+
+
+class TopicResult(NamedTuple):
+    success_count: int
+    failure_count: int
+    # (token, reason) çiftleri
+    errors: list
+
+
+class NotificationTransport:
+    """Sends notifications to batches of registration tokens or to topics."""
+
+    max_batch_size = FCM_MAX_BATCH_SIZE
+    max_topic_batch_size = FCM_MAX_TOPIC_BATCH_SIZE
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def send_multicast(self, tokens, title, body, data=None) -> list:
+        """Returns one SendResult per token, in the order of `tokens`."""
+        raise NotImplementedError
+
+    def send_to_topic(self, topic, title, body, data=None) -> str:
+        """Publishes one message to every device subscribed to `topic`, returns its id."""
+        raise NotImplementedError
+
+    def subscribe_to_topic(self, tokens, topic) -> TopicResult:
+        raise NotImplementedError
+
+    def unsubscribe_from_topic(self, tokens, topic) -> TopicResult:
+        raise NotImplementedError
+
+
+class FCMTransport(NotificationTransport):
+    """
+    firebase_admin's send_each_for_multicast (one call per batch of up to
+    500 tokens), topic sends and topic subscription management.
+    """
+
+    def __init__(self, app=None, dry_run=False):
+        self._app = app
+        self.dry_run = dry_run
+
+    @property
+    def app(self):
+        return self._app or getattr(settings, 'FIREBASE_APP', None)
+
+    @property
+    def available(self):
+        return self.app is not None
+
+    def send_multicast(self, tokens, title, body, data=None):
+        message = fbm.MulticastMessage(
+            tokens=list(tokens),
+            notification=fbm.Notification(title=title, body=body),
+            data=data,
+        )
+        response = fbm.send_each_for_multicast(message, dry_run=self.dry_run, app=self.app)
+        return [SendResult(token, item.success, item.message_id, item.exception)
+                for token, item in zip(message.tokens, response.responses)]
+
+    def send_to_topic(self, topic, title, body, data=None):
+        message = fbm.Message(
+            topic=topic,
+            notification=fbm.Notification(title=title, body=body),
+            data=data,
+        )
+        return fbm.send(message, dry_run=self.dry_run, app=self.app)
+
+    def subscribe_to_topic(self, tokens, topic):
+        tokens = list(tokens)
+        return self._topic_result(tokens, fbm.subscribe_to_topic(tokens, topic, app=self.app))
+
+    def unsubscribe_from_topic(self, tokens, topic):
+        tokens = list(tokens)
+        return self._topic_result(tokens, fbm.unsubscribe_from_topic(tokens, topic, app=self.app))
+
+    @staticmethod
+    def _topic_result(tokens, response):
+        return TopicResult(response.success_count, response.failure_count,
+                           [(tokens[error.index], error.reason) for error in response.errors])
+
+
+class InMemoryTransport(NotificationTransport):
+    """
+    Test double for FCMTransport. Nothing leaves the process: every batch
+    waits `latency` seconds to stand in for the HTTPS round trip, tokens in
+    `failing_tokens` fail with UnregisteredError and everything else
+    succeeds. Sent batches are counted so throughput can be measured.
+    Topic subscriptions are kept in `topics` (topic -> set of tokens).
+    """
+
+    def __init__(self, latency=0.0, failing_tokens=(), record=False):
+        self.latency = latency
+        self.failing_tokens = set(failing_tokens)
+        self.record = record
+        self.sent = []
+        self.batch_count = 0
+        self.token_count = 0
+        self.topics = {}
+        self.topic_messages = []
+        self._lock = threading.Lock()
+
+    def send_multicast(self, tokens, title, body, data=None):
+        tokens = list(tokens)
+        if len(tokens) > self.max_batch_size:
+            raise ValueError(f"At most {self.max_batch_size} tokens per multicast, got {len(tokens)}")
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.batch_count += 1
+            first_id = self.token_count
+            self.token_count += len(tokens)
+            if self.record:
+                self.sent.append({'tokens': tokens, 'title': title, 'body': body, 'data': data})
+
+        results = []
+        for offset, token in enumerate(tokens):
+            if token in self.failing_tokens:
+                error = fbm.UnregisteredError("Requested entity was not found.")
+                results.append(SendResult(token, False, None, error))
+            else:
+                results.append(SendResult(token, True, f"memory/{first_id + offset}"))
+        return results
+
+    def send_to_topic(self, topic, title, body, data=None):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.topic_messages.append({'topic': topic, 'title': title, 'body': body, 'data': data})
+            return f"memory/topic/{len(self.topic_messages)}"
+
+    def subscribe_to_topic(self, tokens, topic):
+        return self._change_topic(tokens, topic, subscribe=True)
+
+    def unsubscribe_from_topic(self, tokens, topic):
+        return self._change_topic(tokens, topic, subscribe=False)
+
+    def _change_topic(self, tokens, topic, subscribe):
+        tokens = list(tokens)
+        if len(tokens) > self.max_topic_batch_size:
+            raise ValueError(f"At most {self.max_topic_batch_size} tokens per topic call, got {len(tokens)}")
+        if self.latency:
+            time.sleep(self.latency)
+        errors = [(token, 'NOT_FOUND') for token in tokens if token in self.failing_tokens]
+        valid = [token for token in tokens if token not in self.failing_tokens]
+        with self._lock:
+            members = self.topics.setdefault(topic, set())
+            if subscribe:
+                members.update(valid)
+            else:
+                members.difference_update(valid)
+        return TopicResult(len(valid), len(errors), errors)
+
+
+class FakeHTTPTransport(NotificationTransport):
+    """
+    Talks to a notification.fakefcm.FakeFCMServer over HTTP, so a fan-out
+    pays for real serialization, sockets and round trips without reaching
+    Firebase. Error codes from the fake come back as the same
+    firebase_admin exceptions FCMTransport would return. Each thread keeps
+    its own keep-alive session.
+    """
+
+    ERRORS = {
+        'UNREGISTERED': fbm.UnregisteredError,
+        'SENDER_ID_MISMATCH': fbm.SenderIdMismatchError,
+        'QUOTA_EXCEEDED': fbm.QuotaExceededError,
+        'UNAVAILABLE': fb_exceptions.UnavailableError,
+        'INTERNAL': fb_exceptions.InternalError,
+    }
+
+    def __init__(self, url, timeout=10.0, dry_run=False):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.dry_run = dry_run
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _post(self, path, payload):
+        response = self.session.post(self.url + path, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def send_multicast(self, tokens, title, body, data=None):
+        tokens = list(tokens)
+        if len(tokens) > self.max_batch_size:
+            raise ValueError(f"At most {self.max_batch_size} tokens per multicast, got {len(tokens)}")
+        response = self._post('/v1/messages:sendEach', {
+            'tokens': tokens, 'title': title, 'body': body, 'data': data, 'dry_run': self.dry_run})
+        results = []
+        for token, item in zip(tokens, response['responses']):
+            if item['success']:
+                results.append(SendResult(token, True, item['message_id']))
+            else:
+                error = self.ERRORS.get(item['error'], fb_exceptions.UnknownError)
+                results.append(SendResult(token, False, None, error(item['error'])))
+        return results
+
+    def send_to_topic(self, topic, title, body, data=None):
+        return self._post('/v1/messages:sendTopic', {
+            'topic': topic, 'title': title, 'body': body, 'data': data,
+            'dry_run': self.dry_run})['message_id']
+
+    def subscribe_to_topic(self, tokens, topic):
+        return self._change_topic('/v1/topics:subscribe', tokens, topic)
+
+    def unsubscribe_from_topic(self, tokens, topic):
+        return self._change_topic('/v1/topics:unsubscribe', tokens, topic)
+
+    def _change_topic(self, path, tokens, topic):
+        tokens = list(tokens)
+        response = self._post(path, {'tokens': tokens, 'topic': topic})
+        return TopicResult(response['success_count'], response['failure_count'],
+                           [(tokens[error['index']], error['reason']) for error in response['errors']])
+
+
+def build_transport(config=None) -> NotificationTransport:
+    config = config or get_delivery_settings()
+    backend = config['BACKEND']
+    if backend == 'fcm':
+        return FCMTransport(dry_run=config['DRY_RUN'])
+    if backend == 'fake_http':
+        options = config['FAKE_HTTP']
+        return FakeHTTPTransport(options['URL'], timeout=options['TIMEOUT'],
+                                 dry_run=config['DRY_RUN'])
+    if backend == 'memory':
+        options = config['MEMORY']
+        return InMemoryTransport(latency=options['LATENCY'],
+                                 failing_tokens=options['FAILING_TOKENS'])
+    raise ValueError(f"Unknown notification transport: {backend}")
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_notification_transport() -> NotificationTransport:
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = build_transport()
+    return _transport
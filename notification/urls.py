@@ -1,8 +1,9 @@
 from django.urls import path
 
-from .api import SendGeneralNotificationAPI
+from .api import NotificationBroadcastDetailAPI, SendGeneralNotificationAPI
 
 urlpatterns = [
     path('general/send/', SendGeneralNotificationAPI.as_view(), name='general-notification-send'),
+    path('broadcasts/<int:pk>/', NotificationBroadcastDetailAPI.as_view(), name='notification-broadcast-detail'),
 
 ]
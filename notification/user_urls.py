@@ -1,12 +1,17 @@
 from django.urls import path
 
-from .api import (NotificationDetail, NotificationListCreate, NotificationRead,
-                  SendNotificationAPI)
+from .api import (NotificationArchiveList, NotificationBulkDelete, NotificationBulkRead,
+                  NotificationDetail, NotificationListCreate, NotificationRead,
+                  NotificationUnreadCount, SendNotificationAPI)
 
 urlpatterns = [
     path('', NotificationListCreate.as_view(), name='notification-list-create'),
     path('<int:pk>/', NotificationDetail.as_view(), name='notification-detail'),
     path('read/', NotificationRead.as_view(), name='notification-read'),
+    path('read/bulk/', NotificationBulkRead.as_view(), name='notification-bulk-read'),
+    path('delete/bulk/', NotificationBulkDelete.as_view(), name='notification-bulk-delete'),
+    path('archive/', NotificationArchiveList.as_view(), name='notification-archive'),
+    path('unread-count/', NotificationUnreadCount.as_view(), name='notification-unread-count'),
     path('send/', SendNotificationAPI.as_view(), name='notification-send'),
 
 ]
@@ -1,4 +1,5 @@
 import json
+from logging import getLogger
 
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -14,11 +15,14 @@ from rest_framework.views import APIView, status
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from authentication.models import CustomUser
+from notification.topics import resubscribe_user
 from utils.utils import (CustomErrorResponse, CustomSuccessResponse,
                          send_notification)
 
 from .serializers import UserProfileSerializer, UserProfileTestSerializer
 
+logger = getLogger("my_logger")
+
 
 class UserProfileDetailAPI(APIView):
     permission_classes = [IsAuthenticated]
@@ -65,7 +69,7 @@ class TestAPI(APIView):
     def get(self, request):
         users = CustomUser.objects.all()
         serializer = UserProfileTestSerializer(users, many=True)
-        print(send_notification("dd0MdIfRTQakTHGTt4hqXR:APA91bHSmZ-lkYdGj7YizmmvA07rl_9IDsTSLriwd1fM4iEPPuTtkihfVuGIRYF4pSF9oFmeD-ASdSzuEwO6mqKIUGG-CjdAEpCxG97wykRxxOhWb9q8SX1o06H1mLH-g0gSZnKmM7ZO"))
+        logger.info("Test notification result: %s", send_notification("dd0MdIfRTQakTHGTt4hqXR:APA91bHSmZ-lkYdGj7YizmmvA07rl_9IDsTSLriwd1fM4iEPPuTtkihfVuGIRYF4pSF9oFmeD-ASdSzuEwO6mqKIUGG-CjdAEpCxG97wykRxxOhWb9q8SX1o06H1mLH-g0gSZnKmM7ZO"))
         return CustomSuccessResponse(input_data=serializer.data)
 
 
@@ -148,11 +152,13 @@ class UserLanguageAPI(APIView):
     def put(self, request):
         user = request.user
         data = request.data
+        previous_lang = user.app_lang
 
         if 'app_lang' in data:
             user.app_lang = data['app_lang']
 
         user.save()
+        resubscribe_user(user, previous_lang)
         return Response(status=status.HTTP_200_OK)
 
 
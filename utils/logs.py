@@ -0,0 +1,183 @@
+# utils/logs.py
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# RequestIdMiddleware tarafından her istek için set edilir
+request_id_var = ContextVar('request_id', default=None)
+
+# LogRecord'un kendi alanları; bunların dışındakiler `extra` olarak JSON'a girer
+RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'suppressed',
+}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request's correlation id on every record."""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` records per call site (logger, file, line) through
+    every `period` seconds. Suppressed records are counted and the count is
+    reported on the next record that gets through from the same call site,
+    so a per-device warning loop turns into a few lines plus a summary.
+    """
+
+    def __init__(self, name='', burst=20, period=60.0):
+        super().__init__(name)
+        self.burst = burst
+        self.period = period
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id, extras."""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'line': record.lineno,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            payload['suppressed'] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exception'] = record.exc_text
+
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Console format with the request id and the suppressed-count summary."""
+
+    def format(self, record):
+        text = super().format(record)
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            text = f"[{request_id}] {text}"
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return text
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded in-memory queue and returns immediately. Its
+    own QueueListener thread formats them and writes the size-rotated JSON
+    file and the console. When the queue is full the record is dropped and
+    counted instead of blocking the caller.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 file_level='DEBUG', console_level='WARNING', queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.queue_size = queue_size
+        self.dropped_count = 0
+
+        file_handler = RotatingFileHandler(filename, maxBytes=max_bytes,
+                                           backupCount=backup_count, encoding='utf-8', delay=True)
+        file_handler.setLevel(file_level)
+        file_handler.setFormatter(JSONFormatter())
+
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setLevel(console_level)
+        console_handler.setFormatter(TextFormatter('{levelname} {message}', style='{'))
+
+        self.target_handlers = (file_handler, console_handler)
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def prepare(self, record):
+        # Mesaj ve traceback bu thread'de metne çevrilir, listener thread'i
+        # args/exc_info nesnelerine dokunmaz
+        message = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared = logging.makeLogRecord(record.__dict__)
+        prepared.msg = message
+        prepared.args = None
+        prepared.exc_info = None
+        prepared.exc_text = exc_text
+        return prepared
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_count += 1
+
+    def emit(self, record):
+        self._ensure_started()
+        super().emit(record)
+
+    def stop(self):
+        listener = self._listener
+        if listener is not None and self._pid == os.getpid():
+            self._listener = None
+            listener.stop()
+        for handler in self.target_handlers:
+            handler.close()
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._listener is not None and self._pid == pid:
+            return
+        with self._start_lock:
+            if self._listener is not None and self._pid == pid:
+                return
+            # Fork sonrası listener thread'i yeni süreçte yok, kuyruğun
+            # kilitleri de ebeveynden kalma olabilir
+            if self._pid is not None:
+                self.queue = queue.Queue(maxsize=self.queue_size)
+            self._listener = QueueListener(self.queue, *self.target_handlers,
+                                           respect_handler_level=True)
+            self._listener.start()
+            self._pid = pid
@@ -0,0 +1,34 @@
+import re
+import uuid
+
+from .logs import request_id_var
+
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+RESPONSE_HEADER = 'X-Request-ID'
+# Proxy'den gelen id loglara olduğu gibi yazılacağı için sınırlı karakter
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestIdMiddleware:
+    """
+    Gives every request a correlation id, taken from the X-Request-ID header
+    when the proxy sent a sane one. Every log record emitted while handling
+    the request carries it, and it is echoed back in the response header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.META.get(REQUEST_ID_HEADER, '')
+        if not VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+
+        token = request_id_var.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response[RESPONSE_HEADER] = request_id
+        return response
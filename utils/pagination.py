@@ -0,0 +1,168 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Row estimate from the Postgres planner (EXPLAIN) instead of COUNT(*).
+    Other databases get the exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPagination:
+    """
+    Cursor pagination that seeks on (ordering field, id) instead of using
+    OFFSET, so every page costs the same no matter how deep it is and no
+    COUNT(*) is needed. Cursors are opaque base64 tokens that also pin the
+    ordering they were issued for.
+    """
+
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    default_ordering = '-id'
+    ordering_fields = ('id',)
+
+    def paginate_queryset(self, queryset, request, ordering=None):
+        self.request = request
+        self.field, self.descending = self._parse_ordering(ordering or self.default_ordering)
+        self.page_size = self.get_page_size(request)
+        self.model_field = queryset.model._meta.get_field(self.field)
+
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        reverse = cursor is not None and cursor['direction'] == 'previous'
+
+        # Önceki sayfa için sıralamayı ters çevirip sonucu geri çeviriyoruz
+        descending = self.descending != reverse
+        if cursor is not None:
+            queryset = queryset.filter(self._seek(cursor['value'], cursor['id'], descending))
+
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.rows = rows
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self._link(self.rows[-1], 'next')
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.rows:
+            return None
+        return self._link(self.rows[0], 'previous')
+
+    def get_next_cursor(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self.encode_cursor(self.rows[-1], 'next')
+
+    def encode_cursor(self, row, direction):
+        value = getattr(row, self.field)
+        payload = OrderedDict([
+            ('f', self.field),
+            ('d', self.descending),
+            ('v', self.model_field.value_to_string(row) if value is not None else None),
+            ('i', row.pk),
+            ('p', direction == 'previous'),
+        ])
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if payload['f'] != self.field or payload['d'] != self.descending:
+                raise InvalidCursor("Cursor was issued for a different ordering")
+            return {
+                'value': self.model_field.to_python(payload['v']),
+                'id': int(payload['i']),
+                'direction': 'previous' if payload.get('p') else 'next',
+            }
+        except InvalidCursor:
+            raise
+        except Exception:
+            raise InvalidCursor("Invalid cursor")
+
+    def cursor_position(self, queryset, encoded, ordering=None):
+        """(ordering value, id) of the row a cursor points at, for callers that seek themselves."""
+        self.field, self.descending = self._parse_ordering(ordering or self.default_ordering)
+        self.model_field = queryset.model._meta.get_field(self.field)
+        cursor = self.decode_cursor(encoded)
+        if cursor is None:
+            raise InvalidCursor("Invalid cursor")
+        return cursor['value'], cursor['id']
+
+    def _parse_ordering(self, ordering):
+        descending = ordering.startswith('-')
+        field = ordering.lstrip('-')
+        if field not in self.ordering_fields:
+            field, descending = self.default_ordering.lstrip('-'), self.default_ordering.startswith('-')
+        return field, descending
+
+    def _seek(self, value, pk, descending):
+        # (field, id) < (value, pk); `field <= value` sınırı index range scan için
+        if descending:
+            return Q(**{f'{self.field}__lte': value}) & (
+                Q(**{f'{self.field}__lt': value}) | Q(id__lt=pk))
+        return Q(**{f'{self.field}__gte': value}) & (
+            Q(**{f'{self.field}__gt': value}) | Q(id__gt=pk))
+
+    def _link(self, row, direction):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, direction))
@@ -1,15 +1,24 @@
 import base64
 import os
+import threading
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
+from logging import getLogger
 
+import google_auth_httplib2
+import httplib2
+import requests
 from django.conf import settings
-from firebase_admin import credentials, initialize_app, messaging
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from rest_framework import status
 from rest_framework.response import Response
 
+from notification.transport import get_notification_transport
+
+logger = getLogger("my_logger")
+
 
 class CustomErrorResponse(Response):
 
@@ -48,19 +57,94 @@ class CustomSuccessResponse(Response):
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
+DEFAULT_GMAIL_SETTINGS = {
+    # Access token bitmesine bu kadar saniye kala yenilenir
+    'REFRESH_MARGIN': 300,
+    'TIMEOUT': 30,
+}
+
+
+def get_gmail_settings() -> dict:
+    return {**DEFAULT_GMAIL_SETTINGS, **getattr(settings, 'GMAIL_CLIENT', {})}
+
+
+class GmailClient:
+    """
+    Process-wide Gmail API client. The OAuth access token is cached and
+    refreshed under a lock only when it is about to expire, the service is
+    built once from the discovery document bundled with
+    google-api-python-client (no discovery fetch), and every thread sends
+    through its own keep-alive AuthorizedHttp because httplib2 connections
+    can't be shared between threads.
+    """
+
+    def __init__(self, client_id, client_secret, refresh_token, refresh_margin=300, timeout=30):
+        self.credentials = Credentials(
+            None,
+            refresh_token=refresh_token,
+            token_uri='https://oauth2.googleapis.com/token',
+            client_id=client_id,
+            client_secret=client_secret,
+            scopes=SCOPES
+        )
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.timeout = timeout
+        self._refresh_lock = threading.Lock()
+        self._refresh_request = Request(requests.Session())
+        self._local = threading.local()
+        self.service = build('gmail', 'v1', credentials=self.credentials,
+                             static_discovery=True, cache_discovery=False)
+
+    def _needs_refresh(self) -> bool:
+        expiry = self.credentials.expiry
+        # google-auth expiry'yi naive UTC tutuyor
+        return (not self.credentials.token or expiry is None
+                or expiry - datetime.utcnow() < self.refresh_margin)
+
+    def ensure_fresh_token(self):
+        if not self._needs_refresh():
+            return
+        with self._refresh_lock:
+            # Kilidi bekleyen diğer thread'ler token'ı tekrar yenilemesin
+            if self._needs_refresh():
+                self.credentials.refresh(self._refresh_request)
+
+    @property
+    def http(self) -> google_auth_httplib2.AuthorizedHttp:
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = google_auth_httplib2.AuthorizedHttp(
+                self.credentials, http=httplib2.Http(timeout=self.timeout))
+        return http
+
+    def send(self, message) -> dict:
+        self.ensure_fresh_token()
+        return self.service.users().messages().send(userId='me', body=message).execute(http=self.http)
+
+
+_gmail_client = None
+_gmail_client_pid = None
+_gmail_client_lock = threading.Lock()
+
+
+def get_gmail_client() -> GmailClient:
+    global _gmail_client, _gmail_client_pid
+    pid = os.getpid()
+    if _gmail_client is None or _gmail_client_pid != pid:
+        with _gmail_client_lock:
+            # Fork edilen worker ebeveynin soket ve kilitlerini kullanmasın
+            if _gmail_client is None or _gmail_client_pid != pid:
+                config = get_gmail_settings()
+                _gmail_client = GmailClient(settings.GOOGLE_CLIENT_ID, settings.GOOGLE_CLIENT_SECRET,
+                                            settings.GOOGLE_REFRESH_TOKEN,
+                                            refresh_margin=config['REFRESH_MARGIN'],
+                                            timeout=config['TIMEOUT'])
+                _gmail_client_pid = pid
+    return _gmail_client
+
 
 def get_gmail_service():
-    creds = Credentials(
-        None,
-        token_uri='https://oauth2.googleapis.com/token',
-        client_id=settings.GOOGLE_CLIENT_ID,
-        client_secret=settings.GOOGLE_CLIENT_SECRET,
-        scopes=SCOPES
-    )
-    if not creds.valid:
-        creds.refresh(Request())
-    service = build('gmail', 'v1', credentials=creds)
-    return service
+    return get_gmail_client().service
 
 
 def create_message(sender, to, subject, message_text):
@@ -72,28 +156,21 @@ def create_message(sender, to, subject, message_text):
 
 
 def send_email(subject, body, to):
-    service = get_gmail_service()
     message = create_message('me', to, subject, body)
     try:
-        sent_message = service.users().messages().send(
-            userId='me', body=message).execute()
-        print(f'Message Id: {sent_message["id"]}')
+        sent_message = get_gmail_client().send(message)
+        logger.info("Email sent, message id: %s", sent_message["id"])
     except Exception as error:
-        print(f'An error occurred: {error}')
+        logger.error("Email could not be sent: %s", error)
 
 
 def send_notification(token):
     try:
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title="title",
-                body="message",
-            ),
-            token=token,
-        )
-        response = messaging.send(message)
-        return response
+        result, = get_notification_transport().send_multicast([token], "title", "message")
+        if not result.success:
+            raise result.exception
+        return result.message_id
 
     except Exception as e:
-        print(str(e))
+        logger.error("Notification could not be sent: %s", e)
         return str(e)